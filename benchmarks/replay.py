@@ -0,0 +1,360 @@
+# -*- coding: utf-8 -*-
+"""
+week6_task/api.py, week7_task/main.py 부하 테스트 / 지연 시간 벤치마크.
+
+요청 스트림(JSONL 파일 또는 앱별 합성 요청)을 재생하고 엔드포인트별 처리량, p50/p95/p99 지연 시간,
+오류율을 출력한 뒤 결과를 JSON으로 저장합니다. 저장한 결과끼리 비교해 커밋 사이의 성능 변화를 확인할 수 있습니다.
+
+대상:
+  (기본)      ASGI 인프로세스 (httpx.ASGITransport, 서버 실행 불필요, lifespan 실행)
+  --uvicorn   앱 폴더에서 로컬 uvicorn을 빈 포트로 띄워 HTTP로 요청 (끝나면 종료)
+  --url URL   이미 실행 중인 서버로 요청
+
+부하 모델:
+  closed (기본)  동시성 C로 요청 N개를 보냄 (응답을 받으면 다음 요청)
+  open           초당 R개의 포아송 도착(지수 분포 간격)으로 요청 N개를 보냄. 응답을 기다리지 않으므로
+                 서버가 느려지면 대기열이 쌓이며, 지연 시간은 예정된 도착 시각부터 잽니다.
+
+요청 파일 형식 (한 줄에 하나):
+  {"method": "POST", "path": "/predict/", "json": {...}, "params": {...}, "name": "predict"}
+  "path"가 없는 줄은 건너뜁니다 (저장소 루트의 requests.jsonl은 작업 목록이라 모두 건너뜀).
+
+실행 예 (저장소 루트에서):
+  python benchmarks/replay.py week6 -n 2000 -c 32
+  python benchmarks/replay.py week7 --mode open --rate 50 -n 1000 --uvicorn
+  python benchmarks/replay.py week7 --requests my_stream.jsonl --out results/week7.json
+  python benchmarks/replay.py week7 --compare results/old.json
+  python benchmarks/replay.py week6 -n 500 --save-stream week6_stream.jsonl   # 합성 스트림 저장
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(REPO_DIR, 'benchmarks', 'results')
+
+# 앱 이름 -> (폴더, ASGI 앱 경로)
+APPS = {
+    'week6': ('week6_task', 'api:app'),
+    'week7': ('week7_task', 'main:app'),
+}
+
+COUNTRIES = ['United States', 'Canada', 'France', 'Germany', 'Australia', 'United Kingdom', 'Japan']
+
+
+# --- 합성 요청 (앱별 가중치가 있는 요청 종류) ---
+
+def _iris_row(rng):
+    return {"sl": round(rng.uniform(4.3, 7.9), 1), "sw": round(rng.uniform(2.0, 4.4), 1),
+            "pl": round(rng.uniform(1.0, 6.9), 1), "pw": round(rng.uniform(0.1, 2.5), 1)}
+
+
+def _customer_row(rng):
+    return {"Recency_Snapshot": rng.randint(0, 1000), "Frequency": rng.randint(1, 20),
+            "Monetary": round(rng.uniform(5, 20000), 2), "Country-Region": rng.choice(COUNTRIES)}
+
+
+SYNTHETIC = {
+    'week6': [
+        (70, lambda rng: {"name": "predict", "method": "POST", "path": "/predict/", "json": _iris_row(rng)}),
+        (25, lambda rng: {"name": "predict_batch_100", "method": "POST", "path": "/predict/batch",
+                          "json": {"rows": [_iris_row(rng) for _ in range(100)]}}),
+        (5, lambda rng: {"name": "root", "method": "GET", "path": "/"}),
+    ],
+    'week7': [
+        (70, lambda rng: {"name": "predict_customer_purchase", "method": "POST",
+                          "path": "/predict_customer_purchase", "json": _customer_row(rng)}),
+        (10, lambda rng: {"name": "reseller_eda_pandas", "method": "GET", "path": "/analysis/reseller_eda",
+                          "params": {"engine": "pandas"}}),
+        (10, lambda rng: {"name": "reseller_eda_sql", "method": "GET", "path": "/analysis/reseller_eda",
+                          "params": {"engine": "sql"}}),
+        (10, lambda rng: {"name": "customer_rfm", "method": "GET", "path": "/analysis/customer_rfm"}),
+    ],
+}
+
+
+def synthetic_requests(app_name, n, seed):
+    rng = random.Random(seed)
+    weights, makers = zip(*SYNTHETIC[app_name])
+    return [rng.choices(makers, weights)[0](rng) for _ in range(n)]
+
+
+def load_requests(path, n):
+    """JSONL 요청 파일을 읽습니다. "path"가 없는 줄은 건너뛰고, n개가 될 때까지 파일을 반복합니다."""
+    stream, skipped = [], 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            try:
+                item = json.loads(line)
+            except ValueError:
+                skipped += 1
+                continue
+            if not isinstance(item, dict) or 'path' not in item:
+                skipped += 1
+                continue
+            item.setdefault('method', 'GET')
+            item.setdefault('name', f"{item['method']} {item['path']}")
+            stream.append(item)
+    if skipped:
+        print(f"'{path}'에서 요청이 아닌 줄 {skipped}개를 건너뛰었습니다 (\"path\" 없음).")
+    if not stream:
+        return [], skipped
+    return [stream[i % len(stream)] for i in range(n or len(stream))], skipped
+
+
+# --- 실행 ---
+
+async def send(client, item, records, scheduled=None):
+    """요청 하나를 보내고 (이름, 지연 시간, 성공 여부)를 기록합니다. open 모드는 예정 시각부터 측정."""
+    start = scheduled if scheduled is not None else time.perf_counter()
+    try:
+        response = await client.request(item['method'], item['path'], params=item.get('params'),
+                                        json=item.get('json'))
+        ok = response.status_code < 400
+        status = response.status_code
+    except Exception as e:
+        ok, status = False, type(e).__name__
+    records.append((item['name'], time.perf_counter() - start, ok, status))
+
+
+async def run_closed(client, stream, concurrency):
+    records = []
+    queue = list(reversed(stream))
+
+    async def worker():
+        while queue:
+            await send(client, queue.pop(), records)
+
+    await asyncio.gather(*[worker() for _ in range(min(concurrency, len(stream)))])
+    return records
+
+
+async def run_open(client, stream, rate, seed):
+    records = []
+    rng = np.random.default_rng(seed)
+    arrivals = np.cumsum(rng.exponential(1.0 / rate, len(stream)))
+    start = time.perf_counter()
+    tasks = []
+    for item, offset in zip(stream, arrivals):
+        delay = start + offset - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(send(client, item, records, scheduled=start + offset)))
+    await asyncio.gather(*tasks)
+    return records
+
+
+async def run_stream(client, stream, args):
+    for item in stream[:args.warmup]:   # 워밍업 (캐시, 모델, 연결 준비)
+        await send(client, item, [])
+    start = time.perf_counter()
+    if args.mode == 'open':
+        records = await run_open(client, stream, args.rate, args.seed)
+    else:
+        records = await run_closed(client, stream, args.concurrency)
+    return records, time.perf_counter() - start
+
+
+async def run_in_process(app_name, stream, args):
+    folder, target = APPS[app_name]
+    app_dir = os.path.join(REPO_DIR, folder)
+    sys.path.insert(0, app_dir)
+    os.chdir(app_dir)   # 앱이 상대 경로(models/, data/)를 사용
+    module_name, attr = target.split(':')
+    app = getattr(__import__(module_name), attr)
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app):
+        async with httpx.AsyncClient(transport=transport, base_url="http://replay", timeout=args.timeout) as client:
+            return await run_stream(client, stream, args)
+
+
+async def run_http(base_url, stream, args):
+    limits = httpx.Limits(max_connections=max(args.concurrency, 100))
+    async with httpx.AsyncClient(base_url=base_url, timeout=args.timeout, limits=limits) as client:
+        return await run_stream(client, stream, args)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def start_uvicorn(app_name, workers):
+    """앱 폴더에서 uvicorn을 빈 포트로 실행하고 응답할 때까지 기다립니다."""
+    folder, target = APPS[app_name]
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, '-m', 'uvicorn', target, '--port', str(port), '--log-level', 'warning',
+                             '--workers', str(workers)],
+                            cwd=os.path.join(REPO_DIR, folder))
+    base_url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 120
+    while time.time() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"uvicorn이 종료되었습니다 (코드 {proc.returncode}).")
+        try:
+            httpx.get(base_url + "/docs", timeout=1)
+            return proc, base_url
+        except httpx.HTTPError:
+            time.sleep(0.3)
+    proc.terminate()
+    raise RuntimeError("uvicorn이 120초 안에 시작되지 않았습니다.")
+
+
+# --- 결과 ---
+
+def summarize(records, elapsed):
+    """엔드포인트별(+ 전체) 요청 수, 처리량, 오류율, 지연 시간 분포(ms)."""
+    groups = {}
+    for name, latency, ok, status in records:
+        groups.setdefault(name, []).append((latency, ok, status))
+    groups['__all__'] = [(lat, ok, status) for _, lat, ok, status in records]
+    summary = {}
+    for name, items in groups.items():
+        lat = np.array([x[0] for x in items]) * 1000.0
+        errors = [x[2] for x in items if not x[1]]
+        summary[name] = {
+            "requests": len(items),
+            "throughput_rps": len(items) / elapsed if elapsed > 0 else None,
+            "error_rate": len(errors) / len(items),
+            "errors_by_status": {str(k): errors.count(k) for k in set(errors)},
+            "mean_ms": float(lat.mean()),
+            "p50_ms": float(np.percentile(lat, 50)),
+            "p95_ms": float(np.percentile(lat, 95)),
+            "p99_ms": float(np.percentile(lat, 99)),
+            "max_ms": float(lat.max()),
+        }
+    return summary
+
+
+def print_summary(summary):
+    print(f"{'endpoint':<30}{'n':>7}{'req/s':>9}{'err%':>7}{'p50ms':>9}{'p95ms':>9}{'p99ms':>9}")
+    for name, s in sorted(summary.items(), key=lambda kv: kv[0] == '__all__'):
+        print(f"{name:<30}{s['requests']:>7}{s['throughput_rps']:>9.1f}{s['error_rate'] * 100:>7.1f}"
+              f"{s['p50_ms']:>9.2f}{s['p95_ms']:>9.2f}{s['p99_ms']:>9.2f}")
+
+
+def compare(summary, baseline_path):
+    """이전 결과 JSON과 엔드포인트별 p50/p99, 처리량 변화율을 비교해 출력합니다."""
+    with open(baseline_path, encoding='utf-8') as f:
+        baseline = json.load(f)
+    print(f"\n비교 기준: {baseline_path} (commit {baseline['meta'].get('git_commit')})")
+    print(f"{'endpoint':<30}{'p50 변화':>12}{'p99 변화':>12}{'req/s 변화':>12}")
+    for name, s in summary.items():
+        old = baseline['endpoints'].get(name)
+        if old is None:
+            continue
+        change = lambda new, prev: f"{(new - prev) / prev * 100:+.1f}%" if prev else "-"  # noqa: E731
+        print(f"{name:<30}{change(s['p50_ms'], old['p50_ms']):>12}{change(s['p99_ms'], old['p99_ms']):>12}"
+              f"{change(s['throughput_rps'], old['throughput_rps']):>12}")
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="요청 스트림을 재생해 API 처리량/지연 시간을 측정합니다.")
+    parser.add_argument('app', choices=sorted(APPS), help="대상 앱")
+    parser.add_argument('--requests', help="요청 JSONL 파일 (없으면 앱별 합성 요청)")
+    parser.add_argument('-n', type=int, help="보낼 요청 수 (기본: 합성 요청 1000개, 요청 파일은 파일의 요청 수)")
+    parser.add_argument('--mode', choices=('closed', 'open'), default='closed', help="부하 모델")
+    parser.add_argument('-c', '--concurrency', type=int, default=16, help="closed 모드 동시성 (기본 16)")
+    parser.add_argument('--rate', type=float, default=50.0, help="open 모드 초당 평균 도착 수 (기본 50)")
+    parser.add_argument('--warmup', type=int, default=20, help="측정 전에 보낼 요청 수 (기본 20)")
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--timeout', type=float, default=60.0, help="요청 타임아웃(초)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--uvicorn', action='store_true', help="로컬 uvicorn을 띄워 HTTP로 요청")
+    target.add_argument('--url', help="실행 중인 서버 주소 (예: http://127.0.0.1:8000)")
+    parser.add_argument('--uvicorn-workers', type=int, default=1, help="--uvicorn 워커 수")
+    parser.add_argument('--out', help="결과 JSON 경로 (기본 benchmarks/results/<앱>-<커밋>-<시각>.json)")
+    parser.add_argument('--compare', help="비교할 이전 결과 JSON")
+    parser.add_argument('--save-stream', help="재생한 요청 스트림을 JSONL로 저장 (--requests로 다시 재생 가능)")
+    args = parser.parse_args(argv)
+    # 인프로세스 실행은 앱 폴더로 작업 폴더를 옮기므로 파일 경로는 미리 절대 경로로 바꿈
+    for name in ('requests', 'out', 'compare', 'save_stream'):
+        if getattr(args, name):
+            setattr(args, name, os.path.abspath(getattr(args, name)))
+    return args
+
+
+def main(argv=None):
+    args = parse_args(argv)
+    if args.requests:
+        stream, _ = load_requests(args.requests, args.n)
+        if not stream:
+            print(f"'{args.requests}'에 재생할 요청이 없습니다.")
+            return 1
+    else:
+        stream = synthetic_requests(args.app, args.n or 1000, args.seed)
+    if args.save_stream:
+        with open(args.save_stream, 'w', encoding='utf-8') as f:
+            for item in stream:
+                f.write(json.dumps(item, ensure_ascii=False) + '\n')
+
+    target = 'asgi'
+    proc = None
+    try:
+        if args.url:
+            target = args.url
+            records, elapsed = asyncio.run(run_http(args.url, stream, args))
+        elif args.uvicorn:
+            proc, base_url = start_uvicorn(args.app, args.uvicorn_workers)
+            target = f"uvicorn ({args.uvicorn_workers} workers)"
+            records, elapsed = asyncio.run(run_http(base_url, stream, args))
+        else:
+            records, elapsed = asyncio.run(run_in_process(args.app, stream, args))
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    summary = summarize(records, elapsed)
+    load = f"동시성 {args.concurrency}" if args.mode == 'closed' else f"도착률 {args.rate}/s"
+    print(f"\n{args.app} / {target} / {args.mode} ({load}) / 요청 {len(records)}개 / {elapsed:.1f}초")
+    print_summary(summary)
+
+    result = {
+        "meta": {
+            "app": args.app, "target": target, "mode": args.mode,
+            "concurrency": args.concurrency if args.mode == 'closed' else None,
+            "rate": args.rate if args.mode == 'open' else None,
+            "requests": len(records), "elapsed_s": elapsed, "seed": args.seed,
+            "request_file": args.requests, "git_commit": git_commit(),
+            "python": platform.python_version(), "cpu_count": os.cpu_count(),
+            "at": datetime.datetime.now().isoformat(timespec='seconds'),
+        },
+        "endpoints": summary,
+    }
+    out = args.out or os.path.join(
+        RESULTS_DIR, f"{args.app}-{result['meta']['git_commit'] or 'nogit'}-"
+                     f"{datetime.datetime.now().strftime('%Y%m%d-%H%M%S')}.json")
+    os.makedirs(os.path.dirname(out), exist_ok=True)
+    with open(out, 'w', encoding='utf-8') as f:
+        json.dump(result, f, ensure_ascii=False, indent=2)
+    print(f"결과 저장: {out}")
+    if args.compare:
+        compare(summary, args.compare)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
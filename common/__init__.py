@@ -0,0 +1,3 @@
+# -*- coding: utf-8 -*-
+# week6_task와 week7_task가 함께 쓰는 모듈 (요청 계측 등).
+# 각 폴더의 common_path.py가 저장소 루트를 sys.path에 추가하므로, 폴더 안에서 실행해도 import할 수 있습니다.
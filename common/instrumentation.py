@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+import bisect
+import contextlib
+import contextvars
+import datetime
+import os
+import random
+import re
+import threading
+import time
+
+# 히스토그램 버킷 (초)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+try:
+    from pyinstrument import Profiler as _SamplingProfiler  # 샘플링 프로파일러 (설치되어 있으면 사용)
+except ImportError:
+    _SamplingProfiler = None
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+class Histogram:
+    """레이블별 Prometheus 히스토그램 (버킷별 개수, 합계, 개수). observe는 락 한 번 + 이진 탐색."""
+
+    def __init__(self, name, help_text, label_names=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(buckets)
+        self._series = {}   # 레이블 값 튜플 -> [버킷별 개수..., 합계, 개수]
+        self._lock = threading.Lock()
+
+    def observe(self, value, *label_values):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 2)
+            if index < len(self.buckets):
+                series[index] += 1
+            series[-2] += value
+            series[-1] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = [(labels, list(series)) for labels, series in sorted(self._series.items())]
+        for labels, series in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, series):
+                cumulative += count
+                le = 'le="%s"' % bound
+                lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {cumulative}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.label_names, labels, le)} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {series[-1]}")
+        return lines
+
+
+class CallbackMetric:
+    """/metrics 요청 때 함수를 호출해 값을 읽는 gauge/counter. fn은 숫자 또는 (레이블 dict, 숫자) 리스트를 반환."""
+
+    def __init__(self, name, help_text, fn, metric_type='gauge'):
+        self.name = name
+        self.help = help_text
+        self.fn = fn
+        self.type = metric_type
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.type}"]
+        try:
+            value = self.fn()
+        except Exception:
+            return []
+        samples = value if isinstance(value, list) else [({}, value)]
+        for labels, v in samples:
+            if v is None:
+                continue
+            lines.append(f"{self.name}{_format_labels(labels.keys(), labels.values())} {float(v)}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def gauge(self, name, help_text, fn):
+        return self.register(CallbackMetric(name, help_text, fn, 'gauge'))
+
+    def counter(self, name, help_text, fn):
+        return self.register(CallbackMetric(name, help_text, fn, 'counter'))
+
+    def render(self):
+        """Prometheus 텍스트 형식 (version 0.0.4)."""
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+METRICS = MetricsRegistry()
+REQUEST_SECONDS = METRICS.register(Histogram(
+    'http_request_duration_seconds', 'HTTP 요청 처리 시간 (응답 본문 전송까지)', ('method', 'route', 'status')))
+STAGE_SECONDS = METRICS.register(Histogram(
+    'app_stage_duration_seconds', '요청 처리 단계별 소요 시간', ('stage',)))
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+# --- 요청별 단계 기록 ---
+
+class ProfilingSettings:
+    """
+    요청별 프로파일러 설정 (기본값: 사용 안 함). 환경 변수 이름은 앱마다 접두사를 붙여 읽습니다 (예: 'IRIS_').
+    {prefix}PROFILING=1이면 'X-Profile: 1' 헤더 또는 ?profile=1 요청을 프로파일하고,
+    {prefix}PROFILE_SAMPLE_RATE(0~1) 비율의 요청은 자동으로 프로파일합니다. 결과는 {prefix}PROFILE_DIR에 저장됩니다.
+    """
+
+    def __init__(self, env_prefix=''):
+        self.enabled = os.getenv(f'{env_prefix}PROFILING', '0') == '1'
+        self.sample_rate = float(os.getenv(f'{env_prefix}PROFILE_SAMPLE_RATE', '0'))
+        self.profile_dir = os.getenv(f'{env_prefix}PROFILE_DIR', 'profiles')
+
+
+class RequestTrace:
+    """요청 하나의 단계별 소요 시간과 프로파일 결과 파일 목록."""
+
+    def __init__(self, profile=False, profile_dir='profiles'):
+        self.stages = []        # [(단계 이름, 초)] — 작업 스레드에서도 추가됨 (list.append는 스레드 안전)
+        self.profile = profile
+        self.profile_dir = profile_dir
+        self.profiles = []
+
+
+_current_trace = contextvars.ContextVar('request_trace', default=None)
+_profiling = threading.local()
+
+
+def current_trace():
+    return _current_trace.get()
+
+
+@contextlib.contextmanager
+def stage(name):
+    """
+    블록의 소요 시간을 단계 히스토그램에 기록하고, 요청 처리 중이면 Server-Timing에도 추가합니다.
+    작업 스레드에서 실행되는 코드도 contextvars.copy_context()(또는 run_in_threadpool)로 실행되면 같은 요청에 기록됩니다.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        STAGE_SECONDS.observe(elapsed, name)
+        trace = _current_trace.get()
+        if trace is not None:
+            trace.stages.append((name, elapsed))
+
+
+@contextlib.contextmanager
+def profile_block(label='request'):
+    """
+    현재 요청이 프로파일 대상이면 블록을 (이 스레드에서) 프로파일하고 결과 파일을 기록합니다.
+    pyinstrument가 있으면 샘플링 프로파일러(HTML), 없으면 cProfile(.prof, pstats 형식)을 사용합니다.
+    이미 프로파일 중인 스레드에서 다시 호출되면 아무것도 하지 않습니다.
+    """
+    trace = _current_trace.get()
+    if trace is None or not trace.profile or getattr(_profiling, 'active', False):
+        yield
+        return
+    _profiling.active = True
+    os.makedirs(trace.profile_dir, exist_ok=True)
+    stamp = datetime.datetime.now().strftime('%Y%m%d-%H%M%S-%f')
+    base = os.path.join(trace.profile_dir, f"{stamp}-{re.sub(r'[^A-Za-z0-9_.-]+', '_', label).strip('_')}")
+    try:
+        if _SamplingProfiler is not None:
+            profiler = _SamplingProfiler(async_mode='disabled')
+            profiler.start()
+            try:
+                yield
+            finally:
+                profiler.stop()
+                path = base + '.html'
+                with open(path, 'w', encoding='utf-8') as f:
+                    f.write(profiler.output_html())
+        else:
+            import cProfile
+            profiler = cProfile.Profile()
+            profiler.enable()
+            try:
+                yield
+            finally:
+                profiler.disable()
+                path = base + '.prof'
+                profiler.dump_stats(path)
+        trace.profiles.append(path)
+    finally:
+        _profiling.active = False
+
+
+def call_profiled(fn, *args, **kwargs):
+    """fn을 profile_block 안에서 호출 (작업 풀/스레드 풀에서 실행되는 함수 전체를 프로파일할 때 사용)."""
+    with profile_block(getattr(fn, '__name__', 'call')):
+        return fn(*args, **kwargs)
+
+
+def _wants_profile(scope, settings):
+    if not settings.enabled:
+        return False
+    for key, value in scope.get('headers', []):
+        if key == b'x-profile' and value in (b'1', b'true'):
+            return True
+    if re.search(rb'(^|&)profile=(1|true)(&|$)', scope.get('query_string', b'')):
+        return True
+    return settings.sample_rate > 0 and random.random() < settings.sample_rate
+
+
+def _server_timing(trace, total):
+    """같은 이름의 단계는 합산해 'name;dur=ms' 목록으로 만듭니다 (단계 순서 유지)."""
+    totals = {}
+    for name, seconds in list(trace.stages):
+        totals[name] = totals.get(name, 0.0) + seconds
+    parts = [f"{name};dur={seconds * 1000:.3f}" for name, seconds in totals.items()]
+    parts.append(f"app;dur={total * 1000:.3f}")
+    return ', '.join(parts)
+
+
+class TimingMiddleware:
+    """
+    ASGI 미들웨어: 요청마다 RequestTrace를 만들고, 응답 헤더에 Server-Timing(단계별 시간 + 응답 시작까지의 전체 시간
+    'app')을 추가하며, 요청 처리 시간을 http_request_duration_seconds 히스토그램에 기록합니다.
+    BaseHTTPMiddleware를 쓰지 않아 응답 본문을 다시 감싸지 않습니다. 프로파일 대상 요청이면 작업 스레드의 profile_block이
+    결과 파일 경로를 X-Profile-Output 헤더로 알려 줍니다. 프로파일러 설정은 env_prefix가 붙은 환경 변수에서 읽습니다.
+    """
+
+    def __init__(self, app, env_prefix=''):
+        self.app = app
+        self.profiling = ProfilingSettings(env_prefix)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        trace = RequestTrace(_wants_profile(scope, self.profiling), self.profiling.profile_dir)
+        token = _current_trace.set(trace)
+        start = time.perf_counter()
+        status = [500]
+
+        async def send_with_timing(message):
+            if message['type'] == 'http.response.start':
+                status[0] = message['status']
+                headers = list(message.get('headers', []))
+                headers.append((b'server-timing', _server_timing(trace, time.perf_counter() - start).encode()))
+                if trace.profiles:
+                    headers.append((b'x-profile-output', ', '.join(trace.profiles).encode()))
+                message = dict(message, headers=headers)
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_trace.reset(token)
+            route = scope.get('route')
+            REQUEST_SECONDS.observe(time.perf_counter() - start, scope.get('method', ''),
+                                    getattr(route, 'path', 'unmatched'), str(status[0]))
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import collections
+
+
+class MicroBatcher:
+    """
+    동시에 들어온 단일 행 요청을 모아 한 번의 배치 추론으로 처리합니다.
+
+    첫 요청이 도착한 뒤 최대 max_wait_ms 동안, 또는 max_batch_size 행이 찰 때까지
+    요청을 모은 다음 predict_fn(rows)를 한 번 호출하고, 결과를 각 요청에 순서대로 돌려줍니다.
+    predict_fn은 행 리스트를 받아 같은 길이의 결과 리스트를 반환해야 합니다.
+    배치 호출이 실패하면 행마다 다시 호출해, 잘못된 행을 보낸 요청만 그 오류를 받습니다.
+    """
+
+    def __init__(self, predict_fn, max_batch_size=64, max_wait_ms=5.0, executor=None):
+        self.predict_fn = predict_fn
+        self.max_batch_size = max(1, int(max_batch_size))
+        self.max_wait = max(0.0, float(max_wait_ms)) / 1000.0
+        self.executor = executor  # None이면 이벤트 루프의 기본 스레드 풀 사용
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        # --- 지표 ---
+        self.batches_total = 0
+        self.rows_total = 0
+        self.max_batch_seen = 0
+        self.batch_size_counts = collections.Counter()
+
+    def _ensure_worker(self):
+        """현재 이벤트 루프에서 배치 워커 태스크를 (필요하면) 시작."""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+        return loop
+
+    async def submit(self, row):
+        """한 행을 큐에 넣고, 그 행이 포함된 배치의 결과를 기다립니다."""
+        loop = self._ensure_worker()
+        future = loop.create_future()
+        await self._queue.put((row, future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.max_wait
+            while len(batch) < self.max_batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            try:
+                results = await self._predict(loop, [row for row, _ in batch])
+            except Exception as e:
+                if len(batch) == 1:
+                    self._resolve(batch[0][1], error=e)
+                else:
+                    # 한 행 때문에 배치 전체가 실패했을 수 있으므로 행별로 다시 실행해 오류를 해당 요청에만 전달
+                    for row, future in batch:
+                        try:
+                            self._resolve(future, (await self._predict(loop, [row]))[0])
+                        except Exception as row_error:
+                            self._resolve(future, error=row_error)
+            else:
+                for (_, future), result in zip(batch, results):
+                    self._resolve(future, result)
+            self._record(len(batch))
+
+    async def _predict(self, loop, rows):
+        results = await loop.run_in_executor(self.executor, self.predict_fn, rows)
+        if len(results) != len(rows):
+            raise ValueError(f"predict_fn이 {len(rows)}행에 대해 {len(results)}개의 결과를 반환했습니다.")
+        return results
+
+    @staticmethod
+    def _resolve(future, result=None, error=None):
+        if future.done():   # 요청이 이미 취소됨
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def _record(self, size):
+        self.batches_total += 1
+        self.rows_total += size
+        self.max_batch_seen = max(self.max_batch_seen, size)
+        self.batch_size_counts[size] += 1
+
+    @property
+    def queue_depth(self):
+        """배치에 아직 들어가지 않고 대기 중인 요청 수."""
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def stats(self):
+        """큐 깊이와 배치 크기 지표를 dict로 반환."""
+        return {
+            "max_batch_size": self.max_batch_size,
+            "max_wait_ms": self.max_wait * 1000.0,
+            "queue_depth": self.queue_depth,
+            "batches_total": self.batches_total,
+            "rows_total": self.rows_total,
+            "avg_batch_size": (self.rows_total / self.batches_total) if self.batches_total else 0.0,
+            "max_batch_size_seen": self.max_batch_seen,
+            "batch_size_counts": {str(k): v for k, v in sorted(self.batch_size_counts.items())},
+        }
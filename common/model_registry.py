@@ -0,0 +1,279 @@
+# -*- coding: utf-8 -*-
+import datetime
+import hashlib
+import json
+import os
+import shutil
+import threading
+import uuid
+
+MANIFEST_NAME = 'manifest.json'
+CURRENT_NAME = 'CURRENT'
+HISTORY_NAME = 'history.jsonl'
+
+
+class RegistryError(Exception):
+    """레지스트리에 요청한 버전이 없거나 버전 파일이 손상됨."""
+
+
+def _sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+def _write_atomic(path, text):
+    """임시 파일에 쓴 뒤 os.replace로 교체 (읽는 쪽은 항상 이전 내용 또는 새 내용 전체를 봅니다)."""
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as f:
+        f.write(text)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class ModelRegistry:
+    """
+    파일 기반 모델 레지스트리.
+
+    root/
+      versions/<버전>/   모델 파일 + manifest.json (파일별 sha256, 평가 지표, 학습 정보)
+      CURRENT           서빙할 버전 이름 (원자적으로 교체)
+      history.jsonl     CURRENT 변경 기록 (롤백 대상 찾기용)
+
+    한 버전의 파일(예: 모델과 전처리기)은 같은 폴더에 함께 저장되고 폴더 단위로 한 번에 공개되므로
+    서로 다른 학습의 파일이 섞여 로드되지 않습니다.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        self.versions_dir = os.path.join(root, 'versions')
+
+    def _version_dir(self, version):
+        return os.path.join(self.versions_dir, version)
+
+    def publish(self, objects=None, files=None, metrics=None, info=None, activate=True):
+        """
+        새 버전을 등록하고 버전 이름을 반환합니다.
+        objects: 이름 -> 객체 (joblib으로 저장), files: 이름 -> 복사할 파일 경로.
+        임시 폴더에 모두 쓴 뒤 폴더 이름을 바꿔 공개하고, activate=True면 CURRENT로 지정합니다.
+        """
+        version = datetime.datetime.now().strftime('%Y%m%d-%H%M%S') + '-' + uuid.uuid4().hex[:6]
+        tmp_dir = os.path.join(self.versions_dir, f".tmp-{version}")
+        os.makedirs(tmp_dir)
+        artifacts = {}
+        if objects:
+            import joblib   # 파일만 등록/로드할 때는 joblib 없이 동작 (week6 numpy 스코어러 전용 서빙)
+        for name, obj in (objects or {}).items():
+            filename = f"{name}.joblib"
+            joblib.dump(obj, os.path.join(tmp_dir, filename))
+            artifacts[name] = {"file": filename, "kind": "joblib"}
+        for name, src in (files or {}).items():
+            filename = name + os.path.splitext(src)[1]
+            shutil.copyfile(src, os.path.join(tmp_dir, filename))
+            artifacts[name] = {"file": filename, "kind": "file"}
+        for entry in artifacts.values():
+            entry["sha256"] = _sha256(os.path.join(tmp_dir, entry["file"]))
+        manifest = {
+            "version": version,
+            "created_at": datetime.datetime.now().isoformat(timespec='seconds'),
+            "artifacts": artifacts,
+            "metrics": metrics or {},
+            "info": info or {},
+        }
+        _write_atomic(os.path.join(tmp_dir, MANIFEST_NAME), json.dumps(manifest, ensure_ascii=False, indent=2))
+        os.rename(tmp_dir, self._version_dir(version))
+        if activate:
+            self.set_current(version, reason='publish')
+        return version
+
+    def manifest(self, version):
+        try:
+            with open(os.path.join(self._version_dir(version), MANIFEST_NAME), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            raise RegistryError(f"버전 '{version}'이(가) 레지스트리에 없습니다.")
+
+    def versions(self):
+        """등록된 버전의 manifest 목록 (오래된 순)."""
+        if not os.path.isdir(self.versions_dir):
+            return []
+        manifests = []
+        for name in os.listdir(self.versions_dir):
+            if name.startswith('.'):
+                continue
+            try:
+                manifests.append(self.manifest(name))
+            except (RegistryError, ValueError):
+                continue
+        return sorted(manifests, key=lambda m: (m.get('created_at', ''), m['version']))
+
+    def current_version(self):
+        """CURRENT가 가리키는 버전 (없으면 None)."""
+        try:
+            with open(os.path.join(self.root, CURRENT_NAME), encoding='utf-8') as f:
+                return f.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def set_current(self, version, reason='manual'):
+        """CURRENT를 version으로 원자적으로 바꾸고 변경 기록을 남깁니다."""
+        self.manifest(version)  # 존재 확인
+        os.makedirs(self.root, exist_ok=True)
+        previous = self.current_version()
+        _write_atomic(os.path.join(self.root, CURRENT_NAME), version + '\n')
+        record = {"at": datetime.datetime.now().isoformat(timespec='seconds'),
+                  "version": version, "previous": previous, "reason": reason}
+        with open(os.path.join(self.root, HISTORY_NAME), 'a', encoding='utf-8') as f:
+            f.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+    def previous_version(self):
+        """롤백 대상: 변경 기록에서 현재 버전 직전에 서빙했던 (아직 존재하는) 버전."""
+        current = self.current_version()
+        try:
+            with open(os.path.join(self.root, HISTORY_NAME), encoding='utf-8') as f:
+                activated = [json.loads(line)['version'] for line in f if line.strip()]
+        except FileNotFoundError:
+            activated = []
+        for version in reversed(activated):
+            if version != current and os.path.isdir(self._version_dir(version)):
+                return version
+        return None
+
+    def load(self, version, names=None):
+        """
+        버전의 파일을 검증(sha256)하고 로드합니다. 반환: (manifest, 이름 -> 객체 또는 파일 경로)
+        names를 주면 그 파일만 로드합니다 (없는 이름이면 RegistryError).
+        """
+        manifest = self.manifest(version)
+        missing = set(names or ()) - set(manifest['artifacts'])
+        if missing:
+            raise RegistryError(f"버전 '{version}'에 {sorted(missing)} 파일이 없습니다.")
+        loaded = {}
+        for name, entry in manifest['artifacts'].items():
+            if names is not None and name not in names:
+                continue
+            path = os.path.join(self._version_dir(version), entry['file'])
+            if _sha256(path) != entry['sha256']:
+                raise RegistryError(f"버전 '{version}'의 '{entry['file']}' 파일이 손상되었습니다 (sha256 불일치).")
+            if entry['kind'] == 'joblib':
+                import joblib
+                loaded[name] = joblib.load(path)
+            else:
+                loaded[name] = path
+        return manifest, loaded
+
+
+class ActiveModel:
+    """서빙 중인 모델 묶음. 교체는 ModelWatcher.active 참조를 바꾸는 것으로 한 번에 이루어집니다."""
+
+    def __init__(self, version, bundle, manifest=None):
+        self.version = version
+        self.bundle = bundle
+        self.manifest = manifest
+        self.loaded_at = datetime.datetime.now().isoformat(timespec='seconds')
+
+
+class ModelWatcher:
+    """
+    레지스트리의 CURRENT를 주기적으로 확인해, 새 버전이면 백그라운드에서 로드 → 준비(warm) → 교체합니다.
+
+    build(artifacts)는 로드된 파일(artifacts 인자로 이름을 주면 그 파일만)로 서빙용 묶음을 만들고, warm(bundle)은 교체 전에 예측을 한 번 실행해
+    첫 요청이 느려지지 않게 합니다. 요청 처리 코드는 `watcher.active`를 한 번 읽어 그 묶음만 사용하므로
+    교체 중에도 이전/새 모델이 섞이지 않고, 로드에 실패하면 기존 모델을 계속 사용합니다.
+
+    poll_seconds는 CURRENT 파일을 확인하는 주기(초)이며 0이면 자동 감시를 하지 않습니다
+    (각 앱이 환경 변수로 정함: week6 IRIS_REGISTRY_POLL_SECONDS, week7 MODEL_REGISTRY_POLL_SECONDS).
+    """
+
+    def __init__(self, registry, build, warm=None, poll_seconds=5.0, artifacts=None):
+        self.registry = registry
+        self.build = build
+        self.warm = warm
+        self.artifacts = artifacts
+        self.poll_seconds = poll_seconds
+        self.active = None
+        self.last_error = None
+        self.swap_count = 0
+        self._lock = threading.RLock()   # 로드/교체/롤백을 한 번에 하나씩
+        self._stop = threading.Event()
+        self._thread = None
+
+    def set_legacy(self, bundle, version='legacy'):
+        """레지스트리가 없을 때 기존 경로에서 로드한 묶음을 서빙합니다."""
+        self.active = ActiveModel(version, bundle)
+
+    def activate(self, version=None):
+        """version(없으면 CURRENT)을 로드/준비한 뒤 서빙 모델로 교체합니다."""
+        with self._lock:
+            version = version or self.registry.current_version()
+            if version is None:
+                raise RegistryError("레지스트리에 CURRENT 버전이 없습니다.")
+            manifest, artifacts = self.registry.load(version, self.artifacts)
+            bundle = self.build(artifacts)
+            if self.warm is not None:
+                self.warm(bundle)
+            self.active = ActiveModel(version, bundle, manifest)
+            self.swap_count += 1
+            self.last_error = None
+            return self.active
+
+    def check(self):
+        """CURRENT가 서빙 중인 버전과 다르면 교체합니다. 교체했으면 True."""
+        with self._lock:
+            version = self.registry.current_version()
+            if version is None or (self.active is not None and self.active.version == version):
+                return False
+            try:
+                self.activate(version)
+            except Exception as e:
+                if self.last_error != str(e):
+                    print(f"모델 버전 '{version}' 로드 실패 (기존 모델 유지): {e}")
+                self.last_error = str(e)
+                return False
+            print(f"모델 버전 교체: {version}")
+            return True
+
+    def rollback(self, version=None):
+        """version(없으면 직전 버전)을 로드해 교체하고 CURRENT도 그 버전으로 바꿉니다."""
+        with self._lock:
+            target = version or self.registry.previous_version()
+            if target is None:
+                raise RegistryError("롤백할 이전 버전이 없습니다.")
+            self.activate(target)
+            self.registry.set_current(target, reason='rollback')
+            return self.active
+
+    def _run(self):
+        while not self._stop.wait(self.poll_seconds):
+            self.check()
+
+    def start(self):
+        """백그라운드 감시 스레드 시작 (poll_seconds가 0이면 시작하지 않음)."""
+        if self.poll_seconds <= 0 or (self._thread is not None and self._thread.is_alive()):
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='model-watcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+
+    def status(self):
+        active = self.active
+        return {
+            "active_version": active.version if active else None,
+            "loaded_at": active.loaded_at if active else None,
+            "metrics": (active.manifest or {}).get('metrics') if active else None,
+            "current_version": self.registry.current_version(),
+            "previous_version": self.registry.previous_version(),
+            "swap_count": self.swap_count,
+            "last_error": self.last_error,
+            "watching": self._thread is not None and self._thread.is_alive(),
+            "poll_seconds": self.poll_seconds,
+        }
@@ -1,19 +1,66 @@
 # api.py
-from fastapi import FastAPI                     # FastAPI: Python 기반의 고성능 웹 API 프레임워크
+from fastapi import APIRouter, FastAPI, HTTPException      # FastAPI: Python 기반의 고성능 웹 API 프레임워크
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, PlainTextResponse
+from fastapi.routing import APIRoute
 from pydantic import BaseModel, Field           # 데이터 검증용 모델 정의 (입력값 타입 보장)
-from typing import List                         # 여러 개의 입력을 처리할 때 리스트 타입 사용
+from typing import List, Optional               # 여러 개의 입력을 처리할 때 리스트 타입 사용
+import os                                       # 환경 변수로 설정값 읽기
 import pickle, numpy as np                      # pickle: 모델 불러오기 / numpy: 수치 계산용
 from fastapi.middleware.cors import CORSMiddleware  # CORS 설정 (다른 도메인 요청 허용)
+from fastapi.concurrency import run_in_threadpool  # 동기 함수를 스레드 풀에서 실행
+import common_path                                 # 저장소 루트의 common/ 패키지 (week7_task와 공유)
+from common.micro_batcher import MicroBatcher      # 단일 행 요청을 모아 배치로 추론
+from common.model_registry import ModelRegistry, ModelWatcher, RegistryError  # 버전별 모델 레지스트리 + 무중단 교체
+from common.instrumentation import (METRICS, PROMETHEUS_CONTENT_TYPE, TimingMiddleware,  # 단계별 시간 + /metrics
+                                    call_profiled, profile_block, stage)
+from contextlib import asynccontextmanager
 
 # 저장된 모델 파일 경로
 MODEL_PATH = "iris_model.pkl"
+WEIGHTS_PATH = "iris_model.npz"     # train_model.py가 내보낸 numpy 가중치
+REGISTRY_DIR = os.getenv("IRIS_REGISTRY_DIR", "registry")   # train_model.py가 버전을 등록하는 폴더
+REGISTRY_POLL_SECONDS = float(os.getenv("IRIS_REGISTRY_POLL_SECONDS", "5"))   # CURRENT 확인 주기(초), 0이면 감시 안 함
 
-# 사전에 학습된 모델(.pkl 파일) 로드
-with open(MODEL_PATH, "rb") as f:
-    model = pickle.load(f)
+# 스코어러 선택: "sklearn" (pickle 파이프라인, 기본값) 또는 "numpy" (scikit-learn 없이 numpy만 사용)
+SCORER = os.getenv("IRIS_SCORER", "sklearn")
+
+# 배치 예측 1회 요청에서 허용하는 최대 행 수 (환경 변수로 조정 가능)
+MAX_BATCH_SIZE = int(os.getenv("IRIS_MAX_BATCH_SIZE", "10000"))
+# 배치 요청 본문의 최대 크기(바이트). 본문을 읽기 전에 Content-Length로 확인 (기본값: 행당 512바이트)
+MAX_BATCH_BYTES = int(os.getenv("IRIS_MAX_BATCH_BYTES", str(MAX_BATCH_SIZE * 512)))
+
+# /predict/ 마이크로 배칭 설정 (기본값: 사용 안 함)
+MICRO_BATCHING = os.getenv("IRIS_MICRO_BATCHING", "0") == "1"
+MICRO_BATCH_MAX_ROWS = int(os.getenv("IRIS_MICRO_BATCH_MAX_ROWS", "64"))       # 한 배치의 최대 행 수
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv("IRIS_MICRO_BATCH_MAX_WAIT_MS", "5"))  # 첫 요청 후 최대 대기 시간(ms)
+
+# 모델 파일 로드 (두 스코어러 모두 predict_proba / classes_ 를 제공)
+def build_model(artifacts):
+    if SCORER == "numpy":
+        from numpy_scorer import NumpyIrisScorer
+        return NumpyIrisScorer.load(artifacts["weights"])
+    with open(artifacts["model"], "rb") as f:
+        return pickle.load(f)
+
+# 교체 전에 예측을 한 번 실행 (첫 요청 지연 방지, 잘못된 모델은 교체하지 않음)
+def warm_model(m):
+    predict_rows([[5.1, 3.5, 1.4, 0.2]], m)
+
+# 레지스트리에 CURRENT 버전이 있으면 그 버전을, 없으면 기존 경로의 파일을 사용
+registry = ModelRegistry(REGISTRY_DIR)
+watcher = ModelWatcher(registry, build_model, warm_model, poll_seconds=REGISTRY_POLL_SECONDS)
+
+# 앱 시작 시 레지스트리 감시(새 버전 자동 교체)를 시작하고, 종료 시 멈춤
+@asynccontextmanager
+async def lifespan(app):
+    watcher.start()
+    yield
+    watcher.stop()
 
 # FastAPI 앱 생성
-app = FastAPI(title="Iris Model API", version="1.0")
+app = FastAPI(title="Iris Model API", version="1.0", lifespan=lifespan)
 
 # Gradio나 JS 프론트엔드가 localhost에서 접근할 수 있도록 CORS 허용
 app.add_middleware(
@@ -22,8 +69,12 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],        # 모든 HTTP 메서드 허용 (GET, POST 등)
     allow_headers=["*"],        # 모든 헤더 허용
+    expose_headers=["Server-Timing"],  # 브라우저 개발자 도구/JS에서 단계별 시간 확인
 )
 
+# 요청별 단계 시간(Server-Timing 헤더)과 요청/단계 히스토그램(/metrics) 기록
+app.add_middleware(TimingMiddleware, env_prefix="IRIS_")   # 프로파일러 설정: IRIS_PROFILING 등
+
 # 입력 데이터 구조 정의 (단일 예측용)
 class IrisInput(BaseModel):
     sl: float = Field(..., description="sepal length")   # 꽃받침 길이, "..." bắt buộc phải có giá trị
@@ -31,6 +82,50 @@ class IrisInput(BaseModel):
     pl: float = Field(..., description="petal length")   # 꽃잎 길이
     pw: float = Field(..., description="petal width")    # 꽃잎 너비
 
+# 입력 데이터 구조 정의 (배치 예측용)
+# rows(행 목록) 또는 sl/sw/pl/pw(열 목록) 중 한 가지 형식으로 보낸다.
+# max_length: 검증 중 MAX_BATCH_SIZE를 넘는 순간 중단 (나머지 행의 IrisInput을 만들지 않음) → 413
+class IrisBatchInput(BaseModel):
+    rows: Optional[List[IrisInput]] = Field(None, max_length=MAX_BATCH_SIZE)   # 행 형식: [{"sl":..,"sw":..,"pl":..,"pw":..}, ...]
+    sl: Optional[List[float]] = Field(None, max_length=MAX_BATCH_SIZE)         # 열 형식: 각 특징값의 리스트
+    sw: Optional[List[float]] = Field(None, max_length=MAX_BATCH_SIZE)
+    pl: Optional[List[float]] = Field(None, max_length=MAX_BATCH_SIZE)
+    pw: Optional[List[float]] = Field(None, max_length=MAX_BATCH_SIZE)
+
+    def to_matrix(self):
+        """입력을 (n, 4) numpy 배열로 변환."""
+        columns = [self.sl, self.sw, self.pl, self.pw]
+        if self.rows is not None:
+            if any(col is not None for col in columns):
+                raise ValueError("rows와 열 형식(sl/sw/pl/pw)을 동시에 보낼 수 없습니다.")
+            return np.array([[r.sl, r.sw, r.pl, r.pw] for r in self.rows], dtype=float).reshape(-1, 4)
+        if any(col is None for col in columns):
+            raise ValueError("rows 또는 sl/sw/pl/pw 네 개의 열을 모두 보내야 합니다.")
+        if len({len(col) for col in columns}) != 1:
+            raise ValueError("sl/sw/pl/pw 열의 길이가 서로 다릅니다.")
+        return np.array(columns, dtype=float).T.reshape(-1, 4)
+
+
+# 배치 크기 초과는 형식 오류(422)가 아니라 413으로 응답 (max_length 검증 실패 = too_long)
+@app.exception_handler(RequestValidationError)
+async def batch_too_large_handler(request, exc):
+    if any(e["type"] == "too_long" for e in exc.errors()):
+        return JSONResponse(status_code=413, content={"detail": f"배치 크기가 최대값 {MAX_BATCH_SIZE}를 초과했습니다."})
+    return await request_validation_exception_handler(request, exc)
+
+# 본문을 읽고 JSON으로 파싱하기 전에 Content-Length를 확인하는 라우트 (배치 엔드포인트용)
+class BodySizeLimitRoute(APIRoute):
+    def get_route_handler(self):
+        handler = super().get_route_handler()
+
+        async def limited_handler(request):
+            length = request.headers.get("content-length", "")
+            if length.isdigit() and int(length) > MAX_BATCH_BYTES:
+                raise HTTPException(status_code=413, detail=f"요청 본문 {length}바이트가 최대값 {MAX_BATCH_BYTES}를 초과했습니다.")
+            return await handler(request)
+        return limited_handler
+
+batch_router = APIRouter(route_class=BodySizeLimitRoute)
 
 # 기본 엔드포인트 (GET 요청용)
 @app.get("/")
@@ -38,16 +133,118 @@ def root():
     # 기본 메시지 반환 — 브라우저에서 "/" 접근 시 안내 문구 표시
     return {"ok": True, "message": "Use POST /predict"}
 
-# 단일 예측 엔드포인트 (POST 요청)
-@app.post("/predict/")
-def predict(item: IrisInput):
+# 단일 행 예측 함수 (요청 1개 = 모델 호출 1번)
+def predict_one(row):
+    # 현재 서빙 중인 모델을 한 번만 읽음 (처리 중에 교체되어도 같은 모델 사용)
+    model = watcher.active.bundle
+
     # 입력값을 numpy 배열 형태로 변환 (모델 입력 형식에 맞추기)
-    X = np.array([[item.sl, item.sw, item.pl, item.pw]])
+    X = np.array([row])
 
-    # 모델 예측 수행
-    pred = int(model.predict(X)[0])               # 예측된 클래스 인덱스 (0, 1, 2)
-    proba = model.predict_proba(X)[0].tolist()    # 각 클래스별 확률값
+    # 모델 예측 수행 (predict_proba 한 번만 호출하고 클래스는 argmax로 계산)
+    with stage("predict_proba"):
+        proba = model.predict_proba(X)[0]         # 각 클래스별 확률값
+    pred = int(model.classes_[proba.argmax()])    # 예측된 클래스 인덱스 (0, 1, 2)
+    return pred, proba.tolist()
+
+# 여러 행을 쌓아 predict_proba를 한 번만 호출하는 함수 (마이크로 배칭용)
+def predict_rows(rows, model=None):
+    model = model if model is not None else watcher.active.bundle
+    with stage("predict_proba"):
+        proba = model.predict_proba(np.array(rows, dtype=float))
+    preds = model.classes_[proba.argmax(axis=1)]
+    return [(int(p), pr) for p, pr in zip(preds, proba.tolist())]
+
+if registry.current_version() is not None:
+    watcher.activate()
+else:
+    watcher.set_legacy(build_model({"model": MODEL_PATH, "weights": WEIGHTS_PATH}))
+
+# 마이크로 배칭이 켜져 있으면 동시 요청을 모아서 처리
+batcher = MicroBatcher(predict_rows, MICRO_BATCH_MAX_ROWS, MICRO_BATCH_MAX_WAIT_MS) if MICRO_BATCHING else None
+
+# 단일 예측 엔드포인트 (POST 요청)
+@app.post("/predict/")
+async def predict(item: IrisInput):
+    row = [item.sl, item.sw, item.pl, item.pw]
+    if batcher is not None:
+        pred, proba = await batcher.submit(row)
+    else:
+        pred, proba = await run_in_threadpool(call_profiled, predict_one, row)
 
     # JSON 형태로 결과 반환
     return {"prediction": pred, "proba": proba}
 
+# 마이크로 배칭 지표 (큐 깊이, 배치 크기 분포)
+@app.get("/predict/batching/stats")
+def batching_stats():
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+# 배치 예측 엔드포인트 (POST 요청) — 크기 제한은 파싱 전(Content-Length)과 검증 중(max_length)에 적용
+@batch_router.post("/predict/batch")
+def predict_batch(batch: IrisBatchInput):
+    with profile_block("predict_batch"):
+        try:
+            with stage("to_matrix"):
+                X = batch.to_matrix()
+        except ValueError as e:
+            raise HTTPException(status_code=422, detail=str(e))
+        if len(X) == 0:
+            return {"predictions": [], "proba": []}
+
+        # 전체 행렬에 대해 predict_proba를 한 번만 호출하고, 클래스는 확률의 argmax로 결정
+        model = watcher.active.bundle
+        with stage("predict_proba"):
+            proba = model.predict_proba(X)
+        preds = model.classes_[proba.argmax(axis=1)]
+
+        # 입력 순서와 동일한 순서로 결과 반환
+        with stage("tolist"):
+            return {"predictions": preds.astype(int).tolist(), "proba": proba.tolist()}
+
+app.include_router(batch_router)
+
+# 서빙 중인 모델 버전과 레지스트리 상태
+@app.get("/admin/model")
+def model_status():
+    return {**watcher.status(), "versions": [m["version"] for m in registry.versions()]}
+
+# CURRENT 버전 즉시 로드 (감시 주기를 기다리지 않음)
+@app.post("/admin/model/reload")
+def model_reload():
+    try:
+        active = watcher.activate()
+    except RegistryError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"모델 로드 실패 (기존 모델 유지): {e}")
+    return {"active_version": active.version}
+
+# 이전 버전(또는 ?version=지정 버전)으로 롤백 — CURRENT도 함께 변경
+@app.post("/admin/model/rollback")
+def model_rollback(version: Optional[str] = None):
+    try:
+        active = watcher.rollback(version)
+    except RegistryError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"모델 로드 실패 (기존 모델 유지): {e}")
+    return {"active_version": active.version}
+
+# /metrics 요청 때 읽는 현재 상태 지표 (요청/단계 히스토그램은 common/instrumentation.py에서 기록)
+METRICS.gauge("micro_batch_queue_depth", "배치에 아직 들어가지 않은 예측 요청 수",
+              lambda: batcher.queue_depth if batcher is not None else None)
+METRICS.counter("micro_batch_batches_total", "실행된 예측 배치 수",
+                lambda: batcher.batches_total if batcher is not None else None)
+METRICS.counter("micro_batch_rows_total", "배치로 처리된 예측 행 수",
+                lambda: batcher.rows_total if batcher is not None else None)
+METRICS.counter("model_swaps_total", "무중단 모델 교체 횟수", lambda: watcher.swap_count)
+METRICS.gauge("model_info", "서빙 중인 모델 버전 (값은 항상 1)",
+              lambda: [({"version": watcher.active.version}, 1)] if watcher.active is not None else [])
+
+# Prometheus 지표 (요청 처리 시간, 단계별 시간, 배칭/모델 상태)
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(METRICS.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,50 @@
+# numpy_scorer.py
+import numpy as np      # scikit-learn 없이 numpy만으로 추론
+
+# 학습된 StandardScaler + LogisticRegression 파이프라인을 numpy 가중치 파일(.npz)로 저장
+def export_pipeline(pipe, weights_path, X_check=None):
+    scaler, clf = pipe.named_steps["scaler"], pipe.named_steps["clf"]
+    np.savez(
+        weights_path,
+        mean=scaler.mean_ if scaler.with_mean else np.zeros(clf.coef_.shape[1]),
+        scale=scaler.scale_ if scaler.with_std else np.ones(clf.coef_.shape[1]),
+        coef=clf.coef_,
+        intercept=clf.intercept_,
+        classes=clf.classes_,
+    )
+
+    # 저장한 가중치가 원래 파이프라인과 같은 확률을 내는지 확인 (parity check)
+    if X_check is not None:
+        scorer = NumpyIrisScorer.load(weights_path)
+        if not np.allclose(scorer.predict_proba(X_check), pipe.predict_proba(X_check), atol=1e-8):
+            raise ValueError("numpy 스코어러 결과가 sklearn 파이프라인과 다릅니다.")
+    return weights_path
+
+
+class NumpyIrisScorer:
+    """표준화 + 로지스틱 회귀를 행렬곱 1번 + softmax로 계산하는 스코어러."""
+
+    def __init__(self, mean, scale, coef, intercept, classes):
+        # (x - mean) / scale @ coef.T + b  =  x @ (coef / scale).T + (b - (mean / scale) @ coef.T)
+        self.weights = (coef / scale).T                    # (n_features, n_classes)
+        self.bias = intercept - (mean / scale) @ coef.T    # (n_classes,)
+        self.classes_ = classes
+        self.n_features_in_ = coef.shape[1]
+
+    @classmethod
+    def load(cls, weights_path):
+        with np.load(weights_path, allow_pickle=False) as w:
+            return cls(w["mean"], w["scale"], w["coef"], w["intercept"], w["classes"])
+
+    def predict_proba(self, X):
+        z = np.asarray(X, dtype=float) @ self.weights + self.bias
+        if z.shape[1] == 1:                                # 이진 분류: 시그모이드
+            p = 1.0 / (1.0 + np.exp(-z[:, 0]))
+            return np.column_stack([1.0 - p, p])
+        z -= z.max(axis=1, keepdims=True)                  # 다중 분류: 수치적으로 안정한 softmax
+        np.exp(z, out=z)
+        z /= z.sum(axis=1, keepdims=True)
+        return z
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
@@ -0,0 +1,6 @@
+# conftest.py
+import os
+import sys
+
+# week6_task의 모듈(api.py, numpy_scorer.py 등)을 테스트에서 바로 import할 수 있도록
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
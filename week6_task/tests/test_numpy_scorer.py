@@ -0,0 +1,108 @@
+# test_numpy_scorer.py
+import importlib
+import shutil
+import sys
+
+import numpy as np
+import pytest
+from fastapi.testclient import TestClient
+from sklearn.datasets import load_iris
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from numpy_scorer import NumpyIrisScorer, export_pipeline
+
+ATOL = 1e-8   # export_pipeline의 parity 검사와 같은 허용 오차
+
+
+@pytest.fixture(scope="module")
+def iris():
+    return load_iris(return_X_y=True)
+
+
+@pytest.fixture(scope="module")
+def pipeline(iris):
+    # train_model.py와 같은 구성 (표준화 + 로지스틱 회귀)
+    X, y = iris
+    return Pipeline([("scaler", StandardScaler()), ("clf", LogisticRegression(max_iter=1000))]).fit(X, y)
+
+
+@pytest.fixture(scope="module")
+def weights_path(pipeline, tmp_path_factory):
+    return export_pipeline(pipeline, str(tmp_path_factory.mktemp("weights") / "iris_model.npz"))
+
+
+def test_predict_proba_matches_pipeline(iris, pipeline, weights_path):
+    X, _ = iris
+    scorer = NumpyIrisScorer.load(weights_path)
+    np.testing.assert_allclose(scorer.predict_proba(X), pipeline.predict_proba(X), rtol=0, atol=ATOL)
+    np.testing.assert_array_equal(scorer.predict(X), pipeline.predict(X))
+    np.testing.assert_array_equal(scorer.classes_, pipeline.classes_)
+
+
+def test_single_rows_match_batch(iris, pipeline, weights_path):
+    X, _ = iris
+    scorer = NumpyIrisScorer.load(weights_path)
+    for row in X[::7]:
+        np.testing.assert_allclose(scorer.predict_proba(np.array([row]))[0], pipeline.predict_proba([row])[0],
+                                   rtol=0, atol=ATOL)
+
+
+@pytest.fixture
+def numpy_api(weights_path, tmp_path, monkeypatch):
+    """IRIS_SCORER=numpy로 api.py를 새로 import (레지스트리 없음 → weights_path의 가중치를 서빙)."""
+    monkeypatch.chdir(tmp_path)
+    shutil.copyfile(weights_path, tmp_path / "iris_model.npz")
+    monkeypatch.setenv("IRIS_SCORER", "numpy")
+    monkeypatch.setenv("IRIS_REGISTRY_DIR", str(tmp_path / "registry"))
+    monkeypatch.setenv("IRIS_REGISTRY_POLL_SECONDS", "0")
+    sys.modules.pop("api", None)
+    api = importlib.import_module("api")
+    with TestClient(api.app) as client:
+        yield api, client
+    sys.modules.pop("api", None)
+
+
+def test_batch_endpoint_matches_pipeline(iris, pipeline, numpy_api):
+    api, client = numpy_api
+    X, _ = iris
+    assert isinstance(api.watcher.active.bundle, NumpyIrisScorer)
+    expected = pipeline.predict_proba(X)
+
+    rows = [dict(zip(("sl", "sw", "pl", "pw"), map(float, r))) for r in X]
+    columns = {name: X[:, i].tolist() for i, name in enumerate(("sl", "sw", "pl", "pw"))}
+    for body in ({"rows": rows}, columns):
+        r = client.post("/predict/batch", json=body)
+        assert r.status_code == 200
+        np.testing.assert_allclose(r.json()["proba"], expected, rtol=0, atol=ATOL)
+        assert r.json()["predictions"] == pipeline.predict(X).tolist()
+
+    # 마이크로 배칭이 사용하는 행 목록 경로와 단일 예측 엔드포인트
+    results = api.predict_rows(X.tolist())
+    np.testing.assert_allclose([proba for _, proba in results], expected, rtol=0, atol=ATOL)
+    r = client.post("/predict/", json=rows[0])
+    np.testing.assert_allclose(r.json()["proba"], expected[0], rtol=0, atol=ATOL)
+
+
+@pytest.fixture
+def small_batch_api(monkeypatch, request):
+    """배치 제한을 작게(10행, 2000바이트) 설정한 numpy_api."""
+    monkeypatch.setenv("IRIS_MAX_BATCH_SIZE", "10")
+    monkeypatch.setenv("IRIS_MAX_BATCH_BYTES", "2000")
+    return request.getfixturevalue("numpy_api")
+
+
+def test_batch_size_limit_is_enforced_before_parsing(small_batch_api):
+    _, client = small_batch_api
+    row = {"sl": 5.1, "sw": 3.5, "pl": 1.4, "pw": 0.2}
+    assert client.post("/predict/batch", json={"rows": [row] * 10}).status_code == 200
+    # 행 수 초과: 행 형식과 열 형식 모두 검증 단계(max_length)에서 413
+    assert client.post("/predict/batch", json={"rows": [row] * 11}).status_code == 413
+    assert client.post("/predict/batch", json={k: [v] * 11 for k, v in row.items()}).status_code == 413
+    # 본문 크기 초과: JSON으로 파싱되지 않는 본문이어도 Content-Length만으로 413 (422가 아님)
+    r = client.post("/predict/batch", content=b"x" * 2001, headers={"Content-Type": "application/json"})
+    assert r.status_code == 413
+    # 다른 형식 오류는 그대로 422
+    assert client.post("/predict/batch", json={"rows": [{"sl": 1.0}]}).status_code == 422
+    assert client.post("/predict/batch", json={"rows": [row], "sl": [1.0]}).status_code == 422
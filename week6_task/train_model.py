@@ -5,9 +5,17 @@ from sklearn.pipeline import Pipeline                #  여러 단계를 하나
 from sklearn.preprocessing import StandardScaler     #  데이터 표준화(정규화) 도구
 from sklearn.linear_model import LogisticRegression  #  로지스틱 회귀 모델 (분류용)
 import pickle                                        #  학습된 모델을 파일로 저장하기 위한 모듈
+import os                                            #  환경 변수로 설정값 읽기
+import sys                                           #  명령줄 옵션 확인
+from numpy_scorer import export_pipeline             #  numpy 전용 가중치(.npz) 내보내기
+import common_path                                   #  저장소 루트의 common/ 패키지 (week7_task와 공유)
+from common.model_registry import ModelRegistry      #  버전별 모델 레지스트리 (API가 자동으로 새 버전 로드)
+
+# 모델 레지스트리 폴더 (api.py와 같은 경로)
+REGISTRY_DIR = os.getenv("IRIS_REGISTRY_DIR", "registry")
 
 # 모델 학습 및 저장 함수 정의
-def train_and_save(model_path="iris_model.pkl"):
+def train_and_save(model_path="iris_model.pkl", weights_path="iris_model.npz"):
     # Iris 데이터셋 불러오기 (X: 특징값, y: 클래스 레이블)
     X, y = load_iris(return_X_y=True)
 
@@ -33,9 +41,33 @@ def train_and_save(model_path="iris_model.pkl"):
     with open(model_path, "wb") as f:
         pickle.dump(pipe, f)                        # 모델 객체를 .pkl 파일로 직렬화하여 저장, wb-ghi ở chế độ nhị phân binary
 
+    # numpy 스코어러용 가중치 저장 (전체 데이터로 sklearn 결과와 일치하는지 확인)
+    export_pipeline(pipe, weights_path, X_check=X)
+
     # 학습 결과 출력
     print(f"Saved model to {model_path}. Test accuracy={acc:.3f}")
+    print(f"Saved numpy weights to {weights_path}")
+
+    # 레지스트리에 새 버전으로 등록 (pkl + npz + 정확도). 실행 중인 API가 감지해 교체함
+    version = ModelRegistry(REGISTRY_DIR).publish(
+        files={"model": model_path, "weights": weights_path},
+        metrics={"accuracy": float(acc)},
+        info={"estimator": "StandardScaler + LogisticRegression", "train_rows": len(X_tr), "test_rows": len(X_te)},
+    )
+    print(f"Published version {version} to {REGISTRY_DIR}")
+
+# 이미 저장된 .pkl 파이프라인에서 numpy 가중치만 다시 내보내기
+def export_weights(model_path="iris_model.pkl", weights_path="iris_model.npz"):
+    with open(model_path, "rb") as f:
+        pipe = pickle.load(f)
+    X, _ = load_iris(return_X_y=True)
+    export_pipeline(pipe, weights_path, X_check=X)
+    print(f"Exported {model_path} -> {weights_path}")
 
 # 직접 실행할 때만 함수 호출 (import 시에는 실행되지 않음)
+# python train_model.py --export-only  → 재학습 없이 가중치만 내보내기
 if __name__ == "__main__":
-    train_and_save()
+    if "--export-only" in sys.argv:
+        export_weights()
+    else:
+        train_and_save()
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# 임포트 상태: 임포트(전체/--fast/증분)는 데이터를 바꾸는 트랜잭션에서 테이블별 세대/행 수/워터마크/시트 해시도 함께 바꿈
+IMPORT_STATE_SQL = "SELECT table_name, sheet_hash, row_count, watermark, generation FROM _import_meta ORDER BY table_name"
+
+_versions = {}   # db_path -> (파일 상태, fingerprint, 마지막 변경 시각(초))
+
+
+def _file_state(db_path):
+    """DB 파일과 WAL 파일의 (inode, 수정 시각, 크기). 파일이 없으면 None."""
+    state = []
+    for path in (db_path, db_path + '-wal'):
+        try:
+            st = os.stat(path)
+            state.append((st.st_ino, st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            state.append(None)
+    return tuple(state)
+
+
+def _read_fingerprint(db_path, state):
+    main, wal = state
+    try:
+        conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+        try:
+            rows = conn.execute(IMPORT_STATE_SQL).fetchall()
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        rows = None   # _import_meta가 없는 DB (임포트 스크립트로 만들지 않은 DB)
+    if rows:
+        return f"{main[0]}-{hashlib.sha1(repr(rows).encode()).hexdigest()[:16]}"
+    # 임포트 상태가 없으면 파일 상태로 판단 (읽기 연결이 만드는 빈 WAL 파일은 무시)
+    wal_part = f"{wal[1]}-{wal[2]}" if wal is not None and wal[2] else '-'
+    return f"{main[0]}-{main[1]}-{main[2]}:{wal_part}"
+
+
+def _db_version(db_path):
+    state = _file_state(db_path)
+    if state[0] is None:
+        return '-', None
+    cached = _versions.get(db_path)
+    if cached is not None and cached[0] == state:
+        return cached[1], cached[2]
+    fingerprint = _read_fingerprint(db_path, state)
+    if cached is not None and cached[1] == fingerprint:
+        modified = cached[2]   # 파일만 바뀌고(WAL 생성, 체크포인트) 데이터는 그대로
+    else:
+        modified = int(max(s[1] for s in state if s is not None) // 1_000_000_000)
+    _versions[db_path] = (state, fingerprint, modified)
+    return fingerprint, modified
+
+
+def db_fingerprint(db_path):
+    """
+    DB 데이터 버전 식별자. DB 파일의 inode와 임포트 상태(_import_meta)로 만들며, 데이터가 바뀌면 값도 바뀝니다.
+    WAL 파일 생성(mode=ro 연결도 만듦)이나 체크포인트처럼 데이터가 그대로인 파일 변화에는 바뀌지 않습니다.
+    DB/WAL 파일 상태(inode, 수정 시각, 크기)가 지난 호출과 같으면 DB를 열지 않고 저장된 값을 반환합니다.
+    """
+    return _db_version(db_path)[0]
+
+
+def db_last_modified(db_path):
+    """db_fingerprint가 마지막으로 바뀐 것을 확인한 시점의 DB/WAL 파일 수정 시각 (초). 파일이 없으면 None."""
+    return _db_version(db_path)[1]
+
+
+class FingerprintCache:
+    """
+    분석 결과를 DB 버전(fingerprint)별로 메모리에 보관하는 캐시.
+    DB가 바뀌지 않았으면 저장된 결과를 그대로 반환하고, 바뀌었으면 다시 계산합니다.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self._entries = {}   # key -> (fingerprint, value, computed_at)
+        self._locks = {}     # key -> Lock (같은 결과를 동시에 여러 번 계산하지 않도록)
+        self._guard = threading.Lock()
+
+    def _lock_for(self, key):
+        with self._guard:
+            return self._locks.setdefault(key, threading.Lock())
+
+    def get(self, key, compute):
+        """key에 해당하는 결과를 반환. 없거나 DB가 바뀌었으면 compute()로 다시 계산."""
+        fingerprint = db_fingerprint(self.db_path)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == fingerprint:
+            return entry[1]
+        with self._lock_for(key):
+            # 잠금을 기다리는 동안 다른 요청이 이미 계산했을 수 있음
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                return entry[1]
+            value = compute()
+            self._entries[key] = (fingerprint, value, time.time())
+            return value
+
+    def peek(self, key):
+        """DB가 바뀌지 않은 캐시 결과가 있으면 반환하고, 없으면 None (계산하지 않음)."""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == db_fingerprint(self.db_path):
+            return entry[1]
+        return None
+
+    def invalidate(self, key=None):
+        """key(없으면 전체)의 캐시를 비웁니다."""
+        with self._guard:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def info(self, key):
+        """캐시 상태 (fingerprint, 계산 시각) 조회."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        return {"fingerprint": entry[0], "computed_at": entry[2]}
@@ -4,9 +4,23 @@ import requests
 import pandas as pd
 import plotly.express as px
 import os
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait
+from requests.adapters import HTTPAdapter
+# 미리 받기 스레드에 스크립트 실행 컨텍스트를 넘기는 공개 API가 없어 streamlit.runtime의 함수를 사용합니다.
+# 문서화된 API가 아니므로 requirements.txt에서 streamlit 버전 범위(1.65 이상, 2 미만)를 고정합니다.
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
 
 # --- 공통 설정 ---
 API_BASE_URL = "http://127.0.0.1:8000"
+# 분석 API는 열 단위 JSON({"열": [값, ...]})으로 받아 바로 DataFrame으로 만듭니다 (행마다 열 이름이 반복되지 않음)
+ANALYSIS_PARAMS = {"format": "columns"}
+# API 호출 제한 시간 (연결, 응답 읽기) 초
+REQUEST_TIMEOUT = (3.05, 30)
+# API 응답 캐시 유지 시간(초). 만료되면 ETag로 재검증하므로 데이터가 그대로면 304만 오갑니다.
+CACHE_TTL_SECONDS = int(os.getenv("DASHBOARD_CACHE_TTL", "300"))
+# 서빙 중인 모델 버전 캐시 유지 시간(초). 모델 교체가 분석 데이터 캐시 만료를 기다리지 않고 바로 보이도록 짧게 둡니다.
+MODEL_INFO_TTL_SECONDS = int(os.getenv("DASHBOARD_MODEL_TTL", "10"))
 
 st.set_page_config(
     page_title="AdventureWorks 대시보드",
@@ -14,11 +28,91 @@ st.set_page_config(
     layout="wide"
 )
 
+class APIError(Exception):
+    """API가 오류 응답을 반환함 (캐시되지 않음)."""
+
+@st.cache_resource
+def get_http_session():
+    """모든 세션/재실행이 함께 쓰는 HTTP 세션. 연결을 재사용해 재실행마다 TCP 연결을 새로 열지 않습니다."""
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=8)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+@st.cache_resource
+def get_etag_store():
+    """
+    경로별 마지막 응답 본문과 ETag ({(경로, 파라미터): {"etag": ..., "data": ...}})와 이를 보호하는 잠금.
+    모든 세션과 미리 받기 스레드가 함께 쓰므로 읽고 쓸 때는 잠금을 잡습니다.
+    """
+    return threading.Lock(), {}
+
+def conditional_get(path, params=None):
+    """
+    API를 조건부 GET으로 호출합니다.
+    마지막 응답 본문과 ETag를 보관해 두고, 데이터가 바뀌지 않아 서버가 304를 반환하면 보관한 본문을 그대로 사용합니다.
+    """
+    lock, store = get_etag_store()
+    key = (path, tuple(sorted((params or {}).items())))
+    with lock:
+        last = store.get(key)
+    headers = {"If-None-Match": last["etag"]} if last else {}
+    response = get_http_session().get(f"{API_BASE_URL}{path}", params=params, headers=headers,
+                                      timeout=REQUEST_TIMEOUT)
+    if response.status_code == 304 and last:
+        return last["data"]
+    if response.status_code != 200:
+        raise APIError(f"API 데이터 로드 실패 (코드: {response.status_code}): {response.text}")
+    data = response.json()
+    if "ETag" in response.headers:
+        with lock:
+            store[key] = {"etag": response.headers["ETag"], "data": data}
+    return data
+
+@st.cache_data(ttl=CACHE_TTL_SECONDS, show_spinner=False)
+def fetch_json(path, params=None):
+    """분석 데이터를 조건부 GET으로 받아 CACHE_TTL_SECONDS 동안 캐시합니다."""
+    return conditional_get(path, params)
+
+@st.cache_data(ttl=MODEL_INFO_TTL_SECONDS, show_spinner=False)
+def fetch_model_info():
+    """서빙 중인 모델 정보. 모델 교체(/admin/model/reload)가 곧 보이도록 MODEL_INFO_TTL_SECONDS 동안만 캐시합니다."""
+    return conditional_get("/admin/model")
+
+def get_analysis(path):
+    """분석 데이터 (캐시 사용). 반환: (데이터 dict, 오류 메시지). 성공하면 오류 메시지는 None입니다."""
+    try:
+        return fetch_json(path, ANALYSIS_PARAMS), None
+    except APIError as e:
+        return None, str(e)
+
+# 세션의 첫 실행에서 미리 받아 둘 API (페이지를 바꿀 때 캐시에서 바로 그림)
+PREFETCH = [
+    (fetch_json, ("/analysis/reseller_eda", ANALYSIS_PARAMS)),
+    (fetch_json, ("/analysis/customer_rfm", ANALYSIS_PARAMS)),
+    (fetch_model_info, ()),
+]
+
+def prefetch_all():
+    """세 페이지가 쓰는 데이터를 동시에 받아 캐시를 채웁니다. 실패한 요청은 해당 페이지에서 다시 시도합니다."""
+    if st.session_state.get("prefetched"):
+        return
+    st.session_state["prefetched"] = True
+    ctx = get_script_run_ctx()
+    with ThreadPoolExecutor(max_workers=len(PREFETCH),
+                            initializer=lambda: add_script_run_ctx(threading.current_thread(), ctx)) as pool:
+        wait([pool.submit(fetch, *args) for fetch, args in PREFETCH])
+
 # --- 페이지 1: 성과 예측 (Prediction) ---
 def page_prediction():
     """고객 구매 예측 페이지 (국가 정보 포함)."""
     st.title("🧑‍💻 고객 구매 여부 예측 (v2 - 국가 포함)")
     st.write("고객의 RFM 값 및 국가를 입력하여 향후 30일 내 구매 여부를 예측합니다.")
+    try:
+        st.caption(f"서빙 중인 모델 버전: {fetch_model_info().get('active_version')}")
+    except (APIError, requests.exceptions.RequestException) as e:
+        st.warning(f"서빙 중인 모델 버전을 확인하지 못했습니다: {e}")
     
     st.header("고객 정보 입력")
     
@@ -48,7 +142,7 @@ def page_prediction():
         try:
             url = f"{API_BASE_URL}/predict_customer_purchase"
             with st.spinner("모델 호출 중..."):
-                response = requests.post(url, json=payload)
+                response = get_http_session().post(url, json=payload, timeout=REQUEST_TIMEOUT)
             
             if response.status_code == 200:
                 result = response.json()
@@ -65,6 +159,8 @@ def page_prediction():
                 st.error(f"API 오류 (코드: {response.status_code}): {response.text}")
         except requests.exceptions.ConnectionError:
             st.error("연결 오류: API에 연결할 수 없습니다. FastAPI 서버(uvicorn)를 실행했는지 확인하세요.")
+        except requests.exceptions.Timeout:
+            st.error("시간 초과: API가 제한 시간 안에 응답하지 않았습니다.")
         except Exception as e:
             st.error(f"오류 발생: {e}")
 
@@ -75,13 +171,11 @@ def page_analysis():
     st.write("FastAPI를 통해 리셀러 판매 데이터를 시각화합니다.")
     
     try:
-        url = f"{API_BASE_URL}/analysis/reseller_eda"
         with st.spinner("FastAPI에서 분석 데이터 로딩 중..."):
-            response = requests.get(url)
-        if response.status_code != 200:
-            st.error(f"API 데이터 로드 실패 (코드: {response.status_code}): {response.text}")
+            data, error = get_analysis("/analysis/reseller_eda")
+        if error:
+            st.error(error)
             return
-        data = response.json()
         stats = data.get("summary_stats", {})
         total_sales = stats.get("total_sales", 0)
         total_orders = stats.get("total_orders", 0)
@@ -93,25 +187,27 @@ def page_analysis():
         col3.metric("리셀러 업종 수", f"{unique_resellers}")
         st.markdown("---")
         st.subheader("업종별 총 매출 (Business Type)")
-        df_biz = pd.DataFrame(data.get("sales_by_biz_type", []))
+        df_biz = pd.DataFrame(data.get("sales_by_biz_type", {}))
         if not df_biz.empty:
             fig1 = px.bar(df_biz, x='Business Type', y='Sales Amount', title='업종별 매출', text_auto='.2s')
             fig1.update_layout(xaxis_title="업종", yaxis_title="총 매출")
             st.plotly_chart(fig1, use_container_width=True)
         st.subheader("국가별 매출 분포")
-        df_country = pd.DataFrame(data.get("sales_by_country", []))
+        df_country = pd.DataFrame(data.get("sales_by_country", {}))
         if not df_country.empty:
             fig2 = px.pie(df_country, names='Country', values='Sales Amount', title='국가별 매출 비중')
             fig2.update_traces(textposition='inside', textinfo='percent+label')
             st.plotly_chart(fig2, use_container_width=True)
         st.subheader("시간에 따른 매출 (월별)")
-        df_time = pd.DataFrame(data.get("sales_over_time", []))
+        df_time = pd.DataFrame(data.get("sales_over_time", {}))
         if not df_time.empty:
             fig3 = px.line(df_time, x='Date', y='Sales Amount', title='월별 매출 추이')
             fig3.update_layout(xaxis_title="기간", yaxis_title="총 매출")
             st.plotly_chart(fig3, use_container_width=True)
     except requests.exceptions.ConnectionError:
         st.error("연결 오류: API에 연결할 수 없습니다. FastAPI 서버(uvicorn)를 실행했는지 확인하세요.")
+    except requests.exceptions.Timeout:
+        st.error("시간 초과: API가 제한 시간 안에 응답하지 않았습니다.")
     except Exception as e:
         st.error(f"페이지 렌더링 중 오류 발생: {e}")
 
@@ -122,31 +218,29 @@ def page_rfm():
     st.write("FastAPI를 통해 B2C 고객을 Recency, Frequency, Monetary 기준으로 분석합니다.")
     
     try:
-        url = f"{API_BASE_URL}/analysis/customer_rfm"
         with st.spinner("FastAPI에서 RFM 데이터 계산 중..."):
-            response = requests.get(url)
-        if response.status_code != 200:
-            st.error(f"API 데이터 로드 실패 (코드: {response.status_code}): {response.text}")
+            data, error = get_analysis("/analysis/customer_rfm")
+        if error:
+            st.error(error)
             return
-        data = response.json()
         st.markdown("---")
         col1, col2 = st.columns(2)
         with col1:
             st.subheader("세그먼트별 고객 수")
-            df_counts = pd.DataFrame(data.get("segment_counts", []))
+            df_counts = pd.DataFrame(data.get("segment_counts", {}))
             if not df_counts.empty:
                 fig_bar = px.bar(df_counts, x='Segment', y='Count', title="고객 세그먼트 분포", text_auto=True)
                 fig_bar.update_layout(xaxis_title="세그먼트", yaxis_title="고객 수")
                 st.plotly_chart(fig_bar, use_container_width=True)
         with col2:
             st.subheader("세그먼트별 매출 기여도")
-            df_monetary = pd.DataFrame(data.get("segment_monetary", []))
+            df_monetary = pd.DataFrame(data.get("segment_monetary", {}))
             if not df_monetary.empty:
                 fig_tree = px.treemap(df_monetary, path=['Segment'], values='Monetary', title='세그먼트별 총 매출')
                 st.plotly_chart(fig_tree, use_container_width=True)
         st.markdown("---")
         st.subheader("RFM 분석 데이터 테이블 (매출 상위 100명)")
-        df_table = pd.DataFrame(data.get("rfm_table_top100", []))
+        df_table = pd.DataFrame(data.get("rfm_table_top100", {}))
         if df_table.empty:
             st.info("RFM 테이블 데이터를 찾을 수 없습니다.")
         else:
@@ -155,6 +249,8 @@ def page_rfm():
             st.dataframe(df_table[display_columns])
     except requests.exceptions.ConnectionError:
         st.error("연결 오류: API에 연결할 수 없습니다. FastAPI 서버(uvicorn)를 실행했는지 확인하세요.")
+    except requests.exceptions.Timeout:
+        st.error("시간 초과: API가 제한 시간 안에 응답하지 않았습니다.")
     except Exception as e:
         st.error(f"페이지 렌더링 중 오류 발생: {e}")
 
@@ -164,6 +260,13 @@ page = st.sidebar.radio(
     "페이지 선택:", 
     ("성과 예측", "리셀러 데이터 분석 (EDA)", "고객 세분화 (RFM)")
 )
+# 캐시를 비우고 API에서 다시 받기 (데이터가 그대로면 서버는 304만 반환)
+if st.sidebar.button("🔄 데이터 새로 고침"):
+    fetch_json.clear()
+    fetch_model_info.clear()
+    st.session_state["prefetched"] = False
+
+prefetch_all()
 
 # 선택된 페이지 렌더링
 if page == "성과 예측":
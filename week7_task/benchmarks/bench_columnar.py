@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+학습 데이터 로드 비교: pd.read_sql (SQLite) vs 열 기반 캐시 (Feather + 메모리 매핑).
+현재 DB를 임시 폴더에 복사하고 Sales 테이블을 N배로 늘린 뒤, train.load_data를 각 방식으로
+별도 프로세스에서 실행해 소요 시간과 최대 메모리(RSS) 증가량을 측정하고 결과가 같은지 확인합니다.
+
+실행: (week7_task 폴더에서) python benchmarks/bench_columnar.py [배수]
+"""
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+from bench_utils import PROJECT_DIR, use_project_dir
+
+use_project_dir()
+import columnar  # noqa: E402
+import train  # noqa: E402
+
+FACTOR = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+
+RUNNER = """
+import json, os, sys, time
+sys.path.insert(0, {project!r})
+def hwm_kb():
+    return next(int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('VmHWM'))
+import columnar, train
+if {sqlite_only!r}:
+    columnar.feather = None  # 캐시를 쓰지 않고 read_sql 경로 사용
+base_kb = hwm_kb()
+start = time.perf_counter()
+sales, customers = train.load_data({db!r})
+elapsed = time.perf_counter() - start
+print('RESULT ' + json.dumps({{"elapsed_s": elapsed, "rss_delta_mb": (hwm_kb() - base_kb) / 1024, "rows": len(sales)}}))
+"""
+
+
+def enlarge_db(src_path, dst_path, factor):
+    """DB를 복사하고 Sales 행을 factor배로 늘림 (판매 행 키는 복제본마다 다른 값으로)."""
+    shutil.copyfile(src_path, dst_path)
+    conn = sqlite3.connect(dst_path)
+    try:
+        columns = [c[1] for c in conn.execute("PRAGMA table_info(Sales)")]
+        column_list = ", ".join(f'"{c}"' for c in columns)
+        span = conn.execute("SELECT MAX(SalesOrderLineKey) - MIN(SalesOrderLineKey) + 1 FROM Sales").fetchone()[0]
+        select_list = ", ".join(f'"{c}" + ?' if c == 'SalesOrderLineKey' else f'"{c}"' for c in columns)
+        n_original = conn.execute("SELECT MAX(rowid) FROM Sales").fetchone()[0]
+        with conn:
+            for i in range(1, factor):
+                conn.execute(f"INSERT INTO Sales ({column_list}) SELECT {select_list} FROM Sales WHERE rowid <= ?",
+                             (i * span, n_original))
+        return conn.execute("SELECT COUNT(*) FROM Sales").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def run(db_path, sqlite_only):
+    code = RUNNER.format(project=PROJECT_DIR, db=db_path, sqlite_only=sqlite_only)
+    proc = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], capture_output=True, text=True, cwd=PROJECT_DIR)
+    for line in proc.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    raise RuntimeError(proc.stdout + proc.stderr)
+
+
+def main():
+    if not os.path.exists(train.DB_PATH):
+        print(f"오류: '{train.DB_PATH}' 파일이 없습니다.")
+        return
+    if columnar.feather is None:
+        print("pyarrow가 설치되어 있지 않습니다: pip install pyarrow")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'AdventureWorks-Sales.sqlite3')
+        n_sales = enlarge_db(train.DB_PATH, db_path, FACTOR)
+        columnar.write_columnar_cache(db_path)
+        print(f"Sales {n_sales:,}행 ({FACTOR}배), DB {os.path.getsize(db_path) / 1e6:.0f}MB")
+
+        for label, sqlite_only in [('pd.read_sql', True), ('열 기반 캐시 (Feather)', False)]:
+            r = run(db_path, sqlite_only)
+            print(f"{label:24s} {r['elapsed_s'] * 1000:8.0f}ms  최대 RSS 증가 {r['rss_delta_mb']:6.0f}MB  ({r['rows']:,}행)")
+
+        # 결과 일치 확인 (같은 프로세스에서 두 경로 비교)
+        cached = train.load_data(db_path)
+        feather = columnar.feather
+        columnar.feather = None
+        try:
+            from_sql = train.load_data(db_path)
+        finally:
+            columnar.feather = feather
+        # 행 순서는 읽는 경로(인덱스 순서 / rowid 순서)에 따라 다를 수 있으므로 정렬 후 비교
+        def ordered(df):
+            return df.sort_values(list(df.columns)).reset_index(drop=True)
+        same = all(ordered(a).equals(ordered(b)) for a, b in zip(cached, from_sql))
+        print(f"두 경로의 결과 일치 (행 정렬 후): {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+"""
+/analysis/* 엔드포인트 동시 요청 벤치마크 (ASGI 인프로세스, 서버 실행 불필요).
+엔드포인트별로 요청 N개를 동시성 C로 보내고 처리량과 p50/p95/p99 지연 시간을 출력합니다.
+
+실행: (week7_task 폴더에서) python benchmarks/bench_concurrency.py [요청 수] [동시성]
+"""
+import asyncio
+import sys
+import time
+
+import httpx
+
+from bench_utils import latency_summary, print_summary, use_project_dir
+
+use_project_dir()
+import main  # noqa: E402
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+ENDPOINTS = [
+    "/analysis/reseller_eda?engine=pandas",
+    "/analysis/reseller_eda?engine=sql",
+    "/analysis/customer_rfm",
+]
+
+
+async def run_endpoint(client, path):
+    semaphore = asyncio.Semaphore(CONCURRENCY)
+    latencies, errors = [], 0
+
+    async def one():
+        nonlocal errors
+        async with semaphore:
+            start = time.perf_counter()
+            response = await client.get(path)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code != 200
+
+    start = time.perf_counter()
+    await asyncio.gather(*[one() for _ in range(N)])
+    return latencies, errors, time.perf_counter() - start
+
+
+async def run():
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        for path in ENDPOINTS:
+            await client.get(path)  # 워밍업 (캐시/RFM 상태 준비)
+            latencies, errors, elapsed = await run_endpoint(client, path)
+            print_summary(path, latency_summary(latencies))
+            print(f"{'':<28} 처리량 {N / elapsed:8.1f} req/s   오류 {errors}")
+
+
+if __name__ == "__main__":
+    print(f"요청 {N}개 / 동시성 {CONCURRENCY} / 연결 풀 크기 {main.db_pool.size}")
+    asyncio.run(run())
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+리셀러 EDA 계산 엔진 비교: pandas (전체 행 로드 후 집계) vs sql (SQLite에서 집계).
+두 엔진의 결과가 같은지 확인하고, 실행 시간과 Python 메모리 최대 사용량(tracemalloc)을 출력합니다.
+
+실행: (week7_task 폴더에서) python benchmarks/bench_eda_engines.py [반복 횟수]
+"""
+import math
+import sqlite3
+import sys
+import time
+import tracemalloc
+
+from bench_utils import use_project_dir
+
+use_project_dir()
+import main  # noqa: E402
+from frame_response import to_records  # noqa: E402
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+
+
+def same_result(a, b):
+    """float는 합산 순서 차이만 허용하고 나머지는 정확히 같은지 비교."""
+    if isinstance(a, dict):
+        return a.keys() == b.keys() and all(same_result(a[k], b[k]) for k in a)
+    if isinstance(a, list):
+        return len(a) == len(b) and all(same_result(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+    return a == b
+
+
+def measure(compute, conn):
+    tracemalloc.start()
+    start = time.perf_counter()
+    for _ in range(N):
+        result = compute(conn)
+    elapsed = (time.perf_counter() - start) / N
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main_():
+    conn = sqlite3.connect(main.DB_PATH)
+    rows = conn.execute("SELECT COUNT(*) FROM Sales WHERE ResellerKey != -1").fetchone()[0]
+    print(f"리셀러 매출 행 수: {rows:,} / 반복 {N}회")
+    results = {}
+    for engine, compute in main.EDA_COMPUTE.items():
+        result, elapsed, peak = measure(compute, conn)
+        results[engine] = result
+        print(f"{engine:<7} 평균 {elapsed * 1000:8.1f}ms   최대 메모리 {peak / 1e6:8.1f}MB")
+    conn.close()
+    print("결과 일치:", same_result(to_records(results['pandas']), to_records(results['sql'])))
+
+
+if __name__ == "__main__":
+    main_()
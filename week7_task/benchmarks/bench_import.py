@@ -0,0 +1,106 @@
+# -*- coding: utf-8 -*-
+"""
+엑셀 → SQLite 임포트 비교: 기본 모드(pandas read_excel + to_sql) vs 빠른 모드(--fast).
+원본 엑셀의 Sales/SalesOrder 시트를 N배로 늘린 통합 문서를 임시 폴더에 만들고,
+각 모드를 별도 프로세스에서 실행해 소요 시간과 최대 메모리(RSS)를 측정한 뒤 두 DB의 내용이 같은지 확인합니다.
+
+실행: (week7_task 폴더에서) python benchmarks/bench_import.py [배수]
+"""
+import json
+import os
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+from bench_utils import PROJECT_DIR, use_project_dir
+
+use_project_dir()
+import import_excel_to_db  # noqa: E402
+
+FACTOR = int(sys.argv[1]) if len(sys.argv) > 1 else 10
+
+# 배수만큼 복제할 시트와 복제본마다 값을 바꿔 고유하게 유지할 키 열
+ENLARGE = {'Sales_data': 'SalesOrderLineKey', 'Sales Order_data': 'SalesOrderLineKey'}
+
+RUNNER = """
+import json, resource, sys, time
+sys.path.insert(0, {project!r})
+import import_excel_to_db as m
+start = time.perf_counter()
+getattr(m, {func!r})({excel!r}, {db!r})
+elapsed = time.perf_counter() - start
+# ru_maxrss는 exec 이전(벤치마크 프로세스)의 값을 이어받으므로 /proc의 VmHWM을 사용
+self_kb = next(int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('VmHWM'))
+child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+print('RESULT ' + json.dumps({{"elapsed_s": elapsed, "main_rss_mb": self_kb / 1024, "worker_rss_mb": child_kb / 1024}}))
+"""
+
+
+def build_workbook(src_path, dst_path, factor):
+    """원본 통합 문서의 판매 시트를 factor배로 늘려 저장."""
+    sheets = pd.read_excel(src_path, sheet_name=None)
+    for sheet_name, key in ENLARGE.items():
+        df = sheets[sheet_name]
+        span = int(df[key].max() - df[key].min() + 1)
+        copies = []
+        for i in range(factor):
+            copy = df.copy()
+            copy[key] = copy[key] + i * span
+            copies.append(copy)
+        sheets[sheet_name] = pd.concat(copies, ignore_index=True)
+    with pd.ExcelWriter(dst_path, engine='openpyxl') as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+    return {name: len(df) for name, df in sheets.items()}
+
+
+def run_mode(func, excel_path, db_path):
+    code = RUNNER.format(project=PROJECT_DIR, func=func, excel=excel_path, db=db_path)
+    proc = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], capture_output=True, text=True, cwd=PROJECT_DIR)
+    for line in proc.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    raise RuntimeError(proc.stdout + proc.stderr)
+
+
+def table_contents(db_path):
+    """시트에서 가져온 테이블의 내용 (임포트 메타데이터 테이블은 제외)."""
+    conn = sqlite3.connect(db_path)
+    try:
+        tables = import_excel_to_db.SHEETS_TO_IMPORT.values()
+        return {t: conn.execute(f'SELECT * FROM "{t}" ORDER BY rowid').fetchall() for t in tables}
+    finally:
+        conn.close()
+
+
+def main():
+    src = os.path.join(import_excel_to_db.DATA_DIR, import_excel_to_db.EXCEL_FILENAME)
+    if not os.path.exists(src):
+        print(f"오류: '{src}' 파일이 없습니다.")
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        excel_path = os.path.join(tmp, 'enlarged.xlsx')
+        start = time.perf_counter()
+        sizes = build_workbook(src, excel_path, FACTOR)
+        print(f"확대한 통합 문서 생성 ({FACTOR}배, {time.perf_counter() - start:.1f}초): {sizes}")
+        print(f"파일 크기: {os.path.getsize(excel_path) / 1e6:.1f} MB")
+
+        results = {}
+        for label, func in [('기본 (read_excel + to_sql)', 'import_excel_to_sqlite'),
+                            ('빠른 모드 (--fast)', 'import_excel_fast')]:
+            db_path = os.path.join(tmp, f'{func}.sqlite3')
+            results[func] = db_path
+            r = run_mode(func, excel_path, db_path)
+            print(f"{label:28s} {r['elapsed_s']:7.1f}초  최대 RSS: 메인 {r['main_rss_mb']:.0f}MB, "
+                  f"작업 프로세스 {r['worker_rss_mb']:.0f}MB")
+
+        same = table_contents(results['import_excel_to_sqlite']) == table_contents(results['import_excel_fast'])
+        print(f"두 모드의 테이블 내용 일치: {same}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+"""
+계측(common/instrumentation.py) 오버헤드 측정.
+
+1) stage() 블록 하나의 비용 (요청 밖 / 요청 안)
+2) 같은 예측 엔드포인트를 TimingMiddleware 없이 / 있게 만든 두 앱에 ASGI로 직접 요청했을 때의 p50/p99
+
+실행: (week7_task 폴더에서) python benchmarks/bench_instrumentation.py [반복 횟수]
+"""
+import asyncio
+import sys
+import time
+
+import fastapi
+import httpx
+
+from bench_utils import latency_summary, print_summary, time_calls, use_project_dir
+
+use_project_dir()
+import common_path  # noqa: E402,F401
+from common import instrumentation  # noqa: E402
+from main import WARMUP_ROW, predict_customer_rows  # noqa: E402
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+
+
+def stage_cost_ns(n, in_request):
+    token = instrumentation._current_trace.set(instrumentation.RequestTrace()) if in_request else None
+    try:
+        start = time.perf_counter()
+        for _ in range(n):
+            with instrumentation.stage('bench'):
+                pass
+        return (time.perf_counter() - start) / n * 1e9
+    finally:
+        if token is not None:
+            instrumentation._current_trace.reset(token)
+
+
+def build_app(timed):
+    app = fastapi.FastAPI()
+    if timed:
+        app.add_middleware(instrumentation.TimingMiddleware)
+
+    @app.post("/predict")
+    def predict(row: dict):
+        prediction, probability = predict_customer_rows([row])[0]
+        return {"will_purchase_prediction": prediction, "probability_to_purchase": probability}
+
+    return app
+
+
+async def request_latencies(app, n):
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for _ in range(20):
+            await client.post("/predict", json=WARMUP_ROW)
+        latencies = []
+        for _ in range(n):
+            start = time.perf_counter()
+            r = await client.post("/predict", json=WARMUP_ROW)
+            latencies.append(time.perf_counter() - start)
+            assert r.status_code == 200
+        return latencies
+
+
+def main():
+    print(f"stage() 블록 1개: 요청 밖 {stage_cost_ns(100_000, False):.0f}ns, "
+          f"요청 안 {stage_cost_ns(100_000, True):.0f}ns")
+    time_calls(lambda: predict_customer_rows([WARMUP_ROW]), 100)
+
+    print(f"예측 요청 {N}회 (ASGI 직접 호출)")
+    for label, timed in (("middleware 없음", False), ("TimingMiddleware", True)):
+        print_summary(label, latency_summary(asyncio.run(request_latencies(build_app(timed), N))))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+예측 지연 시간 격리 부하 테스트.
+
+1) 부하 없음: /predict_customer_purchase 를 순차 호출해 p50/p99 측정
+2) 분석 부하: /analysis/customer_rfm 요청(전체 이력 재계산)을 계속 보내는 동안 같은 측정 반복
+두 단계의 예측 p99가 비슷하면 분석 작업이 예측 경로를 막지 않는다는 뜻입니다.
+
+서버가 막힌 시간이 클라이언트 측정에 포함되도록, API는 별도 스레드의 uvicorn(로컬 포트)에서 실행합니다.
+
+실행: (week7_task 폴더에서) python benchmarks/bench_isolation.py [예측 요청 수] [동시 RFM 요청 수]
+"""
+import asyncio
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from bench_utils import latency_summary, print_summary, use_project_dir
+
+use_project_dir()
+import main  # noqa: E402
+
+N_PREDICT = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+RFM_CONCURRENCY = int(sys.argv[2]) if len(sys.argv) > 2 else 4
+PORT = 8765
+PAYLOAD = {"Recency_Snapshot": 30, "Frequency": 5, "Monetary": 1500.50, "Country-Region": "United States"}
+
+
+async def measure_predict(client):
+    latencies = []
+    for _ in range(N_PREDICT):
+        start = time.perf_counter()
+        response = await client.post("/predict_customer_purchase", json=PAYLOAD)
+        latencies.append(time.perf_counter() - start)
+        assert response.status_code == 200, response.text
+    return latencies
+
+
+async def rfm_load(client, stop, counter):
+    while not stop.is_set():
+        response = await client.get("/analysis/customer_rfm")
+        counter[response.status_code] = counter.get(response.status_code, 0) + 1
+
+
+def start_server():
+    """uvicorn을 백그라운드 스레드에서 실행하고 준비될 때까지 기다립니다."""
+    server = uvicorn.Server(uvicorn.Config(main.app, host="127.0.0.1", port=PORT, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread
+
+
+async def run():
+    # 가장 무거운 경로(요청마다 전체 판매 이력 재계산)로 분석 부하를 만듭니다.
+    main.RFM_STORE_ENABLED = False
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{PORT}", timeout=300) as client:
+        await measure_predict(client)  # 워밍업
+        print_summary("predict (부하 없음)", latency_summary(await measure_predict(client)))
+
+        stop, counter = asyncio.Event(), {}
+        loaders = [asyncio.create_task(rfm_load(client, stop, counter)) for _ in range(RFM_CONCURRENCY)]
+        await asyncio.sleep(0.2)
+        print_summary(f"predict (RFM x{RFM_CONCURRENCY} 진행 중)", latency_summary(await measure_predict(client)))
+        stop.set()
+        await asyncio.gather(*loaders)
+        print(f"RFM 응답 상태 코드: {counter}")
+
+
+if __name__ == "__main__":
+    server, thread = start_server()
+    try:
+        asyncio.run(run())
+    finally:
+        server.should_exit = True
+        thread.join()
@@ -0,0 +1,98 @@
+# -*- coding: utf-8 -*-
+"""
+워커 시작 비교: 기존 joblib 파일(model.joblib + preprocessor.joblib) vs 서빙 번들(bundle.joblib, mmap_mode='r').
+각 형식으로 N개의 워커 프로세스를 동시에 띄워 (import + 모델 로드 + 첫 예측) 시간을 재고,
+모든 워커가 로드된 상태에서 /proc/self/smaps_rollup의 RSS와 PSS(공유 페이지를 프로세스 수로 나눈 값)를 측정합니다.
+두 형식의 예측 확률이 같은지도 확인합니다. 먼저 'python train.py'로 모델과 번들을 만들어 두세요.
+
+실행: (week7_task 폴더에서) python benchmarks/bench_model_bundle.py [워커 수]
+"""
+import json
+import subprocess
+import sys
+
+import numpy as np
+
+from bench_utils import PROJECT_DIR, use_project_dir
+
+use_project_dir()
+
+N_WORKERS = int(sys.argv[1]) if len(sys.argv) > 1 else 4
+ROUNDS = 3
+
+WORKER = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {project!r})
+if {fmt!r} == 'joblib':
+    import joblib
+    from fast_features import CustomerFeaturizer
+    model = joblib.load('models/model.joblib')
+    featurizer = CustomerFeaturizer.from_preprocessor(joblib.load('models/preprocessor.joblib'))
+else:
+    from model_bundle import load_bundle
+    bundle = load_bundle('models/bundle.joblib')
+    model, featurizer = bundle['model'], bundle['featurizer']
+rows = [{{'Recency_Snapshot': 10 * i, 'Frequency': i % 7 + 1, 'Monetary': 37.5 * i, 'Country-Region': c}}
+        for i, c in enumerate(['United States', 'Canada', 'France', 'Germany', 'Australia', '__unknown__'] * 5)]
+proba = model.predict_proba(featurizer.transform_rows(rows))[:, 1]
+elapsed = time.perf_counter() - start
+print('READY ' + json.dumps({{"startup_s": elapsed, "proba": proba.tolist()}}), flush=True)
+sys.stdin.readline()  # 모든 워커가 로드될 때까지 대기한 뒤 메모리 측정
+mem = {{}}
+for line in open('/proc/self/smaps_rollup'):
+    parts = line.split()
+    if parts[0] in ('Rss:', 'Pss:'):
+        mem[parts[0][:-1].lower() + '_mb'] = int(parts[1]) / 1024
+print('MEM ' + json.dumps(mem), flush=True)
+"""
+
+
+def read_tagged(proc, tag):
+    for line in proc.stdout:
+        if line.startswith(tag + ' '):
+            return json.loads(line[len(tag) + 1:])
+    raise RuntimeError(proc.stderr.read())
+
+
+def run_workers(fmt, n):
+    """n개의 워커를 동시에 띄워 시작 시간, 메모리, 예측 확률을 수집."""
+    code = WORKER.format(project=PROJECT_DIR, fmt=fmt)
+    procs = [subprocess.Popen([sys.executable, '-W', 'ignore', '-c', code], cwd=PROJECT_DIR, text=True,
+                              stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+             for _ in range(n)]
+    ready = [read_tagged(p, 'READY') for p in procs]
+    for p in procs:
+        p.stdin.write('\n')
+        p.stdin.flush()
+    mem = [read_tagged(p, 'MEM') for p in procs]
+    for p in procs:
+        p.wait()
+    return {
+        "startup_s": [r['startup_s'] for r in ready],
+        "rss_mb": [m['rss_mb'] for m in mem],
+        "pss_mb": [m['pss_mb'] for m in mem],
+        "proba": ready[0]['proba'],
+    }
+
+
+def main():
+    print(f"워커 {N_WORKERS}개 동시 시작, {ROUNDS}회 반복 (첫 회는 파일 캐시 준비용으로 제외)")
+    results = {}
+    for fmt in ('joblib', 'bundle'):
+        rounds = [run_workers(fmt, N_WORKERS) for _ in range(ROUNDS)]
+        results[fmt] = rounds[-1]
+        startup = np.array([r['startup_s'] for r in rounds[1:]])
+        last = rounds[-1]
+        print(f"{fmt:<7} 시작 시간 평균 {startup.mean():.2f}s (최대 {startup.max():.2f}s)  "
+              f"워커별 RSS {np.mean(last['rss_mb']):.1f}MB  PSS {np.mean(last['pss_mb']):.1f}MB  "
+              f"합계 PSS {np.sum(last['pss_mb']):.1f}MB")
+
+    same = np.allclose(results['joblib']['proba'], results['bundle']['proba'], atol=1e-6)
+    print(f"예측 확률 일치: {same}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,50 @@
+# -*- coding: utf-8 -*-
+"""
+단일 고객 예측 지연 시간 마이크로 벤치마크.
+
+기존 경로 (1행 DataFrame + ColumnTransformer.transform + predict + predict_proba)와
+빠른 경로 (CustomerFeaturizer + predict_proba 1회)의 p50/p99를 비교합니다.
+
+실행: (week7_task 폴더에서) python benchmarks/bench_predict_latency.py [반복 횟수]
+"""
+import sys
+
+import joblib
+import pandas as pd
+
+from bench_utils import latency_summary, print_summary, time_calls, use_project_dir
+
+use_project_dir()
+from fast_features import CustomerFeaturizer  # noqa: E402
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+ROW = {'Recency_Snapshot': 30, 'Frequency': 5, 'Monetary': 1500.50, 'Country-Region': 'United States'}
+COLUMNS = ['Recency_Snapshot', 'Frequency', 'Monetary', 'Country-Region']
+
+
+def main():
+    model = joblib.load('models/model.joblib')
+    preprocessor = joblib.load('models/preprocessor.joblib')
+    featurizer = CustomerFeaturizer.from_preprocessor(preprocessor)
+
+    def before():
+        X = preprocessor.transform(pd.DataFrame([ROW], columns=COLUMNS))
+        return int(model.predict(X)[0]), float(model.predict_proba(X)[0][1])
+
+    def after():
+        proba = model.predict_proba(featurizer.transform_rows([ROW]))
+        return int(model.classes_[proba.argmax(axis=1)][0]), float(proba[0, 1])
+
+    assert before() == after(), "두 경로의 예측 결과가 다릅니다."
+
+    print(f"단일 행 예측 {N}회 반복")
+    results = {
+        "before (DataFrame)": latency_summary(time_calls(before, N)),
+        "after (fast path)": latency_summary(time_calls(after, N)),
+    }
+    for label, summary in results.items():
+        print_summary(label, summary)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+"""
+RFM 계산 비교: lambda 기반 groupby (기존) vs rfm.compute_rfm (기본 집계 + 벡터 날짜 연산).
+규모를 키운 합성 판매 데이터에서 결과가 같은지 확인하고 실행 시간을 출력합니다.
+
+실행: (week7_task 폴더에서) python benchmarks/bench_rfm_compute.py [판매 행 수] [고객 수]
+"""
+import datetime
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_utils import use_project_dir
+
+use_project_dir()
+from rfm import compute_rfm  # noqa: E402
+
+N_ROWS = int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000
+N_CUSTOMERS = int(sys.argv[2]) if len(sys.argv) > 2 else 200_000
+
+
+def lambda_rfm(df, snapshot_date):
+    """기존 방식: 고객 그룹마다 Python lambda 호출."""
+    return df.groupby('CustomerKey').agg(
+        Recency=('Date', lambda x: (snapshot_date - x.max()).days),
+        Frequency=('Date', 'nunique'),
+        Monetary=('Sales Amount', 'sum')
+    ).reset_index()
+
+
+def main():
+    rng = np.random.default_rng(0)
+    dates = pd.date_range('2017-07-01', '2020-06-15', freq='D')
+    df = pd.DataFrame({
+        'CustomerKey': rng.integers(11000, 11000 + N_CUSTOMERS, N_ROWS),
+        'Date': dates[rng.integers(0, len(dates), N_ROWS)],
+        'Sales Amount': rng.gamma(2.0, 500.0, N_ROWS),
+    })
+    snapshot_date = df['Date'].max() + datetime.timedelta(days=1)
+    print(f"판매 {N_ROWS:,}행 / 고객 {df['CustomerKey'].nunique():,}명")
+
+    start = time.perf_counter()
+    expected = lambda_rfm(df, snapshot_date)
+    t_lambda = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = compute_rfm(df, snapshot_date)
+    t_native = time.perf_counter() - start
+
+    pd.testing.assert_frame_equal(expected, actual, check_dtype=False)
+    print("결과 일치")
+    print(f"lambda groupby : {t_lambda:8.3f}s")
+    print(f"compute_rfm    : {t_native:8.3f}s  ({t_lambda / t_native:,.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
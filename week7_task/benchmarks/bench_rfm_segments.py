@@ -0,0 +1,51 @@
+# -*- coding: utf-8 -*-
+"""
+RFM 세그먼트 할당 비교: 행마다 정규식을 적용하는 기존 방식 vs 125칸 조회 테이블 방식.
+합성 고객 데이터에서 두 방식의 실행 시간과 결과 일치 여부를 출력합니다.
+(125개 점수 조합과 동점/qcut 경계 중복 같은 경계 사례의 동등성은 tests/test_rfm_segments.py에서 검사)
+
+실행: (week7_task 폴더에서) python benchmarks/bench_rfm_segments.py [고객 수, 기본 1,000,000]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench_utils import use_project_dir
+
+use_project_dir()
+from rfm import assign_segments, match_segment  # noqa: E402
+
+N = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+
+def regex_segments(rfm_df):
+    """기존 방식: 점수 문자열을 만들고 Series.apply로 정규식 매칭."""
+    scores = rfm_df['R_Score'].astype(str) + rfm_df['F_Score'].astype(str) + rfm_df['M_Score'].astype(str)
+    return scores.apply(match_segment)
+
+
+def lookup_segments(rfm_df):
+    return assign_segments(rfm_df['R_Score'], rfm_df['F_Score'], rfm_df['M_Score'])
+
+
+def main():
+    rng = np.random.default_rng(42)
+    rfm_df = pd.DataFrame(rng.integers(1, 6, size=(N, 3)), columns=['R_Score', 'F_Score', 'M_Score'])
+
+    start = time.perf_counter()
+    expected = regex_segments(rfm_df)
+    t_regex = time.perf_counter() - start
+
+    start = time.perf_counter()
+    actual = lookup_segments(rfm_df)
+    t_lookup = time.perf_counter() - start
+
+    print(f"고객 {N:,}명: 결과 {'일치' if (expected.values == actual).all() else '불일치'}")
+    print(f"regex + apply : {t_regex:8.3f}s")
+    print(f"lookup table  : {t_lookup:8.3f}s  ({t_regex / t_lookup:,.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+"""
+고객 일괄 점수 계산(score_customers.py) 비교: 청크 크기와 작업 프로세스 수에 따른 소요 시간과 최대 메모리(RSS).
+DB를 임시 폴더에 복사하고 B2C 판매/고객 행을 N배로 늘린 뒤, 각 설정을 별도 프로세스에서 실행해 Parquet으로 저장합니다.
+모든 결과가 전체 데이터를 한 번에 읽어 계산한 기준 결과(train.py:feature_engineering과 같은 방식)와 같은지 확인합니다.
+
+실행: (week7_task 폴더에서) python benchmarks/bench_score_customers.py [배수]
+"""
+import json
+import os
+import shutil
+import sqlite3
+import subprocess
+import sys
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+from bench_utils import PROJECT_DIR, use_project_dir
+
+use_project_dir()
+import score_customers as sc  # noqa: E402
+from rfm import compute_rfm  # noqa: E402
+
+FACTOR = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+# (청크당 고객 수, 작업 프로세스 수)
+SETTINGS = [(1_000_000_000, 1), (50_000, 1), (10_000, 1), (10_000, 2)]
+
+RUNNER = """
+import json, resource, sys, time
+sys.path.insert(0, {project!r})
+import score_customers as sc
+start = time.perf_counter()
+sc.score_customers({db!r}, output='parquet', parquet_path={out!r}, chunk_customers={chunk}, workers={workers})
+elapsed = time.perf_counter() - start
+self_kb = next(int(l.split()[1]) for l in open('/proc/self/status') if l.startswith('VmHWM'))
+child_kb = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+print('RESULT ' + json.dumps({{"elapsed_s": elapsed, "main_rss_mb": self_kb / 1024, "worker_rss_mb": child_kb / 1024}}))
+"""
+
+
+def enlarge_db(src_path, dst_path, factor):
+    """B2C 판매 행과 고객 행을 factor배로 늘린 DB 복사본 (복제본마다 고객/판매 행 키를 바꿈)."""
+    shutil.copyfile(src_path, dst_path)
+    conn = sqlite3.connect(dst_path)
+    try:
+        sales = pd.read_sql("SELECT * FROM Sales WHERE ResellerKey = -1 AND CustomerKey != -1", conn)
+        customers = pd.read_sql("SELECT * FROM Customers WHERE CustomerKey != -1", conn)
+        line_span = conn.execute("SELECT MAX(SalesOrderLineKey) + 1 FROM Sales").fetchone()[0]
+        key_span = int(customers['CustomerKey'].max()) + 1
+        for i in range(1, factor):
+            s, c = sales.copy(), customers.copy()
+            s['CustomerKey'] += i * key_span
+            s['SalesOrderLineKey'] += i * line_span
+            c['CustomerKey'] += i * key_span
+            s.to_sql('Sales', conn, if_exists='append', index=False)
+            c.to_sql('Customers', conn, if_exists='append', index=False)
+        conn.commit()
+        return len(customers) * factor, len(sales) * factor
+    finally:
+        conn.close()
+
+
+def reference_scores(db_path):
+    """전체 B2C 판매를 한 번에 읽어 계산한 기준 결과."""
+    model, preprocessor = sc.load_scoring_model(sc.resolve_model_version())
+    conn = sqlite3.connect(db_path)
+    try:
+        snapshot = sc.default_snapshot_date(conn)
+        sales = pd.read_sql(sc.CHUNK_SALES_SQL, conn, params=(0, 2 ** 62))
+        customers = pd.read_sql("SELECT CustomerKey, [Country-Region] FROM Customers WHERE CustomerKey != -1", conn)
+    finally:
+        conn.close()
+    sales['Date'] = pd.to_datetime(sales['Date'])
+    features = pd.merge(compute_rfm(sales, snapshot, recency_col='Recency_Snapshot'), customers,
+                        on='CustomerKey', how='left').replace([np.inf, -np.inf], np.nan)
+    features['probability_to_purchase'] = model.predict_proba(preprocessor.transform(features[sc.FEATURES]))[:, 1]
+    return features.sort_values('CustomerKey').reset_index(drop=True)
+
+
+def run_setting(db_path, out_path, chunk, workers):
+    code = RUNNER.format(project=PROJECT_DIR, db=db_path, out=out_path, chunk=chunk, workers=workers)
+    proc = subprocess.run([sys.executable, '-W', 'ignore', '-c', code], capture_output=True, text=True, cwd=PROJECT_DIR)
+    for line in proc.stdout.splitlines():
+        if line.startswith('RESULT '):
+            return json.loads(line[len('RESULT '):])
+    raise RuntimeError(proc.stdout + proc.stderr)
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'scores.sqlite3')
+        n_customers, n_sales = enlarge_db(sc.DB_PATH, db_path, FACTOR)
+        print(f"고객 {n_customers}명, B2C 판매 {n_sales}행 ({FACTOR}배)")
+        expected = reference_scores(db_path)
+
+        all_match = True
+        for chunk, workers in SETTINGS:
+            out_path = os.path.join(tmp, f"scores_{chunk}_{workers}.parquet")
+            result = run_setting(db_path, out_path, chunk, workers)
+            got = pd.read_parquet(out_path).sort_values('CustomerKey').reset_index(drop=True)
+            match = (len(got) == len(expected)
+                     and (got['CustomerKey'].to_numpy() == expected['CustomerKey'].to_numpy()).all()
+                     and np.allclose(got['probability_to_purchase'], expected['probability_to_purchase'], atol=1e-6)
+                     and (got['Recency_Snapshot'].to_numpy() == expected['Recency_Snapshot'].to_numpy()).all())
+            all_match &= bool(match)
+            label = '전체 한 번에' if chunk >= n_customers else f"청크 {chunk}명"
+            print(f"{label:<14} 작업 {workers}개: {result['elapsed_s']:.1f}s  "
+                  f"메인 최대 RSS {result['main_rss_mb']:.0f}MB  작업 프로세스 최대 RSS {result['worker_rss_mb']:.0f}MB  "
+                  f"기준 결과와 일치: {bool(match)}")
+    if not all_match:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+# -*- coding: utf-8 -*-
+"""벤치마크 스크립트 공통 도구."""
+import os
+import sys
+import time
+
+import numpy as np
+
+# week7_task 폴더 (main.py, train.py 등이 있는 위치)
+PROJECT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def use_project_dir():
+    """프로젝트 모듈을 import할 수 있게 하고, 상대 경로('models/', 'data/')가 동작하도록 작업 폴더를 이동."""
+    if PROJECT_DIR not in sys.path:
+        sys.path.insert(0, PROJECT_DIR)
+    os.chdir(PROJECT_DIR)
+
+
+def latency_summary(latencies_s):
+    """지연 시간(초) 리스트를 ms 단위 p50/p95/p99 요약으로 변환."""
+    arr = np.asarray(latencies_s, dtype=float) * 1000.0
+    if arr.size == 0:
+        return {"n": 0}
+    return {
+        "n": int(arr.size),
+        "mean_ms": float(arr.mean()),
+        "p50_ms": float(np.percentile(arr, 50)),
+        "p95_ms": float(np.percentile(arr, 95)),
+        "p99_ms": float(np.percentile(arr, 99)),
+        "max_ms": float(arr.max()),
+    }
+
+
+def time_calls(fn, n, warmup=20):
+    """fn()을 n번 호출하며 호출별 지연 시간(초)을 측정."""
+    for _ in range(warmup):
+        fn()
+    latencies = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def print_summary(label, summary):
+    if not summary.get("n"):
+        print(f"{label:<28} (결과 없음)")
+        return
+    print(f"{label:<28} n={summary['n']:<6} p50={summary['p50_ms']:.3f}ms  "
+          f"p95={summary['p95_ms']:.3f}ms  p99={summary['p99_ms']:.3f}ms")
@@ -0,0 +1,125 @@
+# -*- coding: utf-8 -*-
+import datetime
+import json
+import os
+import shutil
+import sqlite3
+
+import pandas as pd
+
+from analysis_cache import db_fingerprint
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow가 없으면 열 기반 캐시 없이 항상 SQLite에서 읽습니다.
+    pa = None
+    feather = None
+AVAILABLE = feather is not None
+
+# 열 기반 캐시로 저장할 테이블 (분석 API와 학습이 읽는 테이블, DB에 없는 테이블은 건너뜀)
+CACHED_TABLES = ('Sales', 'Date', 'Customers', 'Resellers', 'Territories', 'SalesFact')
+MANIFEST_NAME = 'manifest.json'
+
+
+def cache_dir(db_path):
+    """DB 파일 옆의 열 기반 캐시 폴더 (예: data/columnar/)."""
+    return os.path.join(os.path.dirname(db_path), 'columnar')
+
+
+def _table_path(db_path, table):
+    return os.path.join(cache_dir(db_path), f"{table}.feather")
+
+
+def read_manifest(db_path):
+    try:
+        with open(os.path.join(cache_dir(db_path), MANIFEST_NAME), encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+
+def is_fresh(db_path, manifest=None):
+    """캐시가 현재 DB 파일(fingerprint)로 만들어졌으면 True."""
+    manifest = manifest if manifest is not None else read_manifest(db_path)
+    return manifest is not None and manifest.get('fingerprint') == db_fingerprint(db_path)
+
+
+def write_columnar_cache(db_path, tables=CACHED_TABLES, converters=None):
+    """
+    SQLite 테이블을 Feather(Arrow IPC, 비압축) 파일로 저장하고 manifest를 기록합니다.
+    비압축 파일이라 읽을 때 메모리 매핑이 가능합니다. pyarrow가 없으면(AVAILABLE이 False) None을 반환합니다.
+    converters: 테이블 -> 저장 전 DataFrame 변환 함수 (예: SalesFact의 날짜/category 변환)
+    새 캐시는 임시 폴더에 파일과 manifest(DB fingerprint 포함)를 모두 쓴 뒤, 작성 중 DB가 바뀌지 않았을 때만
+    기존 캐시 폴더와 교체합니다. DB가 바뀌었으면 임시 폴더를 지우고 None을 반환합니다 (기존 캐시는 그대로 남지만
+    fingerprint가 달라 읽는 쪽은 SQLite를 사용).
+    """
+    if feather is None:
+        return None
+    out_dir = cache_dir(db_path)
+    tmp_dir = f"{out_dir}.tmp-{os.getpid()}"
+    shutil.rmtree(tmp_dir, ignore_errors=True)
+    os.makedirs(tmp_dir)
+    try:
+        fingerprint = db_fingerprint(db_path)
+        conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+        entries = {}
+        try:
+            existing = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            for table in tables:
+                if table not in existing:
+                    continue
+                df = pd.read_sql(f'SELECT * FROM "{table}"', conn)
+                if converters and table in converters:
+                    df = converters[table](df)
+                feather.write_feather(df, os.path.join(tmp_dir, f"{table}.feather"), compression='uncompressed')
+                entries[table] = {"rows": len(df), "columns": list(df.columns)}
+        finally:
+            conn.close()
+        if db_fingerprint(db_path) != fingerprint:
+            return None
+
+        manifest = {
+            "fingerprint": fingerprint,
+            "tables": entries,
+            "written_at": datetime.datetime.now().isoformat(timespec='seconds'),
+        }
+        with open(os.path.join(tmp_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, ensure_ascii=False, indent=2)
+
+        # 기존 폴더를 옆으로 옮기고 새 폴더로 교체 (그 사이에 읽는 쪽은 manifest가 없어 SQLite 사용)
+        old_dir = f"{out_dir}.old-{os.getpid()}"
+        if os.path.isdir(out_dir):
+            os.rename(out_dir, old_dir)
+        os.rename(tmp_dir, out_dir)
+        shutil.rmtree(old_dir, ignore_errors=True)
+        return manifest
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def load_table(db_path, table, columns=None, conn=None, memory_map=True):
+    """
+    테이블의 지정한 열만 DataFrame으로 읽습니다.
+    열 기반 캐시가 최신이면 Feather 파일에서 필요한 열만(memory_map=True면 메모리 매핑으로) 읽고,
+    캐시가 없거나 DB보다 오래됐으면 SQLite(conn, 없으면 db_path)에서 pd.read_sql로 읽습니다.
+    두 경로의 결과(열 순서, dtype)는 같습니다 (저장 시 converters로 변환한 테이블은 변환된 dtype).
+    """
+    if feather is not None:
+        manifest = read_manifest(db_path)
+        if is_fresh(db_path, manifest) and table in manifest.get('tables', {}):
+            try:
+                return feather.read_table(_table_path(db_path, table), columns=columns,
+                                          memory_map=memory_map).to_pandas()
+            except (OSError, pa.ArrowException) as e:
+                print(f"열 기반 캐시를 읽을 수 없어 SQLite에서 읽습니다: {e}")
+
+    column_list = '*' if columns is None else ", ".join('"' + c.replace('"', '""') + '"' for c in columns)
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(db_path)
+    try:
+        return pd.read_sql(f'SELECT {column_list} FROM "{table}"', conn)
+    finally:
+        if own_conn:
+            conn.close()
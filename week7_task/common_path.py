@@ -0,0 +1,8 @@
+# -*- coding: utf-8 -*-
+# 저장소 루트의 common/ 패키지(week6_task와 공유하는 모듈)를 import할 수 있도록 저장소 루트를 sys.path에 추가합니다.
+import os
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO_ROOT not in sys.path:
+    sys.path.append(REPO_ROOT)
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import os
+import queue
+import sqlite3
+import threading
+
+# 읽기 최적화 PRAGMA 기본값 (환경 변수로 조정 가능)
+DEFAULT_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))
+DEFAULT_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024)))   # 256MB
+DEFAULT_CACHE_SIZE_KIB = int(os.getenv('DB_CACHE_SIZE_KIB', str(64 * 1024)))  # 연결당 64MB 페이지 캐시
+
+
+class PooledConnection(sqlite3.Connection):
+    """풀에서 관리하는 연결. 어느 DB 파일(inode)에 연결됐는지 기억합니다."""
+    file_id = None
+
+
+class SQLitePool:
+    """
+    읽기 전용 SQLite 연결 풀.
+
+    - 연결은 `mode=ro` URI로 열고 query_only, mmap_size, cache_size PRAGMA를 적용합니다.
+    - 최대 size개의 연결을 재사용하며, 모두 사용 중이면 반환될 때까지 기다립니다.
+    - DB 파일이 교체되면(임포트 후 새 파일로 바뀜) 기존 연결은 버리고 새로 엽니다.
+    - 연결은 여러 스레드에서 번갈아 사용되므로 check_same_thread=False로 엽니다.
+      한 연결은 acquire ~ release 사이에 한 요청만 사용합니다.
+    """
+
+    def __init__(self, db_path, size=DEFAULT_POOL_SIZE, mmap_size=DEFAULT_MMAP_SIZE,
+                 cache_size_kib=DEFAULT_CACHE_SIZE_KIB, timeout=30.0):
+        self.db_path = db_path
+        self.size = size
+        self.mmap_size = mmap_size
+        self.cache_size_kib = cache_size_kib
+        self.timeout = timeout
+        self._idle = queue.LifoQueue()          # 최근에 쓴 (캐시가 따뜻한) 연결부터 재사용
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    def _file_id(self):
+        """DB 파일 식별자 (장치, inode). 파일이 없으면 FileNotFoundError."""
+        st = os.stat(self.db_path)
+        return (st.st_dev, st.st_ino)
+
+    def _open(self, file_id):
+        uri = f"file:{os.path.abspath(self.db_path)}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, timeout=self.timeout,
+                               check_same_thread=False, factory=PooledConnection)
+        conn.execute(f"PRAGMA mmap_size = {int(self.mmap_size)}")
+        conn.execute(f"PRAGMA cache_size = -{int(self.cache_size_kib)}")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA query_only = 1")
+        conn.file_id = file_id
+        return conn
+
+    def acquire(self):
+        """연결 하나를 빌려옵니다. 사용 후 반드시 release()로 돌려주세요."""
+        file_id = self._file_id()
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("DB 연결 풀에 사용 가능한 연결이 없습니다.")
+        try:
+            while True:
+                try:
+                    conn = self._idle.get_nowait()
+                except queue.Empty:
+                    return self._open(file_id)
+                if conn.file_id == file_id:
+                    return conn
+                conn.close()  # 교체되기 전 DB 파일에 연결된 연결
+        except BaseException:
+            self._slots.release()
+            raise
+
+    def release(self, conn):
+        """빌려간 연결을 풀에 돌려줍니다."""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            if self._closed:
+                conn.close()
+            else:
+                self._idle.put(conn)
+        finally:
+            self._slots.release()
+
+    @contextlib.contextmanager
+    def connection(self):
+        conn = self.acquire()
+        try:
+            yield conn
+        finally:
+            self.release(conn)
+
+    def close(self):
+        """대기 중인 연결을 모두 닫습니다 (앱 종료 시)."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
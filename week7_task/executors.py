@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import contextvars
+import functools
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common import instrumentation
+
+# 작업 풀 크기 설정 (환경 변수로 조정 가능)
+PREDICT_WORKERS = int(os.getenv('PREDICT_WORKERS', '4'))
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '2'))
+ANALYSIS_MAX_PENDING = int(os.getenv('ANALYSIS_MAX_PENDING', '16'))  # 실행 중 + 대기 중인 분석 작업 최대 개수
+
+
+class PoolBusyError(Exception):
+    """작업 풀의 대기열이 가득 차서 새 작업을 받을 수 없음."""
+
+
+class WorkPool:
+    """
+    이벤트 루프를 막지 않도록 동기 작업(pandas, SQLite, 모델 추론)을 실행하는 전용 스레드 풀.
+
+    예측과 분석은 서로 다른 풀을 사용하므로, 무거운 분석 요청이 몰려도 예측 요청은
+    자기 풀에서 바로 실행됩니다. max_pending을 넘는 작업은 큐에 쌓지 않고 PoolBusyError로 거절합니다.
+    """
+
+    def __init__(self, name, max_workers, max_pending=None):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{name}-worker")
+        self._pending = 0     # 이벤트 루프 스레드에서만 변경됨
+        self.rejected_total = 0
+
+    async def run(self, fn, *args, **kwargs):
+        """
+        fn(*args, **kwargs)를 풀에서 실행하고 결과를 기다립니다.
+        현재 컨텍스트(요청별 단계 기록)를 복사해 실행하므로 작업 스레드의 단계 시간도 같은 요청의 Server-Timing에 기록됩니다.
+        """
+        if self.max_pending is not None and self._pending >= self.max_pending:
+            self.rejected_total += 1
+            raise PoolBusyError(f"'{self.name}' 작업 풀이 가득 찼습니다 ({self._pending}/{self.max_pending}).")
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            call = functools.partial(contextvars.copy_context().run, instrumentation.call_profiled, fn, *args, **kwargs)
+            return await loop.run_in_executor(self.executor, call)
+        finally:
+            self._pending -= 1
+
+    def stats(self):
+        return {
+            "workers": self.max_workers,
+            "max_pending": self.max_pending,
+            "pending": self._pending,
+            "rejected_total": self.rejected_total,
+        }
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+predict_pool = WorkPool('predict', PREDICT_WORKERS)
+analysis_pool = WorkPool('analysis', ANALYSIS_WORKERS, ANALYSIS_MAX_PENDING)
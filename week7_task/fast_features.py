@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+
+NUMERICAL_FEATURES = ['Recency_Snapshot', 'Frequency', 'Monetary']
+CATEGORICAL_FEATURE = 'Country-Region'
+MISSING_CATEGORY = 'Missing'
+
+
+class CustomerFeaturizer:
+    """
+    train.py가 학습한 ColumnTransformer(중앙값 대체 + 표준화, 'Missing' 대체 + 원-핫)를
+    미리 추출한 파라미터로 재현합니다. 요청마다 DataFrame을 만들지 않고
+    입력 dict에서 바로 모델 입력 행렬(numpy)을 만듭니다.
+    """
+
+    def __init__(self, medians, means, scales, categories):
+        self.medians = np.asarray(medians, dtype=float)
+        self.means = np.asarray(means, dtype=float)
+        self.scales = np.asarray(scales, dtype=float)
+        self.categories = list(categories)
+        # 국가 -> 원-핫 열 위치 (숫자형 3개 열 뒤에 위치)
+        self.category_index = {c: len(NUMERICAL_FEATURES) + i for i, c in enumerate(self.categories)}
+        self.n_features = len(NUMERICAL_FEATURES) + len(self.categories)
+
+    @classmethod
+    def from_preprocessor(cls, preprocessor):
+        """학습된 전처리기에서 파라미터를 추출합니다. 구조가 다르면 ValueError."""
+        transformers = {name: (trans, list(cols)) for name, trans, cols in preprocessor.transformers_}
+        if set(transformers) - {'remainder'} != {'num', 'cat'} or preprocessor.remainder != 'drop':
+            raise ValueError("지원하지 않는 전처리기 구조입니다.")
+        num, num_cols = transformers['num']
+        cat, cat_cols = transformers['cat']
+        if num_cols != NUMERICAL_FEATURES or cat_cols != [CATEGORICAL_FEATURE]:
+            raise ValueError("전처리기 입력 열이 예상과 다릅니다.")
+
+        imputer, scaler = num.named_steps['imputer'], num.named_steps['scaler']
+        if imputer.strategy != 'median' or not (scaler.with_mean and scaler.with_std):
+            raise ValueError("숫자형 파이프라인 설정이 예상과 다릅니다.")
+        cat_imputer, onehot = cat.named_steps['imputer'], cat.named_steps['onehot']
+        if cat_imputer.fill_value != MISSING_CATEGORY or onehot.drop is not None or onehot.handle_unknown != 'ignore':
+            raise ValueError("범주형 파이프라인 설정이 예상과 다릅니다.")
+
+        featurizer = cls(imputer.statistics_, scaler.mean_, scaler.scale_, onehot.categories_[0])
+        featurizer.check_parity(preprocessor)
+        return featurizer
+
+    def check_parity(self, preprocessor):
+        """알려진 모든 국가 + 알 수 없는 국가 + 결측치에 대해 원래 전처리기와 결과를 비교."""
+        import pandas as pd  # 검증할 때만 사용
+        rows = [
+            {'Recency_Snapshot': 10 * i, 'Frequency': i + 1, 'Monetary': 100.5 * i, CATEGORICAL_FEATURE: c}
+            for i, c in enumerate(self.categories + ['__unknown__'])
+        ]
+        rows.append({'Recency_Snapshot': None, 'Frequency': None, 'Monetary': None, CATEGORICAL_FEATURE: None})
+        rows.append({'Recency_Snapshot': np.nan, 'Frequency': np.nan, 'Monetary': np.nan, CATEGORICAL_FEATURE: np.nan})
+        expected = preprocessor.transform(pd.DataFrame(rows, columns=NUMERICAL_FEATURES + [CATEGORICAL_FEATURE]))
+        if hasattr(expected, 'toarray'):
+            expected = expected.toarray()
+        if not np.allclose(expected, self.transform_rows(rows)):
+            raise ValueError("빠른 전처리 결과가 원래 전처리기와 일치하지 않습니다.")
+
+    def transform_rows(self, rows):
+        """입력 dict 리스트('Country-Region' 하이픈 키)를 (n, n_features) 행렬로 변환."""
+        X = np.zeros((len(rows), self.n_features))
+        numeric = np.array([[row[col] for col in NUMERICAL_FEATURES] for row in rows], dtype=float).reshape(len(rows), len(NUMERICAL_FEATURES))
+        numeric = np.where(np.isnan(numeric), self.medians, numeric)
+        X[:, :len(NUMERICAL_FEATURES)] = (numeric - self.means) / self.scales
+        for i, row in enumerate(rows):
+            country = row[CATEGORICAL_FEATURE]
+            # SimpleImputer는 NaN만 'Missing'으로 바꾸고, None은 그대로 하나의 범주 값으로 취급함
+            if isinstance(country, float) and np.isnan(country):
+                country = MISSING_CATEGORY
+            j = self.category_index.get(country)
+            if j is not None:  # handle_unknown='ignore': 모르는 국가는 모두 0
+                X[i, j] = 1.0
+        return X
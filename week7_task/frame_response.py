@@ -0,0 +1,118 @@
+# -*- coding: utf-8 -*-
+import json
+
+import fastapi
+import numpy as np
+import pandas as pd
+
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.instrumentation import stage
+
+try:
+    import orjson
+except ImportError:  # orjson이 없으면 표준 json 모듈로 직렬화합니다 (느리지만 결과는 같음).
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow가 없으면 format=arrow를 사용할 수 없습니다.
+    pa = None
+
+# 분석 응답 형식
+# - records (기본값): 기존과 같은 {"표": [{"열": 값, ...}, ...]} 형식
+# - columns: {"표": {"열": [값, ...], ...}} 형식. 숫자 열은 numpy 배열을 그대로 직렬화하고 열 이름이 행마다 반복되지 않음
+# - arrow: ?table=로 지정한 표 하나를 Arrow IPC 스트림으로 반환 (pyarrow.ipc.open_stream으로 복사 없이 읽기)
+FORMATS = ('records', 'columns', 'arrow')
+ARROW_MEDIA_TYPE = 'application/vnd.apache.arrow.stream'
+
+
+class FormatError(ValueError):
+    """지원하지 않는 응답 형식 또는 표 이름."""
+
+
+def _json_default(obj):
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    raise TypeError(f"JSON으로 변환할 수 없는 타입: {type(obj)}")
+
+
+def _replace_nan(obj):
+    """(표준 json 경로) orjson과 같이 NaN/inf를 null로 바꿉니다."""
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, np.ndarray):
+        return _replace_nan(obj.tolist()) if obj.dtype.kind == 'f' else obj
+    if isinstance(obj, dict):
+        return {k: _replace_nan(v) for k, v in obj.items()}
+    if isinstance(obj, list):
+        return [_replace_nan(v) for v in obj]
+    return obj
+
+
+def dumps(obj):
+    """obj를 JSON bytes로 직렬화. numpy 스칼라/배열은 그대로 처리하고 NaN은 null로 씁니다."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(_replace_nan(obj), default=_json_default, ensure_ascii=False, allow_nan=False).encode('utf-8')
+
+
+def _column_values(series):
+    """숫자/불리언 열은 연속된 numpy 배열로, 나머지(문자열, 범주형 등)는 결측값을 None으로 바꾼 리스트로."""
+    if series.dtype.kind in 'biuf':
+        return np.ascontiguousarray(series.to_numpy())
+    values = series.astype(object)
+    return values.where(values.notna(), None).tolist()
+
+
+def frame_columns(df):
+    return {str(col): _column_values(df[col]) for col in df.columns}
+
+
+def to_records(payload):
+    """DataFrame 값을 to_dict('records')로 바꾼 payload (기존 응답 형식)."""
+    return {k: v.to_dict('records') if isinstance(v, pd.DataFrame) else v for k, v in payload.items()}
+
+
+def to_columns(payload):
+    return {k: frame_columns(v) if isinstance(v, pd.DataFrame) else v for k, v in payload.items()}
+
+
+def to_arrow(value):
+    """표 하나를 Arrow IPC 스트림 bytes로. dict 값(요약 통계 등)은 한 행짜리 표로 변환합니다."""
+    if pa is None:
+        raise FormatError("format=arrow를 사용하려면 pyarrow를 설치하세요.")
+    df = value if isinstance(value, pd.DataFrame) else pd.DataFrame([value])
+    arrow_table = pa.Table.from_pandas(df, preserve_index=False)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, arrow_table.schema) as writer:
+        writer.write_table(arrow_table)
+    return sink.getvalue().to_pybytes()
+
+
+def encode(payload, fmt='records', table=None):
+    """
+    표(DataFrame)가 들어 있는 분석 결과 dict를 요청한 형식의 (본문 bytes, media type)으로 변환합니다.
+    FastAPI의 jsonable_encoder를 거치지 않으므로 행 dict를 다시 순회하며 변환하지 않습니다.
+    """
+    if fmt not in FORMATS:
+        raise FormatError(f"format은 {FORMATS} 중 하나여야 합니다.")
+    if (table is not None or fmt == 'arrow') and table not in payload:
+        raise FormatError(f"table은 {tuple(payload)} 중 하나여야 합니다.")
+    with stage('serialize'):
+        if fmt == 'arrow':
+            return to_arrow(payload[table]), ARROW_MEDIA_TYPE
+        convert = to_records if fmt == 'records' else to_columns
+        if table is not None:
+            return dumps(convert({table: payload[table]})[table]), 'application/json'
+        return dumps(convert(payload)), 'application/json'
+
+
+def frame_response(payload, fmt='records', table=None, headers=None):
+    """encode 결과로 이미 인코딩된 Response를 만듭니다. 형식/표 이름이 잘못되면 400."""
+    try:
+        content, media_type = encode(payload, fmt, table)
+    except FormatError as e:
+        raise fastapi.HTTPException(status_code=400, detail=str(e))
+    return fastapi.Response(content=content, media_type=media_type, headers=headers)
@@ -0,0 +1,144 @@
+# -*- coding: utf-8 -*-
+import email.utils
+import gzip
+import hashlib
+import os
+
+from analysis_cache import db_fingerprint, db_last_modified
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.instrumentation import stage
+
+try:
+    import brotli
+except ImportError:  # brotli가 없으면 gzip만 사용합니다.
+    brotli = None
+
+# 응답 압축 설정: 이 크기(bytes) 이상인 JSON/텍스트 응답만 압축
+COMPRESS_MIN_BYTES = int(os.getenv('COMPRESS_MIN_BYTES', '1024'))
+GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', '6'))
+BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', '5'))
+COMPRESSIBLE_TYPES = (b'application/json', b'text/', b'application/vnd.apache.arrow.stream')
+
+
+# --- 조건부 GET (ETag / Last-Modified) ---
+
+class DataVersion:
+    """
+    분석 응답의 검증자(ETag, Last-Modified). DB 데이터 버전(db_fingerprint)과 요청 경로/파라미터로 만들어지므로
+    DB가 바뀌지 않았으면 같은 요청의 ETag는 항상 같고, 계산하지 않고도 304 여부를 판단할 수 있습니다.
+    압축 여부와 관계없이 같은 데이터를 뜻하므로 약한(W/) ETag를 사용합니다.
+    """
+
+    def __init__(self, db_path, *parts):
+        digest = hashlib.sha1('|'.join(map(str, (db_fingerprint(db_path),) + parts)).encode()).hexdigest()
+        self.etag = f'W/"{digest[:20]}"'
+        self.last_modified = db_last_modified(db_path)
+
+    def headers(self):
+        headers = {"ETag": self.etag, "Cache-Control": "no-cache"}  # 캐시해도 되지만 쓰기 전에 매번 재검증
+        if self.last_modified is not None:
+            headers["Last-Modified"] = email.utils.formatdate(self.last_modified, usegmt=True)
+        return headers
+
+    def matches(self, request_headers):
+        """If-None-Match(우선) 또는 If-Modified-Since 기준으로 클라이언트 사본이 최신이면 True."""
+        if_none_match = request_headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = [t.strip() for t in if_none_match.split(',')]
+            return '*' in tags or any(_weak(t) == _weak(self.etag) for t in tags)
+        if_modified_since = request_headers.get('if-modified-since')
+        if if_modified_since and self.last_modified is not None:
+            try:
+                since = email.utils.parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+            return self.last_modified <= since
+        return False
+
+
+def _weak(tag):
+    return tag[2:] if tag.startswith('W/') else tag
+
+
+# --- 응답 압축 ---
+
+def _accepted_encodings(headers):
+    accepted = set()
+    for key, value in headers:
+        if key == b'accept-encoding':
+            for item in value.decode('latin-1').split(','):
+                name, _, params = item.strip().partition(';')
+                if params.strip().replace(' ', '') not in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+                    accepted.add(name.strip().lower())
+    return accepted
+
+
+def _with_vary(headers):
+    """Vary 헤더에 Accept-Encoding을 추가한 헤더 목록 (이미 있으면 그대로)."""
+    for i, (key, value) in enumerate(headers):
+        if key == b'vary':
+            names = [v.strip().lower() for v in value.split(b',')]
+            if b'accept-encoding' in names or b'*' in names:
+                return headers
+            return headers[:i] + [(key, value + b', Accept-Encoding')] + headers[i + 1:]
+    return headers + [(b'vary', b'Accept-Encoding')]
+
+
+class CompressionMiddleware:
+    """
+    ASGI 미들웨어: 클라이언트가 허용하면 큰 응답을 brotli(설치된 경우) 또는 gzip으로 압축합니다.
+    본문이 한 번에 전송되는 응답(분석/예측 응답)만 압축하고, 스트리밍 응답과 이미 인코딩된 응답은 그대로 보냅니다.
+    같은 URL의 응답이 Accept-Encoding에 따라 달라질 수 있으므로, 압축하지 않은 응답(작은 본문, 304,
+    gzip/br을 보내지 않은 클라이언트)에도 모두 Vary: Accept-Encoding을 붙여 공유 캐시가 압축본을 잘못 돌려주지 않게 합니다.
+    """
+
+    def __init__(self, app, min_bytes=COMPRESS_MIN_BYTES):
+        self.app = app
+        self.min_bytes = min_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+        accepted = _accepted_encodings(scope.get('headers', []))
+        encoding = 'br' if brotli is not None and 'br' in accepted else 'gzip' if 'gzip' in accepted else None
+        if encoding is None:
+            async def send_uncompressed(message):
+                if message['type'] == 'http.response.start':
+                    message = dict(message, headers=_with_vary(list(message.get('headers', []))))
+                await send(message)
+
+            await self.app(scope, receive, send_uncompressed)
+            return
+
+        start_message = None
+
+        async def send_compressed(message):
+            nonlocal start_message
+            if message['type'] == 'http.response.start':
+                start_message = message   # 본문을 보고 압축 여부를 결정할 때까지 보류
+                return
+            if start_message is None:
+                await send(message)
+                return
+            start, start_message = start_message, None
+            headers = _with_vary(list(start.get('headers', [])))
+            body = message.get('body', b'')
+            content_type = next((v for k, v in headers if k == b'content-type'), b'')
+            if (message.get('more_body', False) or len(body) < self.min_bytes
+                    or any(k == b'content-encoding' for k, _ in headers)
+                    or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                await send(dict(start, headers=headers))
+                await send(message)
+                return
+            with stage('compress'):
+                if encoding == 'br':
+                    body = brotli.compress(body, quality=BROTLI_QUALITY)
+                else:
+                    body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+            headers = [(k, v) for k, v in headers if k != b'content-length']
+            headers += [(b'content-encoding', encoding.encode()), (b'content-length', str(len(body)).encode())]
+            await send(dict(start, headers=headers))
+            await send(dict(message, body=body))
+
+        await self.app(scope, receive, send_compressed)
@@ -2,6 +2,14 @@
 import pandas as pd
 import sqlite3
 import os
+import sys
+import time
+import datetime
+import queue
+import multiprocessing as mp
+import hashlib
+import columnar
+import sales_fact
 
 # --- 설정 ---
 # 엑셀 파일이 포함된 디렉토리 경로
@@ -26,15 +34,269 @@ SHEETS_TO_IMPORT = {
     'Sales Order_data': 'SalesOrder',
     'Date_data': 'Date'
 }
+
+# 차원 테이블의 기본 키 (임포트 후 PRIMARY KEY로 선언)
+TABLE_KEYS = {
+    'Resellers': 'ResellerKey',
+    'Customers': 'CustomerKey',
+    'Products': 'ProductKey',
+    'Territories': 'SalesTerritoryKey',
+    'Date': 'DateKey',
+    'SalesOrder': 'SalesOrderLineKey',
+}
+
+# 증분 임포트(--incremental)에서 행을 식별하는 키 (Sales 행은 판매 행 키로 식별)
+ROW_KEYS = dict(TABLE_KEYS, Sales='SalesOrderLineKey')
+
+# Sales 인덱스 (이름 -> (열 목록, UNIQUE 여부))
+# - idx_sales_channel: API/학습의 B2C(ResellerKey = -1 AND CustomerKey != -1) 및 리셀러(ResellerKey != -1)
+#   쿼리가 읽는 열을 모두 포함하는 커버링 인덱스 → 테이블 본문을 읽지 않고 인덱스만 스캔
+# - idx_sales_order_line: 판매 행 키
+SALES_INDEXES = {
+    'idx_sales_channel': (['ResellerKey', 'CustomerKey', 'OrderDateKey', 'SalesTerritoryKey', 'Sales Amount'], False),
+    'idx_sales_order_line': (['SalesOrderLineKey'], True),
+}
+
+# main.py / train.py가 실제로 실행하는 쿼리 (최적화 전후 실행 계획 비교용)
+QUERIES = {
+    'B2C 판매 (RFM, 학습)': "SELECT CustomerKey, OrderDateKey, [Sales Amount] FROM Sales WHERE ResellerKey = -1 AND CustomerKey != -1",
+    '리셀러 판매 (EDA)': "SELECT OrderDateKey, ResellerKey, SalesTerritoryKey, [Sales Amount] FROM Sales WHERE ResellerKey != -1",
+    '리셀러 EDA 집계 (SQL 엔진)': """
+        SELECT r.[Business Type], SUM(s.[Sales Amount]) FROM Sales s
+        JOIN Resellers r ON s.ResellerKey = r.ResellerKey
+        JOIN Territories t ON s.SalesTerritoryKey = t.SalesTerritoryKey
+        JOIN Date d ON s.OrderDateKey = d.DateKey
+        WHERE s.ResellerKey != -1 GROUP BY r.[Business Type]""",
+    '고객 RFM 증분 반영': """
+        SELECT s.CustomerKey, d.Date, s.[Sales Amount] FROM Sales s JOIN Date d ON s.OrderDateKey = d.DateKey
+        WHERE s.rowid > 0 AND s.ResellerKey = -1 AND s.CustomerKey != -1""",
+}
 # --- 설정 끝 ---
 
-def import_excel_to_sqlite():
+def normalize_dates(df):
+    """
+    날짜 열을 ISO 문자열로 저장합니다. 시간이 모두 0시면 'YYYY-MM-DD', 아니면 'YYYY-MM-DD HH:MM:SS'.
+    (pd.to_datetime이 형식 추론 없이 빠르게 파싱하고, SQLite 날짜 함수도 그대로 사용할 수 있음)
+    """
+    for col in df.columns:
+        if pd.api.types.is_datetime64_any_dtype(df[col]):
+            values = df[col]
+            fmt = '%Y-%m-%d' if (values.dropna() == values.dropna().dt.normalize()).all() else '%Y-%m-%d %H:%M:%S'
+            df[col] = values.dt.strftime(fmt)
+    return df
+
+def quote(name):
+    return '"' + name.replace('"', '""') + '"'
+
+def add_primary_key(conn, table, key):
+    """to_sql로 만든 테이블을 같은 열/타입 + PRIMARY KEY(key)로 다시 만듭니다."""
+    columns = conn.execute(f"PRAGMA table_info({quote(table)})").fetchall()  # (cid, name, type, notnull, dflt, pk)
+    if not columns or key not in [c[1] for c in columns] or any(c[5] for c in columns):
+        return False
+    total, distinct = conn.execute(
+        f"SELECT COUNT(*), COUNT(DISTINCT {quote(key)}) FROM {quote(table)}").fetchone()
+    if total != distinct:
+        # 키가 중복되거나 NULL이 있으면 PRIMARY KEY 대신 일반 인덱스만 생성
+        print(f" 경고: '{table}.{key}' 값이 고유하지 않아 일반 인덱스를 만듭니다.")
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {quote('idx_' + table + '_' + key)} ON {quote(table)} ({quote(key)})")
+        return False
+    column_defs = ", ".join(f"{quote(c[1])} {c[2]}".strip() for c in columns)
+    tmp = f"{table}__pk"
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {quote(tmp)}")
+        conn.execute(f"CREATE TABLE {quote(tmp)} ({column_defs}, PRIMARY KEY ({quote(key)}))")
+        conn.execute(f"INSERT INTO {quote(tmp)} SELECT * FROM {quote(table)}")
+        conn.execute(f"DROP TABLE {quote(table)}")
+        conn.execute(f"ALTER TABLE {quote(tmp)} RENAME TO {quote(table)}")
+    return True
+
+def explain_queries(conn):
+    """QUERIES의 실행 계획(EXPLAIN QUERY PLAN)을 출력합니다."""
+    for label, sql in QUERIES.items():
+        try:
+            plan = conn.execute("EXPLAIN QUERY PLAN " + sql).fetchall()
+        except sqlite3.Error as e:
+            print(f"  [{label}] 실행 계획 확인 불가: {e}")
+            continue
+        print(f"  [{label}]")
+        for row in plan:
+            print(f"    {row[-1]}")
+
+def optimize_schema(conn, explain=True):
+    """
+    임포트 후 최적화: 차원 테이블 PRIMARY KEY, Sales 커버링 인덱스, ANALYZE, WAL 저널 모드.
+    explain=True이면 최적화 전후의 쿼리 실행 계획을 출력합니다.
+    """
+    if explain:
+        print("\n--- 최적화 전 실행 계획 ---")
+        explain_queries(conn)
+
+    for table, key in TABLE_KEYS.items():
+        if add_primary_key(conn, table, key):
+            print(f" -> '{table}' 기본 키 설정: {key}")
+
+    sales_columns = {c[1] for c in conn.execute("PRAGMA table_info(Sales)").fetchall()}
+    for index_name, (columns, unique) in SALES_INDEXES.items():
+        if not set(columns) <= sales_columns:
+            continue
+        if unique:
+            total, distinct = conn.execute(
+                f"SELECT COUNT(*), COUNT(DISTINCT {quote(columns[0])}) FROM Sales").fetchone()
+            unique = total == distinct
+        column_list = ", ".join(quote(c) for c in columns)
+        conn.execute(f"CREATE {'UNIQUE ' if unique else ''}INDEX IF NOT EXISTS {index_name} ON Sales ({column_list})")
+        print(f" -> Sales 인덱스 생성: {index_name} ({', '.join(columns)})")
+
+    conn.execute("ANALYZE")
+    conn.commit()
+
+    # WAL 모드: 증분 임포트/SalesFact 갱신 같은 쓰기 중에도 API의 읽기 연결이 막히지 않습니다.
+    # 저널 모드는 DB 파일 헤더에 기록되므로 한 번 설정하면 이후 모든 연결에 적용됩니다.
+    journal_mode = conn.execute("PRAGMA journal_mode = WAL").fetchone()[0]
+    print(f" -> 저널 모드: {journal_mode}")
+
+    if explain:
+        print("\n--- 최적화 후 실행 계획 ---")
+        explain_queries(conn)
+
+# --- 임포트 상태 (증분 임포트용 메타데이터) ---
+# _import_meta: 테이블별 시트 해시, 행 수, 워터마크(마지막 rowid), 세대(generation), 임포트 시각
+#   generation은 행 추가가 아닌 변경(수정/삭제/전체 교체)이 있을 때마다 증가합니다. 전체 임포트(기본/--fast)는
+#   새 DB 파일을 만들 때마다 현재 시각(μs) 기반의 새 세대로 시작하므로, 다시 임포트한 DB의 세대는 이전 DB와 항상 다릅니다.
+#   (rfm_store처럼 rowid 워터마크로 새 행만 읽는 쪽은 세대가 바뀌면 처음부터 다시 계산)
+# _import_row_hashes: 테이블별 행 키 -> 행 내용 해시
+IMPORT_META_SCHEMA = """
+CREATE TABLE IF NOT EXISTS _import_meta (
+    table_name TEXT PRIMARY KEY,
+    sheet_hash TEXT,
+    row_count INTEGER,
+    watermark INTEGER,
+    generation INTEGER NOT NULL DEFAULT 0,
+    imported_at TEXT
+);
+CREATE TABLE IF NOT EXISTS _import_row_hashes (
+    table_name TEXT NOT NULL,
+    row_key NOT NULL,
+    row_hash INTEGER NOT NULL,
+    PRIMARY KEY (table_name, row_key)
+) WITHOUT ROWID;
+"""
+WORKBOOK_META = '__workbook__'  # 통합 문서 파일 전체 해시를 기록하는 _import_meta 행
+
+def file_hash(path):
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def sheet_hashes(df):
+    """(시트 전체 해시, 행별 해시 int64 배열). 열 이름과 값이 같으면 해시도 같습니다."""
+    row_hashes = pd.util.hash_pandas_object(df, index=False).to_numpy().view('int64')
+    h = hashlib.sha1('\x1f'.join(map(str, df.columns)).encode('utf-8'))
+    h.update(row_hashes.tobytes())
+    return h.hexdigest(), row_hashes
+
+def new_generation():
+    """전체 임포트로 만든 DB의 시작 세대. 이전 임포트의 세대(+ 증분 임포트 횟수)보다 항상 큽니다."""
+    return time.time_ns() // 1000
+
+def get_import_meta(conn, table_name):
+    row = conn.execute(
+        "SELECT sheet_hash, row_count, watermark, generation FROM _import_meta WHERE table_name = ?",
+        (table_name,)).fetchone()
+    return dict(zip(('sheet_hash', 'row_count', 'watermark', 'generation'), row)) if row else None
+
+def set_import_meta(conn, table_name, sheet_hash, generation):
+    row_count, watermark = (None, None)
+    if table_name != WORKBOOK_META:
+        row_count, watermark = conn.execute(
+            f"SELECT COUNT(*), COALESCE(MAX(rowid), 0) FROM {quote(table_name)}").fetchone()
+    conn.execute(
+        "INSERT OR REPLACE INTO _import_meta (table_name, sheet_hash, row_count, watermark, generation, imported_at) "
+        "VALUES (?, ?, ?, ?, ?, ?)",
+        (table_name, sheet_hash, row_count, watermark, generation,
+         datetime.datetime.now().isoformat(timespec='seconds')))
+
+def record_import_state(conn, states, workbook_hash=None):
+    """
+    전체 임포트 후 상태 기록. states: 테이블 -> (시트 해시, 행 키 배열 또는 None, 행 해시 배열).
+    시트 해시가 None이면 세대만 기록하고, 증분 임포트는 그 테이블을 이전 상태가 없는 것으로 처리합니다.
+    새 DB 파일의 세대는 new_generation()에서 시작합니다.
+    """
+    generation = new_generation()
+    conn.executescript(IMPORT_META_SCHEMA)
+    with conn:
+        for table_name, (sheet_hash, keys, row_hashes) in states.items():
+            if keys is not None:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO _import_row_hashes (table_name, row_key, row_hash) VALUES (?, ?, ?)",
+                    zip([table_name] * len(keys), keys.tolist(), row_hashes.tolist()))
+            set_import_meta(conn, table_name, sheet_hash, generation)
+        if workbook_hash:
+            set_import_meta(conn, WORKBOOK_META, workbook_hash, generation)
+
+def _checkpoint_wal(db_path):
+    """
+    기존 DB의 WAL 내용을 DB 파일에 반영하고 WAL을 비웁니다 (TRUNCATE 체크포인트).
+    -wal/-shm 파일은 이름으로 공유되므로, 비우지 않고 교체하면 새 DB 파일을 연 연결이 이전 DB의 WAL 프레임을 읽게 됩니다.
+    """
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        busy, _, _ = conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchone()
+    finally:
+        conn.close()
+    if busy:
+        raise sqlite3.OperationalError(f"'{db_path}'의 WAL 체크포인트를 완료하지 못했습니다 (읽기 트랜잭션 진행 중).")
+
+def _replace_db(tmp_path, db_path):
+    """완성된 임시 DB 파일을 디스크에 기록한 뒤 db_path로 원자적으로 교체합니다."""
+    with open(tmp_path, 'rb+') as f:
+        os.fsync(f.fileno())
+    if os.path.exists(db_path + '-wal'):
+        _checkpoint_wal(db_path)
+    os.replace(tmp_path, db_path)
+
+def refresh_columnar_cache(db_path):
+    """DB가 바뀐 뒤 열 기반 캐시(data/columnar/*.feather)를 다시 만듭니다 (columnar.py 참고)."""
+    if not columnar.AVAILABLE:
+        print(" -> 열 기반 캐시를 만들지 않았습니다 (pyarrow 미설치, 분석/학습은 SQLite에서 읽습니다).")
+        return
+    start = time.perf_counter()
+    try:
+        manifest = columnar.write_columnar_cache(
+            db_path, converters={sales_fact.TABLE: sales_fact.apply_dtypes})
+    except Exception as e:
+        print(f" 경고: 열 기반 캐시 생성 실패 (분석/학습은 SQLite에서 읽습니다): {e}")
+        return
+    if manifest is None:
+        print(" 경고: 캐시를 쓰는 도중 DB가 바뀌어 열 기반 캐시를 교체하지 않았습니다 "
+              "(분석/학습은 SQLite에서 읽습니다, 다시 만들기: python import_excel_to_db.py --refresh-fact).")
+    else:
+        print(f" -> 열 기반 캐시 생성: {columnar.cache_dir(db_path)} "
+              f"({', '.join(manifest['tables'])}, {time.perf_counter() - start:.1f}초)")
+
+def build_fact_table(conn):
+    """시트 테이블을 조인한 SalesFact 테이블을 다시 만듭니다 (sales_fact.py 참고)."""
+    try:
+        rows = sales_fact.build_sales_fact(conn)
+        print(f" -> '{sales_fact.TABLE}' 테이블 생성 ({rows}행)")
+    except sqlite3.Error as e:
+        print(f" 경고: '{sales_fact.TABLE}' 테이블 생성 실패 (분석/학습은 테이블 조인으로 계산합니다): {e}")
+
+def _remove_if_exists(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def import_excel_to_sqlite(excel_file_path=None, db_path=DB_PATH):
     """
     하나의 엑셀 파일에서 여러 시트를 읽어 
     하나의 SQLite 데이터베이스 파일에 테이블로 저장합니다.
+    새 DB는 임시 파일에 만든 뒤 기존 파일과 교체하므로, 임포트 중에도 API는 기존 DB를 계속 사용합니다.
     """
     
-    excel_file_path = os.path.join(DATA_DIR, EXCEL_FILENAME)
+    excel_file_path = excel_file_path or os.path.join(DATA_DIR, EXCEL_FILENAME)
+    tmp_path = db_path + '.tmp'
     
     # 1. 엑셀 파일 확인
     if not os.path.exists(excel_file_path):
@@ -42,16 +304,15 @@ def import_excel_to_sqlite():
         print("'AdventureWorks-Sales.xlsx' 파일을 'data' 디렉토리에 다운로드하세요.")
         return
 
-    # 2. 기존 DB 파일이 있으면 삭제 (새로 만들기 위해)
-    if os.path.exists(DB_PATH):
-        os.remove(DB_PATH)
-        print(f"기존 데이터베이스 파일 삭제: {DB_PATH}")
+    # 2. 이전에 실패하고 남은 임시 파일이 있으면 삭제
+    _remove_if_exists(tmp_path)
 
     conn = None
+    states = {}
     try:
-        # 3. 새 DB에 연결 생성
-        conn = sqlite3.connect(DB_PATH)
-        print(f"새 데이터베이스 파일 생성: {DB_PATH}")
+        # 3. 임시 DB 파일에 연결 생성
+        conn = sqlite3.connect(tmp_path)
+        print(f"임시 데이터베이스 파일 생성: {tmp_path}")
 
         # 4. 엑셀 파일 읽기
         print(f"엑셀 파일 읽는 중: {excel_file_path}...")
@@ -66,10 +327,12 @@ def import_excel_to_sqlite():
             
             try:
                 # 시트를 DataFrame으로 읽기
-                df = pd.read_excel(xls, sheet_name=sheet_name)
+                df = normalize_dates(pd.read_excel(xls, sheet_name=sheet_name))
                 
                 # DataFrame을 SQLite 테이블로 저장
                 df.to_sql(table_name, conn, index=False, if_exists='replace')
+                sheet_hash, row_hashes = sheet_hashes(df)
+                states[table_name] = (sheet_hash, _row_keys(df, table_name), row_hashes)
                 
                 print(f" -> '{table_name}' 테이블로 가져오기 성공")
                 
@@ -79,14 +342,430 @@ def import_excel_to_sqlite():
             except Exception as e:
                 print(f" 오류: '{table_name}' 테이블 가져오기 실패: {e}")
 
-        print(f"\n완료! '{DB_PATH}' 파일이 생성되었습니다.")
+        # 6. 조인된 판매 팩트 테이블(SalesFact) 생성 + 기본 키 / 인덱스 / 통계 정보 생성
+        build_fact_table(conn)
+        optimize_schema(conn)
+
+        # 7. 증분 임포트용 상태 기록 (시트/행 해시, 워터마크)
+        record_import_state(conn, states, file_hash(excel_file_path))
+        conn.close()
+        conn = None
+
+        # 8. 기존 DB 파일과 교체
+        _replace_db(tmp_path, db_path)
+        refresh_columnar_cache(db_path)
+        print(f"\n완료! '{db_path}' 파일이 생성되었습니다.")
 
     except Exception as e:
         print(f"전체 오류 발생: {e}")
+        print(" -> 기존 데이터베이스 파일은 변경되지 않았습니다.")
     finally:
         if conn:
             conn.close()
             print("데이터베이스 연결 종료.")
+        _remove_if_exists(tmp_path)
+
+# --- 빠른 임포트 모드 (--fast) ---
+# 시트를 작업 프로세스에서 병렬로 스트리밍 파싱하고(openpyxl read_only), 행 묶음(chunk)을
+# 크기가 제한된 큐로 하나의 기록 프로세스에 보내 executemany로 저장합니다.
+# 큐에는 최대 IMPORT_QUEUE_CHUNKS개 묶음만 쌓이므로 메모리 사용량은 시트 크기가 아니라 묶음 크기에 비례합니다.
+IMPORT_WORKERS = int(os.getenv('IMPORT_WORKERS', str(min(4, os.cpu_count() or 1))))
+IMPORT_CHUNK_ROWS = int(os.getenv('IMPORT_CHUNK_ROWS', '5000'))
+IMPORT_QUEUE_CHUNKS = int(os.getenv('IMPORT_QUEUE_CHUNKS', '8'))
+
+# pandas.read_excel이 기본으로 결측값(NULL)으로 처리하는 문자열 (기본 모드와 결과를 맞추기 위함)
+NA_STRINGS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null',
+])
+
+def _to_sql_value(value):
+    """openpyxl 셀 값을 SQLite 저장용 값으로 변환 (날짜는 normalize_dates와 같은 ISO 문자열)."""
+    if isinstance(value, str):
+        return None if value in NA_STRINGS else value
+    if isinstance(value, datetime.datetime):
+        if value.hour == value.minute == value.second == value.microsecond == 0:
+            return value.strftime('%Y-%m-%d')
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    return value
+
+def _read_sheets_worker(excel_file_path, tasks, out, chunk_rows):
+    """작업 프로세스: tasks에서 (시트, 테이블)을 받아 행 묶음을 out 큐로 보냅니다."""
+    from openpyxl import load_workbook
+    wb = load_workbook(excel_file_path, read_only=True, data_only=True)
+    try:
+        while True:
+            task = tasks.get()
+            if task is None:
+                break
+            sheet_name, table_name = task
+            if sheet_name not in wb.sheetnames:
+                out.put(('missing', table_name, sheet_name))
+                continue
+            try:
+                rows = wb[sheet_name].iter_rows(values_only=True)
+                header = next(rows, None) or ()
+                columns = [str(c) if c is not None else f"Unnamed: {i}" for i, c in enumerate(header)]
+                width = len(columns)
+                out.put(('columns', table_name, columns))
+                chunk = []
+                total = 0
+                for row in rows:
+                    if all(v is None for v in row):
+                        continue  # 빈 행은 pandas.read_excel처럼 건너뜀
+                    values = [_to_sql_value(v) for v in row[:width]]
+                    if len(values) < width:
+                        values.extend([None] * (width - len(values)))
+                    chunk.append(values)
+                    if len(chunk) >= chunk_rows:
+                        out.put(('rows', table_name, chunk))
+                        total += len(chunk)
+                        chunk = []
+                if chunk:
+                    out.put(('rows', table_name, chunk))
+                    total += len(chunk)
+                out.put(('done', table_name, total))
+            except Exception as e:
+                out.put(('error', table_name, str(e)))
+    finally:
+        wb.close()
+
+def _column_types(chunk, width):
+    """첫 행 묶음으로 열 타입(INTEGER / REAL / TEXT)을 정합니다. to_sql의 타입 추론과 같은 기준."""
+    types = []
+    for i in range(width):
+        values = [row[i] for row in chunk if row[i] is not None]
+        if values and all(isinstance(v, int) for v in values):
+            types.append('INTEGER')
+        elif all(isinstance(v, (int, float)) for v in values):
+            types.append('REAL')  # 값이 모두 비어 있는 열도 pandas처럼 REAL
+        else:
+            types.append('TEXT')
+    return types
+
+def import_excel_fast(excel_file_path=None, db_path=DB_PATH, workers=IMPORT_WORKERS,
+                      chunk_rows=IMPORT_CHUNK_ROWS, queue_chunks=IMPORT_QUEUE_CHUNKS):
+    """
+    빠른 임포트: 시트 병렬 파싱 + 행 묶음 스트리밍 + executemany 일괄 저장.
+    임시 DB 파일은 synchronous=OFF, journal_mode=OFF로 만들고(실패하면 파일을 버리면 되므로
+    저널이 필요 없음), 전체를 하나의 트랜잭션으로 기록한 뒤 db_path로 원자적으로 교체합니다.
+    증분 임포트용 시트/행 해시는 저장된 테이블을 한 번씩 다시 읽어 기본 모드와 같은 값으로 기록합니다
+    (이 단계의 메모리 사용량은 가장 큰 테이블 하나 크기).
+    """
+    excel_file_path = excel_file_path or os.path.join(DATA_DIR, EXCEL_FILENAME)
+    tmp_path = db_path + '.tmp'
+
+    if not os.path.exists(excel_file_path):
+        print(f"오류: '{excel_file_path}'에서 엑셀 파일을 찾을 수 없습니다.")
+        print("'AdventureWorks-Sales.xlsx' 파일을 'data' 디렉토리에 다운로드하세요.")
+        return
+    _remove_if_exists(tmp_path)
+
+    start = time.perf_counter()
+    workers = max(1, min(workers, len(SHEETS_TO_IMPORT)))
+    ctx = mp.get_context()
+    tasks = ctx.Queue()
+    out = ctx.Queue(maxsize=queue_chunks)
+    for item in SHEETS_TO_IMPORT.items():
+        tasks.put(item)
+    for _ in range(workers):
+        tasks.put(None)
+    procs = [ctx.Process(target=_read_sheets_worker, args=(excel_file_path, tasks, out, chunk_rows), daemon=True)
+             for _ in range(workers)]
+    for proc in procs:
+        proc.start()
+    print(f"엑셀 파일 읽는 중: {excel_file_path} (작업 프로세스 {workers}개, 묶음 {chunk_rows}행)...")
+
+    conn = None
+    try:
+        conn = sqlite3.connect(tmp_path, isolation_level=None)
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA locking_mode = EXCLUSIVE")
+        conn.execute("PRAGMA temp_store = MEMORY")
+        conn.execute("PRAGMA cache_size = -262144")  # 256MB
+        conn.execute("BEGIN")
+
+        columns = {}     # 테이블 -> 열 이름 목록
+        inserts = {}     # 테이블 -> INSERT 문 (첫 행 묶음을 받아 테이블을 만든 뒤 설정)
+        completed = []   # 모든 행을 저장한 테이블
+        pending = len(SHEETS_TO_IMPORT)
+        while pending:
+            try:
+                kind, table_name, payload = out.get(timeout=1.0)
+            except queue.Empty:
+                if not any(proc.is_alive() for proc in procs):
+                    raise RuntimeError("시트 작업 프로세스가 비정상 종료되었습니다.")
+                continue
+            if kind == 'columns':
+                columns[table_name] = payload
+            elif kind == 'rows':
+                if table_name not in inserts:
+                    names = columns[table_name]
+                    types = _column_types(payload, len(names))
+                    column_defs = ", ".join(f"{quote(n)} {t}" for n, t in zip(names, types))
+                    conn.execute(f"CREATE TABLE {quote(table_name)} ({column_defs})")
+                    inserts[table_name] = (f"INSERT INTO {quote(table_name)} VALUES "
+                                           f"({', '.join('?' * len(names))})")
+                conn.executemany(inserts[table_name], payload)
+            elif kind == 'done':
+                pending -= 1
+                if table_name not in inserts and table_name in columns:
+                    # 행이 없는 시트: 열만 있는 빈 테이블
+                    column_defs = ", ".join(f"{quote(n)} TEXT" for n in columns[table_name])
+                    conn.execute(f"CREATE TABLE {quote(table_name)} ({column_defs})")
+                completed.append(table_name)
+                print(f" -> '{table_name}' 테이블로 가져오기 성공 ({payload}행)")
+            elif kind == 'missing':
+                pending -= 1
+                print(f" 오류: 엑셀 파일에서 '{payload}' 시트를 찾을 수 없습니다.")
+                print(" -> 'SHEETS_TO_IMPORT' 설정을 다시 확인하세요.")
+            elif kind == 'error':
+                pending -= 1
+                print(f" 오류: '{table_name}' 테이블 가져오기 실패: {payload}")
+        conn.execute("COMMIT")
+        print(f"시트 가져오기 완료: {time.perf_counter() - start:.1f}초")
+
+        # 증분 임포트용 시트/행 해시: 저장된 테이블을 다시 읽으면 read_excel + normalize_dates와 같은
+        # DataFrame이 되므로 기본 모드와 같은 해시가 나옴 (기본 키를 다시 만들어 행 순서가 바뀌기 전에 계산)
+        states = {}
+        for table_name in completed:
+            df = pd.read_sql(f"SELECT * FROM {quote(table_name)}", conn)
+            sheet_hash, row_hashes = sheet_hashes(df)
+            states[table_name] = (sheet_hash, _row_keys(df, table_name), row_hashes)
+            del df
+
+        build_fact_table(conn)
+        optimize_schema(conn)
+        record_import_state(conn, states, file_hash(excel_file_path))
+        conn.close()
+        conn = None
+
+        _replace_db(tmp_path, db_path)
+        refresh_columnar_cache(db_path)
+        print(f"\n완료! '{db_path}' 파일이 생성되었습니다. (총 {time.perf_counter() - start:.1f}초)")
+
+    except Exception as e:
+        print(f"전체 오류 발생: {e}")
+        print(" -> 기존 데이터베이스 파일은 변경되지 않았습니다.")
+    finally:
+        if conn:
+            conn.close()
+        for proc in procs:
+            if proc.is_alive():
+                proc.terminate()
+            proc.join()
+        _remove_if_exists(tmp_path)
+
+# --- 증분 임포트 모드 (--incremental) ---
+# 기존 DB를 그대로 둔 채 시트별로 변경된 행만 반영합니다. 시트 해시가 같으면 건너뛰고,
+# 다르면 행 키별 내용 해시를 비교해 추가/수정/삭제된 행만 INSERT / UPSERT / DELETE 합니다.
+# 시트마다 하나의 트랜잭션으로 반영하므로 API는 임포트 중에도 DB를 계속 읽을 수 있습니다.
+
+def _row_keys(df, table_name):
+    """행 키 배열. 키 열이 없거나 비어 있거나 중복되면 None (해당 테이블은 전체 교체)."""
+    key = ROW_KEYS.get(table_name)
+    if key not in df.columns or df[key].isna().any() or not df[key].is_unique:
+        return None
+    return df[key].to_numpy()
+
+def _sql_rows(df):
+    """DataFrame 행을 executemany용 튜플 목록으로 변환 (NaN -> NULL)."""
+    values = df.astype(object)
+    return list(values.where(df.notna(), None).itertuples(index=False, name=None))
+
+def _has_unique_key(conn, table_name, key):
+    """key 열이 PRIMARY KEY이거나 단일 열 UNIQUE 인덱스가 있으면 True (UPSERT 가능)."""
+    for column in conn.execute(f"PRAGMA table_info({quote(table_name)})"):
+        if column[1] == key and column[5]:
+            return True
+    for index in conn.execute(f"PRAGMA index_list({quote(table_name)})"):  # (seq, name, unique, ...)
+        if index[2]:
+            columns = [r[2] for r in conn.execute(f"PRAGMA index_info({quote(index[1])})")]
+            if columns == [key]:
+                return True
+    return False
+
+def _store_row_hashes(conn, table_name, keys, row_hashes):
+    conn.executemany(
+        "INSERT OR REPLACE INTO _import_row_hashes (table_name, row_key, row_hash) VALUES (?, ?, ?)",
+        zip([table_name] * len(keys), keys.tolist(), row_hashes.tolist()))
+
+def _replace_table(conn, table_name, df, sheet_hash, row_hashes, generation):
+    """테이블 내용을 시트 내용으로 통째로 교체합니다. 열 구성이 달라졌으면 테이블을 다시 만듭니다."""
+    table_columns = [c[1] for c in conn.execute(f"PRAGMA table_info({quote(table_name)})")]
+    recreated = table_columns != [str(c) for c in df.columns]
+    if recreated:
+        # 스키마가 바뀜: 테이블을 새로 만들고 기본 키/인덱스는 optimize_schema에서 다시 생성
+        df.to_sql(table_name, conn, index=False, if_exists='replace')
+    keys = _row_keys(df, table_name)
+    with conn:
+        if not recreated:
+            column_list = ", ".join(quote(c) for c in table_columns)
+            conn.execute(f"DELETE FROM {quote(table_name)}")
+            conn.executemany(
+                f"INSERT INTO {quote(table_name)} ({column_list}) VALUES ({', '.join('?' * len(table_columns))})",
+                _sql_rows(df))
+        conn.execute("DELETE FROM _import_row_hashes WHERE table_name = ?", (table_name,))
+        if keys is not None:
+            _store_row_hashes(conn, table_name, keys, row_hashes)
+        set_import_meta(conn, table_name, sheet_hash, generation + 1)
+    return recreated
+
+def _apply_sheet_changes(conn, table_name, df, sheet_hash, row_hashes, meta):
+    """
+    이전 임포트 이후 바뀐 행만 반영하고 (추가, 수정, 삭제 행 수)를 반환합니다.
+    수정/삭제가 있으면 세대(generation)를 올립니다. 새 행은 테이블 끝(rowid 증가)에 추가됩니다.
+    """
+    key = ROW_KEYS[table_name]
+    keys = _row_keys(df, table_name)
+    new = pd.DataFrame({'row_key': keys, 'row_hash': row_hashes, 'pos': range(len(df))})
+    old = pd.read_sql("SELECT row_key, row_hash FROM _import_row_hashes WHERE table_name = ?",
+                      conn, params=(table_name,))
+    both = new.merge(old, on='row_key', how='inner', suffixes=('', '_old'))
+    changed = both[both['row_hash'] != both['row_hash_old']]
+    inserted = new[~new['row_key'].isin(old['row_key'])]
+    deleted = old[~old['row_key'].isin(new['row_key'])]
+
+    columns = [str(c) for c in df.columns]
+    column_list = ", ".join(quote(c) for c in columns)
+    insert_sql = f"INSERT INTO {quote(table_name)} ({column_list}) VALUES ({', '.join('?' * len(columns))})"
+    updates = ", ".join(f"{quote(c)} = excluded.{quote(c)}" for c in columns if c != key)
+    upsert_sql = insert_sql + (f" ON CONFLICT({quote(key)}) DO UPDATE SET {updates}" if updates
+                               else " ON CONFLICT DO NOTHING")
+    with conn:
+        if len(deleted):
+            deleted_keys = deleted['row_key'].tolist()
+            conn.executemany(f"DELETE FROM {quote(table_name)} WHERE {quote(key)} = ?", [(k,) for k in deleted_keys])
+            conn.executemany("DELETE FROM _import_row_hashes WHERE table_name = ? AND row_key = ?",
+                             [(table_name, k) for k in deleted_keys])
+        if len(changed):
+            conn.executemany(upsert_sql, _sql_rows(df.iloc[changed['pos'].to_numpy()]))
+        if len(inserted):
+            conn.executemany(insert_sql, _sql_rows(df.iloc[inserted['pos'].to_numpy()]))
+        touched = pd.concat([changed['pos'], inserted['pos']]).to_numpy()
+        _store_row_hashes(conn, table_name, keys[touched], row_hashes[touched])
+        generation = meta['generation'] + (1 if len(changed) or len(deleted) else 0)
+        set_import_meta(conn, table_name, sheet_hash, generation)
+    return len(inserted), len(changed), len(deleted)
+
+def import_excel_incremental(excel_file_path=None, db_path=DB_PATH):
+    """
+    증분 임포트: 바뀐 시트의 바뀐 행만 기존 DB에 반영합니다.
+    이전 상태가 없는 테이블(임포트 메타데이터가 없는 DB 등)이나 키가 고유하지 않은 테이블은 내용을 통째로 교체합니다.
+    """
+    excel_file_path = excel_file_path or os.path.join(DATA_DIR, EXCEL_FILENAME)
+    if not os.path.exists(excel_file_path):
+        print(f"오류: '{excel_file_path}'에서 엑셀 파일을 찾을 수 없습니다.")
+        print("'AdventureWorks-Sales.xlsx' 파일을 'data' 디렉토리에 다운로드하세요.")
+        return
+    if not os.path.exists(db_path):
+        print(f"기존 데이터베이스가 없어 전체 임포트를 실행합니다: {db_path}")
+        return import_excel_to_sqlite(excel_file_path, db_path)
+
+    start = time.perf_counter()
+    conn = None
+    try:
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.executescript(IMPORT_META_SCHEMA)
+
+        # 통합 문서 파일이 지난 임포트와 같으면 시트를 읽지 않고 종료
+        workbook_hash = file_hash(excel_file_path)
+        workbook_meta = get_import_meta(conn, WORKBOOK_META)
+        if workbook_meta and workbook_meta['sheet_hash'] == workbook_hash:
+            print("엑셀 파일이 지난 임포트 이후 바뀌지 않았습니다.")
+            if not columnar.is_fresh(db_path):
+                refresh_columnar_cache(db_path)
+            return
+
+        print(f"엑셀 파일 읽는 중: {excel_file_path}...")
+        xls = pd.ExcelFile(excel_file_path)
+        total_sheets = len(SHEETS_TO_IMPORT)
+        needs_optimize = False
+        changed_any = False
+        for count, (sheet_name, table_name) in enumerate(SHEETS_TO_IMPORT.items(), start=1):
+            print(f"[{count}/{total_sheets}] 시트 확인 중: '{sheet_name}'...")
+            try:
+                df = normalize_dates(pd.read_excel(xls, sheet_name=sheet_name))
+            except ValueError:
+                print(f" 오류: 엑셀 파일에서 '{sheet_name}' 시트를 찾을 수 없습니다.")
+                continue
+            try:
+                sheet_hash, row_hashes = sheet_hashes(df)
+                meta = get_import_meta(conn, table_name)
+                if meta and meta['sheet_hash'] == sheet_hash:
+                    print(" -> 변경 없음, 건너뜀")
+                    continue
+                changed_any = True
+                key = ROW_KEYS.get(table_name)
+                # 시트 해시가 없는 테이블(이전 버전의 빠른 모드로 만든 DB)은 행 해시도 없으므로 전체 교체
+                incremental = (meta is not None and meta['sheet_hash'] is not None
+                               and _row_keys(df, table_name) is not None
+                               and [c[1] for c in conn.execute(f"PRAGMA table_info({quote(table_name)})")]
+                               == [str(c) for c in df.columns]
+                               and _has_unique_key(conn, table_name, key))
+                if incremental:
+                    inserted, updated, deleted = _apply_sheet_changes(
+                        conn, table_name, df, sheet_hash, row_hashes, meta)
+                    print(f" -> '{table_name}' 추가 {inserted}행, 수정 {updated}행, 삭제 {deleted}행")
+                else:
+                    generation = meta['generation'] if meta else 0
+                    needs_optimize |= _replace_table(conn, table_name, df, sheet_hash, row_hashes, generation)
+                    print(f" -> '{table_name}' 전체 교체 ({len(df)}행)")
+            except Exception as e:
+                print(f" 오류: '{table_name}' 테이블 반영 실패: {e}")
+
+        if changed_any:
+            build_fact_table(conn)
+            if needs_optimize:
+                optimize_schema(conn, explain=False)
+            else:
+                conn.execute("PRAGMA optimize")
+        with conn:
+            set_import_meta(conn, WORKBOOK_META, workbook_hash, (workbook_meta or {}).get('generation', 0) + 1)
+        conn.close()
+        conn = None
+        if changed_any or not columnar.is_fresh(db_path):
+            refresh_columnar_cache(db_path)
+        print(f"\n완료! '{db_path}' 증분 임포트 ({time.perf_counter() - start:.1f}초)")
+
+    except Exception as e:
+        print(f"전체 오류 발생: {e}")
+    finally:
+        if conn:
+            conn.close()
+
+def optimize_existing_db(db_path=DB_PATH):
+    """이미 만들어진 DB에 최적화 단계만 실행합니다."""
+    if not os.path.exists(db_path):
+        print(f"오류: '{db_path}'에서 데이터베이스 파일을 찾을 수 없습니다.")
+        return
+    conn = sqlite3.connect(db_path)
+    try:
+        optimize_schema(conn)
+    finally:
+        conn.close()
+    refresh_columnar_cache(db_path)
 
+# python import_excel_to_db.py             → 엑셀에서 DB 생성 + 최적화
+# python import_excel_to_db.py --fast      → 빠른 임포트 모드 (시트 병렬 파싱 + 일괄 저장)
+# python import_excel_to_db.py --incremental → 바뀐 시트의 바뀐 행만 기존 DB에 반영
+# python import_excel_to_db.py --optimize  → 기존 DB에 최적화 단계만 실행
+# python import_excel_to_db.py --refresh-fact → SalesFact 테이블과 열 기반 캐시만 다시 생성
 if __name__ == "__main__":
-    import_excel_to_sqlite()
\ No newline at end of file
+    if "--optimize" in sys.argv:
+        optimize_existing_db()
+    elif "--fast" in sys.argv:
+        import_excel_fast()
+    elif "--incremental" in sys.argv:
+        import_excel_incremental()
+    elif "--refresh-fact" in sys.argv:
+        if os.path.exists(DB_PATH):
+            print(f" -> '{sales_fact.TABLE}' 테이블 생성 ({sales_fact.refresh_sales_fact(DB_PATH)}행)")
+            refresh_columnar_cache(DB_PATH)
+        else:
+            print(f"오류: '{DB_PATH}'에서 데이터베이스 파일을 찾을 수 없습니다.")
+    else:
+        import_excel_to_sqlite()
\ No newline at end of file
@@ -6,41 +6,101 @@ from pydantic import BaseModel, Field
 import os
 import sqlite3
 import datetime
-import re
 import numpy as np
+from fast_features import CustomerFeaturizer
+from analysis_cache import FingerprintCache
+from columnar import load_table
+from sales_fact import load_sales_fact
+from rfm import compute_rfm, score_rfm
+from rfm_store import RFMStore
+from db import SQLitePool
+from executors import PoolBusyError, analysis_pool, predict_pool
+from model_bundle import BUNDLE_PATH, load_bundle
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.instrumentation import METRICS, PROMETHEUS_CONTENT_TYPE, TimingMiddleware, stage
+from common.micro_batcher import MicroBatcher
+from common.model_registry import ModelRegistry, ModelWatcher, RegistryError
+from frame_response import frame_response
+from http_cache import CompressionMiddleware, DataVersion
+from contextlib import asynccontextmanager, contextmanager
+
+@asynccontextmanager
+async def lifespan(app):
+    """앱 시작 시 모델 레지스트리 감시를 시작하고, 종료 시 감시 스레드, DB 연결 풀과 작업 풀을 정리합니다."""
+    model_watcher.start()
+    yield
+    model_watcher.stop()
+    db_pool.close()
+    predict_pool.shutdown()
+    analysis_pool.shutdown()
 
 # --- FastAPI 앱 초기화 ---
-app = fastapi.FastAPI(title="AdventureWorks API (모델 + 분석)")
+app = fastapi.FastAPI(title="AdventureWorks API (모델 + 분석)", lifespan=lifespan)
+# 큰 응답은 brotli(설치된 경우)/gzip으로 압축 (http_cache.py)
+app.add_middleware(CompressionMiddleware)
+# 요청별 단계 시간(Server-Timing 헤더)과 요청/단계 히스토그램(/metrics) 기록 (common/instrumentation.py)
+# 나중에 추가한 미들웨어가 바깥쪽이므로 압축 시간도 Server-Timing에 포함됩니다.
+app.add_middleware(TimingMiddleware)
 
 # --- 설정 및 모델 로드 ---
 MODEL_PATH = os.path.join('models', 'model.joblib')
 PREPROCESSOR_PATH = os.path.join('models', 'preprocessor.joblib')
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', os.path.join('models', 'registry'))
+MODEL_REGISTRY_POLL_SECONDS = float(os.getenv('MODEL_REGISTRY_POLL_SECONDS', '5'))  # CURRENT 확인 주기(초), 0이면 감시 안 함
 DB_PATH = os.path.join('data', 'AdventureWorks-Sales.sqlite3')
 
-try:
-    model = joblib.load(MODEL_PATH)
-    preprocessor = joblib.load(PREPROCESSOR_PATH)
-    print("고객 구매 예측 모델(v2) 및 전처리기 로드 성공.")
-except FileNotFoundError:
-    print(f"오류: '{MODEL_PATH}' 또는 '{PREPROCESSOR_PATH}'을(를) 찾을 수 없습니다.")
-    print("먼저 'python train.py'를 실행하여 모델을 학습시키세요.")
-    model = None
-    preprocessor = None
-except Exception as e:
-    print(f"모델 로드 중 예기치 않은 오류 발생: {e}")
-    model = None
-    preprocessor = None
+# 모델 파일 형식: 'joblib' (model.joblib + preprocessor.joblib, 기본값) 또는
+# 'bundle' (bundle.joblib 하나를 메모리 매핑으로 로드. 워커가 많을 때 시작 시간과 워커별 메모리 절약)
+MODEL_FORMATS = ('joblib', 'bundle')
+MODEL_FORMAT = os.getenv('MODEL_FORMAT', 'joblib')
+if MODEL_FORMAT not in MODEL_FORMATS:
+    raise ValueError(f"MODEL_FORMAT은 {MODEL_FORMATS} 중 하나여야 합니다: {MODEL_FORMAT}")
+
+# 예측 마이크로 배칭 설정 (기본값: 사용 안 함)
+MICRO_BATCHING = os.getenv('MICRO_BATCHING', '0') == '1'
+MICRO_BATCH_MAX_ROWS = int(os.getenv('MICRO_BATCH_MAX_ROWS', '64'))        # 한 배치의 최대 행 수
+MICRO_BATCH_MAX_WAIT_MS = float(os.getenv('MICRO_BATCH_MAX_WAIT_MS', '5'))  # 첫 요청 후 최대 대기 시간(ms)
+
+# 리셀러 EDA 계산 엔진: 'pandas' (전체 행을 읽어 pandas로 집계) 또는 'sql' (SQLite에서 집계)
+EDA_ENGINES = ('pandas', 'sql')
+EDA_ENGINE = os.getenv('EDA_ENGINE', 'pandas')
 
 # --- DB 연결 헬퍼 함수 ---
-def get_db_connection():
-    """SQLite DB 연결 생성."""
-    if not os.path.exists(DB_PATH):
-        raise fastapi.HTTPException(status_code=500, detail="오류: 'data/AdventureWorks-Sales.sqlite3' 파일을 찾을 수 없습니다.")
+# 읽기 전용 + 읽기 최적화 PRAGMA가 적용된 연결을 재사용하는 풀
+db_pool = SQLitePool(DB_PATH)
+
+@contextmanager
+def pooled_db():
+    """풀에서 SQLite 연결을 빌려주고, 블록이 끝나면 풀에 돌려줍니다."""
     try:
-        conn = sqlite3.connect(DB_PATH)
-        return conn
+        with stage('db_acquire'):
+            conn = db_pool.acquire()
+    except FileNotFoundError:
+        raise fastapi.HTTPException(status_code=500, detail="오류: 'data/AdventureWorks-Sales.sqlite3' 파일을 찾을 수 없습니다.")
     except Exception as e:
         raise fastapi.HTTPException(status_code=500, detail=f"DB 연결 오류: {e}")
+    try:
+        yield conn
+    finally:
+        db_pool.release(conn)
+
+def with_db(fn):
+    """
+    fn(conn)을 풀에서 빌린 연결로 실행합니다. 분석 작업 스레드에서 계산할 때만 호출하므로
+    캐시 적중이나 304 응답은 연결을 빌리지 않고, 의존성 처리용 스레드 풀도 거치지 않습니다.
+    """
+    with pooled_db() as conn:
+        return fn(conn)
+
+# --- 작업 실행 헬퍼 ---
+# pandas/SQLite/모델 호출은 이벤트 루프가 아닌 전용 스레드 풀에서 실행합니다.
+# 예측과 분석은 풀을 분리해, 무거운 분석 요청이 예측 지연 시간에 영향을 주지 않도록 합니다.
+async def run_analysis(fn, *args):
+    """분석 작업 풀에서 실행. 대기열이 가득 차면 503 반환."""
+    try:
+        return await analysis_pool.run(fn, *args)
+    except PoolBusyError as e:
+        raise fastapi.HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
 
 # ===============================================
 # 1. API 예측 (CUSTOMER PURCHASE PREDICTION)
@@ -64,6 +124,78 @@ class CustomerPredictionOut(BaseModel):
     will_purchase_prediction: int
     probability_to_purchase: float
 
+CUSTOMER_FEATURES = ['Recency_Snapshot', 'Frequency', 'Monetary', 'Country-Region']
+
+def predict_customer_rows(rows, bundle=None):
+    """
+    여러 고객 입력(dict 리스트)을 쌓아 transform과 predict_proba를 한 번씩만 실행합니다.
+    각 행에 대해 (예측 클래스, 구매 확률)을 입력 순서대로 반환합니다.
+    bundle이 없으면 현재 서빙 중인 모델 묶음을 한 번 읽어 사용하므로, 처리 도중 모델이 교체되어도
+    한 배치 안에서는 같은 모델/전처리기가 쓰입니다.
+    """
+    if bundle is None:
+        bundle = model_watcher.active.bundle
+    model, featurizer = bundle["model"], bundle["featurizer"]
+    with stage('transform'):
+        if featurizer is not None:
+            processed_input = featurizer.transform_rows(rows)
+        else:
+            input_df = pd.DataFrame(rows, columns=CUSTOMER_FEATURES)
+            processed_input = bundle["preprocessor"].transform(input_df)
+    # 예측 클래스는 predict_proba 결과의 argmax로 계산 (모델을 두 번 호출하지 않음)
+    with stage('predict_proba'):
+        probability = model.predict_proba(processed_input)
+    prediction = model.classes_[probability.argmax(axis=1)]
+    return [(int(p), float(pr)) for p, pr in zip(prediction, probability[:, 1])]
+
+def build_model_bundle(artifacts):
+    """모델과 전처리기로 서빙용 묶음을 만듭니다 (전처리기 파라미터를 미리 추출한 빠른 전처리 경로 포함)."""
+    if MODEL_FORMAT == 'bundle':
+        return load_bundle(artifacts['bundle'])
+    bundle = {"model": artifacts['model'], "preprocessor": artifacts['preprocessor'], "featurizer": None}
+    # 전처리기 파라미터를 미리 추출해 요청마다 DataFrame을 만들지 않도록 함 (실패하면 기존 경로 사용)
+    try:
+        bundle["featurizer"] = CustomerFeaturizer.from_preprocessor(bundle["preprocessor"])
+    except Exception as e:
+        print(f"빠른 전처리 경로를 사용할 수 없어 기본 전처리기를 사용합니다: {e}")
+    return bundle
+
+# 교체 전 예측을 한 번 실행해 첫 요청이 느려지지 않게 하고, 잘못된 모델은 교체하지 않음
+WARMUP_ROW = {'Recency_Snapshot': 30, 'Frequency': 5, 'Monetary': 1500.5, 'Country-Region': 'United States'}
+
+def warm_model_bundle(bundle):
+    predict_customer_rows([WARMUP_ROW], bundle)
+
+# 모델 레지스트리(common/model_registry.py): train.py가 등록한 버전 중 CURRENT를 서빙하고,
+# CURRENT가 바뀌면 백그라운드에서 로드 → 준비 → 교체합니다 (무중단 갱신).
+model_registry = ModelRegistry(MODEL_REGISTRY_DIR)
+model_watcher = ModelWatcher(model_registry, build_model_bundle, warm_model_bundle,
+                             poll_seconds=MODEL_REGISTRY_POLL_SECONDS,
+                             artifacts=('bundle',) if MODEL_FORMAT == 'bundle' else ('model', 'preprocessor'))
+
+try:
+    if model_registry.current_version() is not None:
+        active = model_watcher.activate()
+        print(f"고객 구매 예측 모델(v2) 및 전처리기 로드 성공 (레지스트리 버전 {active.version}).")
+    else:
+        # 레지스트리가 없으면 기존 경로의 파일을 사용
+        if MODEL_FORMAT == 'bundle':
+            model_watcher.set_legacy(build_model_bundle({'bundle': BUNDLE_PATH}))
+        else:
+            model_watcher.set_legacy(build_model_bundle(
+                {'model': joblib.load(MODEL_PATH), 'preprocessor': joblib.load(PREPROCESSOR_PATH)}))
+        print(f"고객 구매 예측 모델(v2) 및 전처리기 로드 성공 (형식: {MODEL_FORMAT}).")
+except FileNotFoundError:
+    paths = BUNDLE_PATH if MODEL_FORMAT == 'bundle' else f"{MODEL_PATH}' 또는 '{PREPROCESSOR_PATH}"
+    print(f"오류: '{paths}'을(를) 찾을 수 없습니다.")
+    print("먼저 'python train.py'를 실행하여 모델을 학습시키세요.")
+except Exception as e:
+    print(f"모델 로드 중 예기치 않은 오류 발생: {e}")
+
+# 마이크로 배칭이 켜져 있으면 동시 요청을 모아서 처리
+batcher = MicroBatcher(predict_customer_rows, MICRO_BATCH_MAX_ROWS, MICRO_BATCH_MAX_WAIT_MS,
+                       executor=predict_pool.executor) if MICRO_BATCHING else None
+
 @app.post("/predict_customer_purchase", 
           summary="고객의 구매 여부 예측 (신규)",
           response_model=CustomerPredictionOut,
@@ -72,25 +204,19 @@ async def predict_customer_purchase(data: CustomerInput):
     """
      고객의 RFM 및 국가를 기반으로 구매 여부를 예측합니다.
     """
-    if model is None or preprocessor is None:
+    if model_watcher.active is None:
         raise fastapi.HTTPException(status_code=500, detail="모델이 학습되지 않았습니다.")
     
     try:
         # data.dict(by_alias=True)를 사용하여
         # {'Country-Region': 'USA'} (하이픈)을 포함한 딕셔너리를 생성합니다.
         input_data_dict = data.dict(by_alias=True)
-        
-        # 이제 이 DataFrame은 train.py가 학습한 것과 동일한
-        # 'Country-Region' (하이픈) 열 이름을 갖게 됩니다.
-        input_df = pd.DataFrame([input_data_dict], columns=['Recency_Snapshot', 'Frequency', 'Monetary', 'Country-Region'])
-        
-        # 이제 전처리기가 올바르게 작동합니다.
-        processed_input = preprocessor.transform(input_df)
-        prediction = model.predict(processed_input)
-        probability = model.predict_proba(processed_input)
-        
-        prediction_int = int(prediction[0])
-        probability_float = float(probability[0][1])
+
+        if batcher is not None:
+            prediction_int, probability_float = await batcher.submit(input_data_dict)
+        else:
+            results = await predict_pool.run(predict_customer_rows, [input_data_dict])
+            prediction_int, probability_float = results[0]
         
         return {
             "will_purchase_prediction": prediction_int,
@@ -100,101 +226,286 @@ async def predict_customer_purchase(data: CustomerInput):
         # DataFrame.columns 관련 오류가 발생하면 여기에서 잡힙니다.
         raise fastapi.HTTPException(status_code=400, detail=f"예측 중 오류 발생: {e}")
 
+@app.get("/predict_customer_purchase/batching/stats",
+         summary="예측 마이크로 배칭 지표",
+         tags=["1. Prediction (Customer)"])
+def get_batching_stats():
+    """큐 깊이와 배치 크기 분포를 반환합니다."""
+    if batcher is None:
+        return {"enabled": False}
+    return {"enabled": True, **batcher.stats()}
+
+@app.get("/admin/model",
+         summary="서빙 중인 모델 버전과 레지스트리 상태",
+         tags=["1. Prediction (Customer)"])
+def get_model_status():
+    """서빙 중인 버전, CURRENT, 롤백 대상, 교체 횟수와 등록된 버전 목록을 반환합니다."""
+    return {**model_watcher.status(),
+            "versions": [{"version": m['version'], "created_at": m.get('created_at'), "metrics": m.get('metrics')}
+                         for m in model_registry.versions()]}
+
+@app.post("/admin/model/reload",
+          summary="레지스트리의 CURRENT 버전 즉시 로드",
+          tags=["1. Prediction (Customer)"])
+def reload_model():
+    """감시 주기를 기다리지 않고 CURRENT 버전을 로드/준비해 교체합니다."""
+    try:
+        active = model_watcher.activate()
+    except RegistryError as e:
+        raise fastapi.HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise fastapi.HTTPException(status_code=500, detail=f"모델 로드 실패 (기존 모델 유지): {e}")
+    return {"active_version": active.version, "loaded_at": active.loaded_at}
+
+@app.post("/admin/model/rollback",
+          summary="이전(또는 지정한) 모델 버전으로 롤백",
+          tags=["1. Prediction (Customer)"])
+def rollback_model(version: str = None):
+    """version이 없으면 직전에 서빙했던 버전으로 되돌리고 CURRENT도 그 버전으로 바꿉니다."""
+    try:
+        active = model_watcher.rollback(version)
+    except RegistryError as e:
+        raise fastapi.HTTPException(status_code=404, detail=str(e))
+    except Exception as e:
+        raise fastapi.HTTPException(status_code=500, detail=f"모델 로드 실패 (기존 모델 유지): {e}")
+    return {"active_version": active.version, "loaded_at": active.loaded_at}
+
 # ===============================================
 # 2. API 분석 (ANALYSIS - EDA)
 # ===============================================
 
-@app.get("/analysis/reseller_eda", 
-         summary="리셀러 EDA 데이터 가져오기",
-         tags=["2. Analysis (EDA)"])
-async def get_reseller_eda_data():
-    """(API) 리셀러 분석 데이터를 JSON으로 계산하고 반환합니다."""
-    conn = get_db_connection()
-    try:
-        df_sales = pd.read_sql("SELECT OrderDateKey, ResellerKey, SalesTerritoryKey, [Sales Amount] FROM Sales WHERE ResellerKey != -1", conn)
-        df_resellers = pd.read_sql("SELECT ResellerKey, [Business Type] FROM Resellers", conn)
-        df_territories = pd.read_sql("SELECT SalesTerritoryKey, Country FROM Territories", conn)
-        df_dates = pd.read_sql("SELECT DateKey, Date FROM Date", conn)
-        conn.close()
-        merged_df = pd.merge(df_sales, df_resellers, on='ResellerKey')
-        merged_df = pd.merge(merged_df, df_territories, on='SalesTerritoryKey')
-        merged_df = pd.merge(merged_df, df_dates, left_on='OrderDateKey', right_on='DateKey')
-        merged_df['Date'] = pd.to_datetime(merged_df['Date'])
+def compute_reseller_eda(conn):
+    """
+    리셀러 분석 데이터(요약 통계, 업종별/국가별 매출, 월별 매출)를 pandas로 계산합니다.
+    표는 DataFrame 그대로 반환하고, 응답 형식(records/columns/arrow)으로의 변환은 frame_response.py가 합니다.
+    """
+    # 임포트 때 미리 조인해 둔 SalesFact(sales_fact.py)에서 필요한 열만 읽음 (요청 시 merge 없음)
+    with stage('read'):
+        df_sales = load_sales_fact(DB_PATH, ['ResellerKey', 'Date', 'Sales Amount', 'Business Type', 'Country'], conn)
+        df_resellers = load_table(DB_PATH, 'Resellers', ['ResellerKey', 'Business Type'], conn)
+    with stage('aggregate'):
+        df_sales = df_sales[df_sales['ResellerKey'] != -1]
+        # SalesFact는 LEFT JOIN 결과: 기존 inner merge와 같은 행만 사용 (업종/국가/날짜가 조인된 행)
+        merged_df = df_sales.dropna(subset=['Business Type', 'Country', 'Date'])
         total_sales = df_sales['Sales Amount'].sum()
         total_orders = len(df_sales)
         unique_resellers = df_resellers['Business Type'].nunique()
-        sales_by_biz = merged_df.groupby('Business Type')['Sales Amount'].sum().reset_index().sort_values(by='Sales Amount', ascending=False)
-        sales_by_country = merged_df.groupby('Country')['Sales Amount'].sum().reset_index()
+        sales_by_biz = merged_df.groupby('Business Type', observed=True)['Sales Amount'].sum().reset_index().sort_values(by='Sales Amount', ascending=False)
+        sales_by_country = merged_df.groupby('Country', observed=True)['Sales Amount'].sum().reset_index()
         df_time = merged_df.set_index('Date').resample('M')['Sales Amount'].sum().reset_index()
         df_time['Date'] = df_time['Date'].astype(str)
-        return {
-            "summary_stats": {"total_sales": total_sales, "total_orders": total_orders, "unique_reseller_types": unique_resellers},
-            "sales_by_biz_type": sales_by_biz.to_dict('records'),
-            "sales_by_country": sales_by_country.to_dict('records'),
-            "sales_over_time": df_time.to_dict('records')
-        }
+    return {
+        "summary_stats": {"total_sales": total_sales, "total_orders": total_orders, "unique_reseller_types": unique_resellers},
+        "sales_by_biz_type": sales_by_biz,
+        "sales_by_country": sales_by_country,
+        "sales_over_time": df_time
+    }
+
+# 리셀러 매출 + 업종 + 국가 + 날짜 조인 (pandas 경로의 inner merge와 동일한 행 집합)
+RESELLER_SALES_JOIN = """
+    FROM Sales s
+    JOIN Resellers r ON s.ResellerKey = r.ResellerKey
+    JOIN Territories t ON s.SalesTerritoryKey = t.SalesTerritoryKey
+    JOIN Date d ON s.OrderDateKey = d.DateKey
+    WHERE s.ResellerKey != -1
+"""
+
+def compute_reseller_eda_sql(conn):
+    """
+    compute_reseller_eda와 같은 결과를 SQLite의 JOIN + GROUP BY로 계산합니다.
+    집계된 몇십 행만 Python으로 가져옵니다. 금액 합계는 합산 순서가 달라 pandas 엔진과 상대 오차 1e-9 이내에서만 같습니다.
+    """
+    with stage('read_sql'):
+        total_sales, total_orders = conn.execute(
+            "SELECT COALESCE(SUM([Sales Amount]), 0.0), COUNT(*) FROM Sales WHERE ResellerKey != -1").fetchone()
+        unique_resellers = conn.execute("SELECT COUNT(DISTINCT [Business Type]) FROM Resellers").fetchone()[0]
+        sales_by_biz = pd.read_sql(
+            "SELECT r.[Business Type] AS [Business Type], SUM(s.[Sales Amount]) AS [Sales Amount]"
+            + RESELLER_SALES_JOIN + " AND r.[Business Type] IS NOT NULL GROUP BY r.[Business Type] ORDER BY 2 DESC", conn)
+        sales_by_country = pd.read_sql(
+            "SELECT t.Country AS Country, SUM(s.[Sales Amount]) AS [Sales Amount]"
+            + RESELLER_SALES_JOIN + " AND t.Country IS NOT NULL GROUP BY t.Country ORDER BY t.Country", conn)
+        df_month = pd.read_sql(
+            "SELECT strftime('%Y-%m', d.Date) AS YearMonth, SUM(s.[Sales Amount]) AS [Sales Amount]"
+            + RESELLER_SALES_JOIN + " AND strftime('%Y-%m', d.Date) IS NOT NULL"
+            + " GROUP BY strftime('%Y-%m', d.Date) ORDER BY 1", conn)
+
+    # resample('M')와 같이 첫 달부터 마지막 달까지 빈 달은 0으로 채우고, 월말 날짜로 표시
+    with stage('aggregate'):
+        if df_month.empty:
+            df_time = pd.DataFrame(columns=['Date', 'Sales Amount'])
+        else:
+            months = pd.PeriodIndex(df_month['YearMonth'], freq='M')
+            all_months = pd.period_range(months.min(), months.max(), freq='M')
+            monthly = pd.Series(df_month['Sales Amount'].values, index=months).reindex(all_months, fill_value=0.0)
+            df_time = pd.DataFrame({
+                'Date': all_months.to_timestamp(how='end').normalize().astype(str),
+                'Sales Amount': monthly.values,
+            })
+    return {
+        "summary_stats": {"total_sales": total_sales, "total_orders": total_orders, "unique_reseller_types": unique_resellers},
+        "sales_by_biz_type": sales_by_biz,
+        "sales_by_country": sales_by_country,
+        "sales_over_time": df_time
+    }
+
+EDA_COMPUTE = {'pandas': compute_reseller_eda, 'sql': compute_reseller_eda_sql}
+
+# DB가 바뀔 때까지 분석 결과를 메모리에 보관
+analysis_cache = FingerprintCache(DB_PATH)
+
+@app.get("/analysis/reseller_eda", 
+         summary="리셀러 EDA 데이터 가져오기",
+         tags=["2. Analysis (EDA)"])
+async def get_reseller_eda_data(request: fastapi.Request, engine: str = None, format: str = 'records',
+                                table: str = None):
+    """
+    (API) 리셀러 분석 데이터를 반환합니다. DB가 바뀌지 않았으면 캐시된 결과를 사용합니다.
+    engine: 'pandas' 또는 'sql' (기본값: EDA_ENGINE 환경 변수)
+    format: 'records' (기본값), 'columns' (열 단위 JSON), 'arrow' (table로 지정한 표 하나를 Arrow IPC 스트림으로)
+    table: 표 하나만 반환 (예: 'sales_over_time')
+    If-None-Match/If-Modified-Since가 현재 DB 데이터 버전과 같으면 계산하지 않고 304를 반환합니다.
+    """
+    engine = engine or EDA_ENGINE
+    if engine not in EDA_ENGINES:
+        raise fastapi.HTTPException(status_code=400, detail=f"engine은 {EDA_ENGINES} 중 하나여야 합니다.")
+    version = DataVersion(DB_PATH, 'reseller_eda', engine, format, table)
+    if version.matches(request.headers):
+        return fastapi.Response(status_code=304, headers=version.headers())
+    result = await load_reseller_eda(engine)
+    return frame_response(result, format, table, headers=version.headers())
+
+async def load_reseller_eda(engine):
+    """캐시된(또는 새로 계산한) 리셀러 분석 결과. DB 연결은 계산할 때만 빌립니다."""
+    key = f'reseller_eda:{engine}'
+    result = analysis_cache.peek(key)
+    if result is not None:
+        return result
+    try:
+        return await run_analysis(analysis_cache.get, key, lambda: with_db(EDA_COMPUTE[engine]))
+    except fastapi.HTTPException:
+        raise
     except Exception as e:
-        if conn: conn.close()
         raise fastapi.HTTPException(status_code=500, detail=f"분석 처리 중 오류: {e}")
 
+@app.post("/analysis/reseller_eda/refresh", 
+          summary="리셀러 EDA 캐시 새로 고침",
+          tags=["2. Analysis (EDA)"])
+async def refresh_reseller_eda_data(engine: str = None):
+    """(API) 캐시를 비우고 리셀러 분석 데이터를 다시 계산합니다."""
+    engine = engine or EDA_ENGINE
+    if engine not in EDA_ENGINES:
+        raise fastapi.HTTPException(status_code=400, detail=f"engine은 {EDA_ENGINES} 중 하나여야 합니다.")
+    for name in EDA_ENGINES:
+        analysis_cache.invalidate(f'reseller_eda:{name}')
+    await load_reseller_eda(engine)
+    return {"refreshed": True, "engine": engine, **analysis_cache.info(f'reseller_eda:{engine}')}
+
 # ===============================================
-# 3. API 세분화 (RFM) - 변경 없음
+# 3. API 세분화 (RFM - 증분 상태 저장소 + 5분위 점수/세그먼트)
 # ===============================================
 
-def get_rfm_segments(rfm_df):
-    """RFM 세그먼트 할당 헬퍼 함수."""
-    segment_map = {
-        r'[4-5][4-5][4-5]': 'Champions (챔피언)',
-        r'[3-5][3-5][1-3]': 'Loyal Customers (충성 고객)',
-        r'[3-4][1-2][3-5]': 'Potential Loyalist (잠재적 충성 고객)',
-        r'5[1-2][1-2]': 'New Customers (신규 고객)',
-        r'[1-2][3-5][3-5]': 'At Risk Customers (이탈 위험 고객)',
-        r'[3-4][1-2][1-2]': 'Need Attention (관심 필요)',
-        r'[1-2][1-2][3-5]': 'Hibernating (휴면 고객)',
-        r'[1-2][1-2][1-2]': 'Lost (이탈 고객)'
+def load_rfm_from_history(conn):
+    """전체 B2C 판매 이력을 읽어 고객별 RFM을 계산 (RFM 상태 저장소를 사용하지 않을 때)."""
+    df_sales = load_sales_fact(DB_PATH, ['ResellerKey', 'CustomerKey', 'Date', 'Sales Amount'], conn)
+    df_customer = df_sales.loc[(df_sales['ResellerKey'] == -1) & (df_sales['CustomerKey'] != -1)
+                               & df_sales['Date'].notna(), ['CustomerKey', 'Date', 'Sales Amount']]
+    snapshot_date = df_customer['Date'].max() + datetime.timedelta(days=1)
+    return compute_rfm(df_customer, snapshot_date)
+
+# 증분 RFM 상태 저장소 (기본값: 사용). RFM_STORE=0 이면 매 요청마다 전체 이력에서 계산
+RFM_STORE_ENABLED = os.getenv('RFM_STORE', '1') == '1'
+RFM_STORE_PATH = os.path.join('data', 'rfm_state.sqlite3')
+rfm_store = RFMStore(DB_PATH, RFM_STORE_PATH)
+
+def load_rfm(conn):
+    """고객별 RFM (CustomerKey, Recency, Frequency, Monetary) 로드."""
+    if RFM_STORE_ENABLED:
+        try:
+            with stage('rfm_ingest'):
+                rfm_store.ingest(verify=False)   # 세대/워터마크만 비교, 새 행이 있을 때만 씀
+            with stage('read_sql'):
+                return rfm_store.load_rfm()
+        except sqlite3.Error as e:
+            print(f"RFM 상태 저장소를 사용할 수 없어 전체 이력에서 계산합니다: {e}")
+    with stage('rfm_history'):
+        return load_rfm_from_history(conn)
+
+def compute_customer_rfm(conn):
+    """RFM 점수/세그먼트를 계산하고 세그먼트 요약과 매출 상위 100명 테이블(DataFrame)을 만듭니다."""
+    with stage('read'):
+        df_customers = load_table(DB_PATH, 'Customers', ['CustomerKey', 'Customer'], conn)
+    rfm_df = score_rfm(load_rfm(conn))
+    with stage('merge'):
+        rfm_df = pd.merge(rfm_df, df_customers, on='CustomerKey', how='left')
+    with stage('aggregate'):
+        rfm_df_top100 = rfm_df.sort_values(by='Monetary', ascending=False).head(100)
+        segment_counts = rfm_df['Segment'].value_counts().reset_index(name='Count')
+        segment_monetary = rfm_df.groupby('Segment')['Monetary'].sum().reset_index()
+    return {
+        "segment_counts": segment_counts,
+        "segment_monetary": segment_monetary,
+        "rfm_table_top100": rfm_df_top100
     }
-    def assign_segment(rfm_score):
-        for regex, segment in segment_map.items():
-            if re.match(regex, rfm_score):
-                return segment
-        return 'Other (기타)'
-    rfm_df['Segment'] = rfm_df['RFM_Score'].apply(assign_segment)
-    return rfm_df
 
 @app.get("/analysis/customer_rfm", 
          summary="고객 RFM 세분화 데이터 가져오기",
          tags=["3. Analysis (RFM)"])
-async def get_customer_rfm_data():
-    """(API) RFM 데이터를 JSON으로 계산하고 반환합니다."""
-    conn = get_db_connection()
+async def get_customer_rfm_data(request: fastapi.Request, format: str = 'records', table: str = None):
+    """
+    (API) RFM 데이터를 계산하고 반환합니다.
+    format/table: /analysis/reseller_eda와 같음 (예: ?format=arrow&table=rfm_table_top100)
+    판매 데이터(DB)가 바뀌지 않았으면 조건부 요청에 304를 반환합니다.
+    """
+    version = DataVersion(DB_PATH, 'customer_rfm', format, table)
+    if version.matches(request.headers):
+        return fastapi.Response(status_code=304, headers=version.headers())
     try:
-        df_sales = pd.read_sql("SELECT CustomerKey, OrderDateKey, [Sales Amount] FROM Sales WHERE ResellerKey = -1 AND CustomerKey != -1", conn)
-        df_dates = pd.read_sql("SELECT DateKey, Date FROM Date", conn)
-        df_customers = pd.read_sql("SELECT CustomerKey, Customer FROM Customers", conn)
-        conn.close()
-        df_customer = pd.merge(df_sales, df_dates, left_on='OrderDateKey', right_on='DateKey')
-        df_customer['Date'] = pd.to_datetime(df_customer['Date'])
-        snapshot_date = df_customer['Date'].max() + datetime.timedelta(days=1)
-        rfm_df = df_customer.groupby('CustomerKey').agg(
-            Recency=('Date', lambda x: (snapshot_date - x.max()).days),
-            Frequency=('Date', 'nunique'),
-            Monetary=('Sales Amount', 'sum')
-        ).reset_index()
-        r_labels = range(5, 0, -1); f_labels = range(1, 6); m_labels = range(1, 6)
-        rfm_df['R_Score'] = pd.qcut(rfm_df['Recency'], 5, labels=r_labels, duplicates='drop').astype(int)
-        rfm_df['F_Score'] = pd.qcut(rfm_df['Frequency'].rank(method='first'), 5, labels=f_labels).astype(int)
-        rfm_df['M_Score'] = pd.qcut(rfm_df['Monetary'].rank(method='first'), 5, labels=m_labels).astype(int)
-        rfm_df['RFM_Score'] = rfm_df['R_Score'].astype(str) + rfm_df['F_Score'].astype(str) + rfm_df['M_Score'].astype(str)
-        rfm_df = get_rfm_segments(rfm_df)
-        rfm_df = pd.merge(rfm_df, df_customers, on='CustomerKey', how='left')
-        rfm_df_top100 = rfm_df.sort_values(by='Monetary', ascending=False).head(100)
-        segment_counts = rfm_df['Segment'].value_counts().reset_index(name='Count')
-        segment_monetary = rfm_df.groupby('Segment')['Monetary'].sum().reset_index()
-        return {
-            "segment_counts": segment_counts.to_dict('records'),
-            "segment_monetary": segment_monetary.to_dict('records'),
-            "rfm_table_top100": rfm_df_top100.to_dict('records')
-        }
+        result = await run_analysis(with_db, compute_customer_rfm)
+    except fastapi.HTTPException:
+        raise
+    except Exception as e:
+        raise fastapi.HTTPException(status_code=500, detail=f"RFM 처리 중 오류: {e}")
+    return frame_response(result, format, table, headers=version.headers())
+
+@app.post("/analysis/customer_rfm/ingest", 
+          summary="새 판매 데이터를 RFM 상태에 반영",
+          tags=["3. Analysis (RFM)"])
+async def ingest_customer_rfm(rebuild: bool = False):
+    """(API) 워터마크 이후 새로 추가된 판매 행만 RFM 상태에 반영합니다. rebuild=true면 처음부터 다시 만듭니다."""
+    if not os.path.exists(DB_PATH):
+        raise fastapi.HTTPException(status_code=500, detail="오류: 'data/AdventureWorks-Sales.sqlite3' 파일을 찾을 수 없습니다.")
+    try:
+        return await run_analysis(rfm_store.ingest, rebuild)
+    except fastapi.HTTPException:
+        raise
     except Exception as e:
-        if conn: conn.close()
-        raise fastapi.HTTPException(status_code=500, detail=f"RFM 처리 중 오류: {e}")
\ No newline at end of file
+        raise fastapi.HTTPException(status_code=500, detail=f"RFM 상태 갱신 중 오류: {e}")
+
+# ===============================================
+# 4. 모니터링 (METRICS)
+# ===============================================
+
+# 요청/단계 히스토그램 외에 /metrics 요청 때 읽는 현재 상태 지표
+POOLS = (predict_pool, analysis_pool)
+METRICS.gauge('work_pool_pending', '작업 풀에서 실행 중 + 대기 중인 작업 수',
+              lambda: [({'pool': p.name}, p.stats()['pending']) for p in POOLS])
+METRICS.counter('work_pool_rejected_total', '대기열이 가득 차서 거절된 작업 수',
+                lambda: [({'pool': p.name}, p.rejected_total) for p in POOLS])
+METRICS.gauge('micro_batch_queue_depth', '배치에 아직 들어가지 않은 예측 요청 수',
+              lambda: batcher.queue_depth if batcher is not None else None)
+METRICS.counter('micro_batch_batches_total', '실행된 예측 배치 수',
+                lambda: batcher.batches_total if batcher is not None else None)
+METRICS.counter('micro_batch_rows_total', '배치로 처리된 예측 행 수',
+                lambda: batcher.rows_total if batcher is not None else None)
+METRICS.counter('model_swaps_total', '무중단 모델 교체 횟수', lambda: model_watcher.swap_count)
+METRICS.gauge('model_info', '서빙 중인 모델 버전 (값은 항상 1)',
+              lambda: [({'version': model_watcher.active.version}, 1)] if model_watcher.active is not None else [])
+
+@app.get("/metrics",
+         summary="Prometheus 지표",
+         response_class=fastapi.responses.PlainTextResponse,
+         tags=["4. Monitoring"])
+def get_metrics():
+    """요청 처리 시간과 단계별 시간 히스토그램, 작업 풀/배칭/모델 상태를 Prometheus 텍스트 형식으로 반환합니다."""
+    return fastapi.responses.PlainTextResponse(METRICS.render(), media_type=PROMETHEUS_CONTENT_TYPE)
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+import os
+
+import joblib
+import numpy as np
+
+from fast_features import CustomerFeaturizer
+
+# 서빙용 단일 파일 번들 (train.py가 model.joblib/preprocessor.joblib과 함께 저장)
+BUNDLE_PATH = os.path.join('models', 'bundle.joblib')
+BUNDLE_FORMAT = 1
+
+
+def export_bundle(model, preprocessor, path=BUNDLE_PATH):
+    """
+    학습된 XGBClassifier와 전처리기를 서빙용 단일 파일로 저장합니다.
+
+    - 전처리기: CustomerFeaturizer 파라미터(중앙값/평균/표준편차 배열, 국가 목록)만 저장
+    - 모델: XGBoost 네이티브 UBJ 형식 바이트를 uint8 배열로 저장
+    번들의 이점은 로드 시 sklearn 객체를 unpickle하지 않고 pandas 경로를 거치지 않는 것뿐이며,
+    워커 간에 모델 메모리를 공유하지는 않습니다 (load_bundle 참고).
+    """
+    featurizer = CustomerFeaturizer.from_preprocessor(preprocessor)
+    booster = model.get_booster()
+    payload = {
+        "format": BUNDLE_FORMAT,
+        "medians": np.ascontiguousarray(featurizer.medians),
+        "means": np.ascontiguousarray(featurizer.means),
+        "scales": np.ascontiguousarray(featurizer.scales),
+        "categories": list(featurizer.categories),
+        "classes": np.asarray(model.classes_),
+        "booster": np.frombuffer(bytes(booster.save_raw(raw_format='ubj')), dtype=np.uint8),
+    }
+    # 실행 중인 워커가 기존 파일을 메모리 매핑하고 있을 수 있으므로 덮어쓰지 않고 새 파일로 교체
+    tmp_path = path + '.tmp'
+    joblib.dump(payload, tmp_path)
+    os.replace(tmp_path, path)
+
+    # 저장한 번들이 원래 모델/전처리기와 같은 확률을 내는지 확인
+    bundle_model = load_bundle(path)["model"]
+    rows = [{'Recency_Snapshot': 10 * i, 'Frequency': i + 1, 'Monetary': 100.5 * i, 'Country-Region': c}
+            for i, c in enumerate(featurizer.categories + ['__unknown__'])]
+    X = featurizer.transform_rows(rows)
+    if not np.allclose(bundle_model.predict_proba(X), model.predict_proba(X), atol=1e-6):
+        raise ValueError("번들 모델의 예측 확률이 원래 모델과 다릅니다.")
+    return path
+
+
+class BundleModel:
+    """
+    XGBoost Booster를 XGBClassifier처럼(predict_proba, classes_) 사용하는 얇은 래퍼.
+    inplace_predict로 DMatrix를 만들지 않고 numpy 행렬을 바로 예측합니다 (이진 분류 전용).
+    """
+
+    def __init__(self, booster, classes):
+        self.booster = booster
+        self.classes_ = np.asarray(classes)
+
+    def predict_proba(self, X):
+        positive = self.booster.inplace_predict(np.asarray(X, dtype=np.float32))
+        return np.column_stack([1.0 - positive, positive])
+
+
+def load_bundle(path=BUNDLE_PATH, mmap_mode='r'):
+    """
+    export_bundle로 저장한 번들을 로드해 main.py의 서빙 묶음 형식
+    {"model", "preprocessor", "featurizer"}으로 반환합니다 (preprocessor는 None).
+
+    제한: 부스터는 공유 메모리에서 실행되지 않습니다. XGBoost는 UBJ 바이트를 자체 트리 구조로 역직렬화해
+    워커의 힙에 만들고, Booster.load_model은 파일 경로나 쓰기 가능한 bytearray만 받으므로 메모리 매핑된
+    바이트도 로드하는 동안 한 번 복사됩니다 (로드 후 해제). 따라서 워커마다 모델 크기 정도의 사본을 가집니다.
+    mmap_mode='r'로 메모리 매핑되는 것은 전처리 파라미터 배열(수십 바이트)뿐이라 공유 효과는 없습니다.
+    """
+    import xgboost as xgb
+
+    payload = joblib.load(path, mmap_mode=mmap_mode)
+    if payload.get("format") != BUNDLE_FORMAT:
+        raise ValueError(f"지원하지 않는 번들 형식입니다: {payload.get('format')}")
+    featurizer = CustomerFeaturizer(payload["medians"], payload["means"], payload["scales"], payload["categories"])
+    booster = xgb.Booster()
+    booster.load_model(bytearray(payload["booster"]))
+    booster.set_param({'nthread': 1})  # 요청 1건 단위 예측: 워커마다 스레드 풀을 만들지 않음
+    return {"model": BundleModel(booster, payload["classes"]), "preprocessor": None, "featurizer": featurizer}
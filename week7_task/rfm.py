@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+import re
+
+import numpy as np
+import pandas as pd
+
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.instrumentation import stage
+
+# RFM 점수 문자열(예: '545') -> 세그먼트. 위에서부터 처음 일치하는 패턴이 우선합니다.
+# 세그먼트 규칙의 기준(source of truth)이며, 아래 조회 테이블은 이 정의로부터 만들어집니다.
+SEGMENT_MAP = {
+    r'[4-5][4-5][4-5]': 'Champions (챔피언)',
+    r'[3-5][3-5][1-3]': 'Loyal Customers (충성 고객)',
+    r'[3-4][1-2][3-5]': 'Potential Loyalist (잠재적 충성 고객)',
+    r'5[1-2][1-2]': 'New Customers (신규 고객)',
+    r'[1-2][3-5][3-5]': 'At Risk Customers (이탈 위험 고객)',
+    r'[3-4][1-2][1-2]': 'Need Attention (관심 필요)',
+    r'[1-2][1-2][3-5]': 'Hibernating (휴면 고객)',
+    r'[1-2][1-2][1-2]': 'Lost (이탈 고객)'
+}
+OTHER_SEGMENT = 'Other (기타)'
+
+
+def compute_rfm(df_sales, snapshot_date, recency_col='Recency'):
+    """
+    고객별 R(최근 구매 후 경과 일수), F(구매 날짜 수), M(총 구매액)을 계산합니다.
+    API(main.py)와 학습(train.py)이 같은 함수를 사용해 서빙/학습 피처가 항상 동일하게 계산됩니다.
+
+    df_sales: 'CustomerKey', 'Date'(datetime), 'Sales Amount' 열을 가진 판매 데이터
+    snapshot_date: 경과 일수를 계산할 기준 시점
+    recency_col: R 열 이름 (API는 'Recency', 학습은 'Recency_Snapshot')
+    """
+    # groupby 집계는 Cython 기반 기본 함수(max, nunique, sum)만 사용하고,
+    # 날짜 차이는 집계 후 한 번에 벡터 연산으로 계산합니다.
+    rfm_df = df_sales.groupby('CustomerKey').agg(
+        LastDate=('Date', 'max'),
+        Frequency=('Date', 'nunique'),
+        Monetary=('Sales Amount', 'sum')
+    ).reset_index()
+    rfm_df.insert(1, recency_col, (snapshot_date - rfm_df.pop('LastDate')).dt.days)
+    return rfm_df
+
+
+def quintile_scores(values, reverse=False):
+    """
+    5분위 점수(1~5, reverse=True면 5~1). 값이 같아 분위 경계가 겹치면 경계를 합쳐(duplicates='drop') 분위 수가 줄고,
+    남은 분위는 가장 높은(reverse면 가장 낮은) 점수부터 비웁니다. 모든 값이 같으면 첫 분위로 봅니다.
+    """
+    codes = pd.qcut(values, 5, labels=False, duplicates='drop').fillna(0).astype(int)
+    return 5 - codes if reverse else codes + 1
+
+
+def score_rfm(rfm_df):
+    """R/F/M 5분위 점수, RFM_Score 문자열, 세그먼트를 계산해 rfm_df에 추가합니다."""
+    with stage('rfm_qcut'):
+        rfm_df['R_Score'] = quintile_scores(rfm_df['Recency'], reverse=True)
+        rfm_df['F_Score'] = quintile_scores(rfm_df['Frequency'].rank(method='first'))
+        rfm_df['M_Score'] = quintile_scores(rfm_df['Monetary'].rank(method='first'))
+    with stage('rfm_segment'):
+        rfm_df['RFM_Score'] = (rfm_df['R_Score'] * 100 + rfm_df['F_Score'] * 10 + rfm_df['M_Score']).astype(str)
+        rfm_df['Segment'] = assign_segments(rfm_df['R_Score'], rfm_df['F_Score'], rfm_df['M_Score'])
+    return rfm_df
+
+
+def match_segment(rfm_score, segment_map=SEGMENT_MAP):
+    """RFM 점수 문자열 하나에 정규식을 차례로 적용해 세그먼트를 찾습니다."""
+    for regex, segment in segment_map.items():
+        if re.match(regex, rfm_score):
+            return segment
+    return OTHER_SEGMENT
+
+
+def build_segment_lookup(segment_map=SEGMENT_MAP):
+    """
+    가능한 모든 (R, F, M) 점수 조합 125개에 대해 정규식 규칙을 한 번씩 평가해
+    세그먼트 이름 배열과 (R-1)*25 + (F-1)*5 + (M-1) 위치의 세그먼트 번호 테이블을 만듭니다.
+    """
+    labels = list(dict.fromkeys(segment_map.values())) + [OTHER_SEGMENT]
+    codes = np.empty(125, dtype=np.int8)
+    for r in range(1, 6):
+        for f in range(1, 6):
+            for m in range(1, 6):
+                segment = match_segment(f"{r}{f}{m}", segment_map)
+                codes[(r - 1) * 25 + (f - 1) * 5 + (m - 1)] = labels.index(segment)
+    return np.array(labels, dtype=object), codes
+
+
+SEGMENT_LABELS, SEGMENT_CODES = build_segment_lookup()
+OTHER_CODE = len(SEGMENT_LABELS) - 1
+
+
+def assign_segments(r_scores, f_scores, m_scores):
+    """R/F/M 점수 배열(1~5 정수)을 조회 테이블로 한 번에 세그먼트 이름 배열로 변환합니다."""
+    r = np.asarray(r_scores, dtype=np.int64)
+    f = np.asarray(f_scores, dtype=np.int64)
+    m = np.asarray(m_scores, dtype=np.int64)
+    valid = (r >= 1) & (r <= 5) & (f >= 1) & (f <= 5) & (m >= 1) & (m <= 5)
+    index = np.where(valid, (r - 1) * 25 + (f - 1) * 5 + (m - 1), 0)
+    codes = np.where(valid, SEGMENT_CODES[index], OTHER_CODE)
+    return SEGMENT_LABELS[codes]
@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+import datetime
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import pandas as pd
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rfm_state (
+    CustomerKey INTEGER PRIMARY KEY,
+    LastDate TEXT,                    -- 마지막 구매 날짜
+    Frequency INTEGER NOT NULL,       -- 서로 다른 구매 날짜 수
+    Monetary REAL NOT NULL            -- 총 구매액
+);
+CREATE TABLE IF NOT EXISTS rfm_purchase_dates (
+    CustomerKey INTEGER NOT NULL,
+    Date TEXT NOT NULL,
+    PRIMARY KEY (CustomerKey, Date)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS rfm_meta (
+    key TEXT PRIMARY KEY,
+    value
+);
+"""
+
+# 워터마크 이후 새로 추가된 B2C 판매 행만 가져오기
+# +s.ResellerKey: ResellerKey로 시작하는 인덱스(idx_sales_channel)를 쓰지 않게 해서 항상 rowid 범위로만 읽음
+#   (인덱스를 쓰면 ANALYZE 후 실행 계획이 B2C 판매 이력 전체를 스캔하는 쪽으로 바뀜)
+NEW_SALES_SELECT = """
+SELECT s.CustomerKey AS CustomerKey, d.Date AS Date, s.[Sales Amount] AS Amount
+FROM src.Sales s
+JOIN src.Date d ON s.OrderDateKey = d.DateKey
+WHERE s.rowid > ? AND s.rowid <= ? AND +s.ResellerKey = -1 AND s.CustomerKey != -1
+"""
+NEW_SALES_SQL = "CREATE TEMP TABLE new_sales AS" + NEW_SALES_SELECT
+
+# 기존 행 변경 확인용 체크섬 (임포트 메타데이터가 없는 DB): rowid 범위의 B2C 판매 행 수와 고객 키/주문 날짜 키/
+# 금액(소수 4자리까지 정수로) 합계. 모두 정수 합이므로 새 rowid 범위의 값을 더해 가도 전체를 다시 계산한 값과 정확히 같습니다.
+CHECKSUM_SQL = """
+SELECT COUNT(*), COALESCE(SUM(CAST(CustomerKey AS INTEGER)), 0), COALESCE(SUM(CAST(OrderDateKey AS INTEGER)), 0),
+       COALESCE(SUM(CAST(ROUND([Sales Amount] * 10000) AS INTEGER)), 0)
+FROM src.Sales WHERE rowid > ? AND rowid <= ? AND +ResellerKey = -1 AND CustomerKey != -1
+"""
+
+APPLY_SQL = [
+    "INSERT OR IGNORE INTO rfm_purchase_dates (CustomerKey, Date) SELECT DISTINCT CustomerKey, Date FROM temp.new_sales",
+    # WHERE true: INSERT ... SELECT 와 ON CONFLICT 구문 모호성 방지 (SQLite 문서 권장)
+    """INSERT INTO rfm_state (CustomerKey, LastDate, Frequency, Monetary)
+       SELECT CustomerKey, MAX(Date), 0, COALESCE(SUM(Amount), 0.0) FROM temp.new_sales WHERE true GROUP BY CustomerKey
+       ON CONFLICT(CustomerKey) DO UPDATE SET
+           LastDate = CASE WHEN rfm_state.LastDate IS NULL OR excluded.LastDate > rfm_state.LastDate
+                           THEN excluded.LastDate ELSE rfm_state.LastDate END,
+           Monetary = rfm_state.Monetary + excluded.Monetary""",
+    """UPDATE rfm_state SET Frequency = (
+           SELECT COUNT(*) FROM rfm_purchase_dates p WHERE p.CustomerKey = rfm_state.CustomerKey)
+       WHERE CustomerKey IN (SELECT DISTINCT CustomerKey FROM temp.new_sales)""",
+]
+
+
+class RFMStore:
+    """
+    고객별 RFM 상태(마지막 구매일, 구매 날짜 집합/개수, 총 구매액)를 별도 SQLite 파일에 유지합니다.
+
+    ingest()는 Sales 테이블의 rowid 워터마크 이후 행만 반영하므로, 매번 전체 판매 이력을
+    다시 읽지 않습니다. 원본 Sales가 다시 만들어진 경우(워터마크보다 rowid가 작아졌거나,
+    워터마크 위치의 행 내용이 달라진 경우)나 다시 임포트되었거나 증분 임포트로 기존 행이 수정/삭제된 경우
+    (_import_meta의 Sales 세대가 바뀐 경우)에는 상태를 처음부터 다시 만듭니다. 이 확인은 모두 인덱스 조회라 가볍습니다.
+    임포트 메타데이터가 없는 DB는 세대를 알 수 없으므로, 명시적으로 실행한 ingest(verify=True)에서만
+    워터마크까지의 B2C 판매 행 체크섬(전체 스캔)을 비교합니다. 분석 요청은 verify=False로 호출합니다.
+    """
+
+    def __init__(self, db_path, store_path):
+        self.db_path = db_path
+        self.store_path = store_path
+        self._lock = threading.Lock()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.store_path, timeout=30)
+        conn.executescript(SCHEMA)
+        conn.execute("ATTACH DATABASE ? AS src", (f"file:{os.path.abspath(self.db_path)}?mode=ro",))
+        return conn
+
+    @staticmethod
+    def _get_meta(conn, key, default=None):
+        row = conn.execute("SELECT value FROM rfm_meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    @staticmethod
+    def _set_meta(conn, key, value):
+        conn.execute("INSERT OR REPLACE INTO rfm_meta (key, value) VALUES (?, ?)", (key, value))
+
+    @staticmethod
+    def _row_signature(conn, rowid):
+        """워터마크 위치 Sales 행(+ 주문 날짜)의 내용 해시 (원본이 다시 만들어졌는지 확인용)."""
+        row = conn.execute(
+            "SELECT s.*, d.Date FROM src.Sales s LEFT JOIN src.Date d ON s.OrderDateKey = d.DateKey WHERE s.rowid = ?",
+            (rowid,)).fetchone()
+        return hashlib.sha1(repr(row).encode('utf-8')).hexdigest()
+
+    @staticmethod
+    def _source_generation(conn):
+        """임포트 메타데이터의 Sales 세대 (메타데이터가 없는 DB면 None)."""
+        try:
+            row = conn.execute("SELECT generation FROM src._import_meta WHERE table_name = 'Sales'").fetchone()
+        except sqlite3.OperationalError:
+            return None
+        return row[0] if row else None
+
+    @staticmethod
+    def _sales_checksum(conn, lo, hi):
+        """rowid (lo, hi] 범위의 B2C 판매 행 체크섬 (CHECKSUM_SQL, 정수 4개)."""
+        return conn.execute(CHECKSUM_SQL, (lo, hi)).fetchone()
+
+    @classmethod
+    def _stored_checksum(cls, conn):
+        value = cls._get_meta(conn, 'sales_checksum')
+        try:
+            return tuple(int(v) for v in value.split(','))
+        except (AttributeError, ValueError):
+            return None   # 체크섬을 기록하지 않았거나(세대가 있는 DB) 이전 형식
+
+    def ingest(self, rebuild=False, verify=True):
+        """
+        워터마크 이후의 새 판매 행을 상태에 반영하고 처리 결과를 반환합니다.
+        verify=False(분석 요청)면 세대/최대 rowid/워터마크 행만 비교하고, 바뀐 것이 없으면 아무것도 쓰지 않습니다.
+        """
+        if not os.path.exists(self.db_path):
+            raise FileNotFoundError(self.db_path)
+        with self._lock:
+            conn = self._connect()
+            try:
+                start = time.perf_counter()
+                watermark = int(self._get_meta(conn, 'sales_rowid', 0))
+                max_rowid = conn.execute("SELECT COALESCE(MAX(rowid), 0) FROM src.Sales").fetchone()[0]
+                generation = self._source_generation(conn)
+                checksum = self._stored_checksum(conn)
+                if watermark and not rebuild:
+                    rebuild = (max_rowid < watermark
+                               or self._get_meta(conn, 'sales_generation') != generation
+                               or self._get_meta(conn, 'sales_signature') != self._row_signature(conn, watermark)
+                               or (generation is None and verify
+                                   and checksum != self._sales_checksum(conn, 0, watermark)))
+                if rebuild:
+                    with conn:
+                        conn.execute("DELETE FROM rfm_state")
+                        conn.execute("DELETE FROM rfm_purchase_dates")
+                    watermark = 0
+                if max_rowid == watermark:
+                    return {"rebuilt": rebuild, "new_rows": 0, "watermark": watermark}
+
+                with conn:
+                    conn.execute(NEW_SALES_SQL, (watermark, max_rowid))
+                    new_rows = conn.execute("SELECT COUNT(*) FROM temp.new_sales").fetchone()[0]
+                    for sql in APPLY_SQL:
+                        conn.execute(sql)
+                    conn.execute("DROP TABLE temp.new_sales")
+                    if generation is None:
+                        # 저장된 체크섬에 새 rowid 범위의 값만 더함 (처음 만들 때만 전체 범위)
+                        base, lo = (checksum, watermark) if watermark and checksum is not None else ((0, 0, 0, 0), 0)
+                        added = self._sales_checksum(conn, lo, max_rowid)
+                        checksum = ','.join(str(a + b) for a, b in zip(base, added))
+                    else:
+                        checksum = None
+                    self._set_meta(conn, 'sales_rowid', max_rowid)
+                    self._set_meta(conn, 'sales_signature', self._row_signature(conn, max_rowid))
+                    self._set_meta(conn, 'sales_generation', generation)
+                    self._set_meta(conn, 'sales_checksum', checksum)
+                    self._set_meta(conn, 'ingested_at', datetime.datetime.now().isoformat(timespec='seconds'))
+                return {
+                    "rebuilt": rebuild,
+                    "new_rows": new_rows,
+                    "watermark": max_rowid,
+                    "elapsed_ms": (time.perf_counter() - start) * 1000.0,
+                }
+            finally:
+                conn.close()
+
+    def load_rfm(self, recency_col='Recency'):
+        """
+        저장된 상태로 rfm.compute_rfm과 같은 형식(CustomerKey, Recency, Frequency, Monetary)의
+        DataFrame을 만듭니다. 기준일은 전체 고객의 마지막 구매일 + 1일입니다.
+        """
+        conn = sqlite3.connect(self.store_path, timeout=30)
+        try:
+            conn.executescript(SCHEMA)
+            rfm_df = pd.read_sql(
+                "SELECT CustomerKey, LastDate, Frequency, Monetary FROM rfm_state ORDER BY CustomerKey", conn)
+        finally:
+            conn.close()
+        last_date = pd.to_datetime(rfm_df.pop('LastDate'))
+        snapshot_date = last_date.max() + datetime.timedelta(days=1)
+        rfm_df.insert(1, recency_col, (snapshot_date - last_date).dt.days)
+        return rfm_df
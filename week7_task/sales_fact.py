@@ -0,0 +1,86 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+
+import pandas as pd
+
+from columnar import load_table
+
+TABLE = 'SalesFact'
+
+# 판매 행 + 날짜 + 리셀러 업종 + 판매 지역 국가 + 고객 국가를 한 번에 조인한 비정규화 테이블.
+# LEFT JOIN이므로 Sales의 모든 행이 그대로 남고, 차원 테이블에 없는 키는 해당 열이 NULL이 됩니다.
+SALES_FACT_SELECT = """
+SELECT s.SalesOrderLineKey AS SalesOrderLineKey,
+       s.OrderDateKey AS OrderDateKey,
+       s.ResellerKey AS ResellerKey,
+       s.CustomerKey AS CustomerKey,
+       s.SalesTerritoryKey AS SalesTerritoryKey,
+       d.Date AS Date,
+       s.[Sales Amount] AS [Sales Amount],
+       r.[Business Type] AS [Business Type],
+       t.Country AS Country,
+       c.[Country-Region] AS [Country-Region]
+FROM Sales s
+LEFT JOIN Date d ON s.OrderDateKey = d.DateKey
+LEFT JOIN Resellers r ON s.ResellerKey = r.ResellerKey
+LEFT JOIN Territories t ON s.SalesTerritoryKey = t.SalesTerritoryKey
+LEFT JOIN Customers c ON s.CustomerKey = c.CustomerKey
+ORDER BY s.rowid
+"""
+
+# 문자열 차원 열 (category dtype으로 변환)
+CATEGORY_COLUMNS = ['Business Type', 'Country', 'Country-Region']
+
+
+def build_sales_fact(conn):
+    """SalesFact 테이블을 (다시) 만듭니다. 임포트 직후와 차원/판매 테이블이 바뀔 때마다 호출합니다."""
+    with conn:
+        conn.execute(f"DROP TABLE IF EXISTS {TABLE}")
+        conn.execute(f"CREATE TABLE {TABLE} AS {SALES_FACT_SELECT}")
+    return conn.execute(f"SELECT COUNT(*) FROM {TABLE}").fetchone()[0]
+
+
+def refresh_sales_fact(db_path):
+    """DB 파일의 SalesFact를 다시 만드는 갱신 훅 (증분 임포트 등에서 사용)."""
+    conn = sqlite3.connect(db_path, timeout=30)
+    try:
+        return build_sales_fact(conn)
+    finally:
+        conn.close()
+
+
+def apply_dtypes(df):
+    """Date는 datetime64로, 문자열 차원 열은 category로 변환 (이미 변환된 열은 그대로)."""
+    if 'Date' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['Date']):
+        df['Date'] = pd.to_datetime(df['Date'])
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns and not isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype('category')
+    return df
+
+
+def load_sales_fact(db_path, columns=None, conn=None):
+    """
+    SalesFact에서 지정한 열을 읽습니다 (Date는 datetime64, 문자열 차원 열은 category).
+    열 기반 캐시(columnar.py)가 최신이면 Feather 파일에서 변환이 끝난 열을 그대로 읽고,
+    아니면 SQLite의 SalesFact 테이블, 테이블이 없는 이전 DB면 조인 쿼리에서 읽습니다.
+
+    주의: LEFT JOIN 결과이므로 차원 테이블에 없는 키의 행도 포함됩니다(해당 열은 NaN/NaT).
+    기존 inner merge와 같은 행 집합이 필요하면 사용하는 차원 열이 비어 있지 않은 행만 고르세요.
+    """
+    own_conn = conn is None
+    if own_conn:
+        conn = sqlite3.connect(db_path)
+    try:
+        exists = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (TABLE,)).fetchone()
+        if exists:
+            df = load_table(db_path, TABLE, columns, conn)
+        else:
+            df = pd.read_sql(SALES_FACT_SELECT, conn)
+            if columns is not None:
+                df = df[columns]
+    finally:
+        if own_conn:
+            conn.close()
+    return apply_dtypes(df)
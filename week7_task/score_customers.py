@@ -0,0 +1,266 @@
+# -*- coding: utf-8 -*-
+import concurrent.futures
+import datetime
+import multiprocessing as mp
+import os
+import sqlite3
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.model_registry import ModelRegistry
+from rfm import compute_rfm
+
+# --- 설정 (환경 변수로 조정 가능) ---
+DB_PATH = os.path.join('data', 'AdventureWorks-Sales.sqlite3')
+MODEL_PATH = os.path.join('models', 'model.joblib')
+PREPROCESSOR_PATH = os.path.join('models', 'preprocessor.joblib')
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', os.path.join('models', 'registry'))
+SCORES_TABLE = 'CustomerScores'
+# 점수는 분석 DB와 별도의 파일에 저장 (분석 DB의 데이터 버전/ETag/캐시를 바꾸지 않고, 읽기 요청을 막지 않도록)
+SCORES_DB_PATH = os.getenv('SCORE_DB_PATH', os.path.join('data', 'customer_scores.sqlite3'))
+SCORES_PARQUET_PATH = os.getenv('SCORE_PARQUET_PATH', os.path.join('data', 'customer_scores.parquet'))
+SCORE_CHUNK_CUSTOMERS = int(os.getenv('SCORE_CHUNK_CUSTOMERS', '50000'))   # 한 청크의 고객 수 (메모리 상한)
+SCORE_WORKERS = int(os.getenv('SCORE_WORKERS', '1'))                      # 1이면 현재 프로세스에서 실행
+SCORE_SNAPSHOT_DATE = os.getenv('SCORE_SNAPSHOT_DATE')                     # 기준일 (없으면 마지막 B2C 판매일)
+
+FEATURES = ['Recency_Snapshot', 'Frequency', 'Monetary', 'Country-Region']
+
+# 고객 키 범위의 B2C 판매 (Sales의 커버링 인덱스 idx_sales_channel로 범위 검색, Date는 기본 키로 조회)
+CHUNK_SALES_SQL = """
+SELECT s.CustomerKey AS CustomerKey, d.Date AS Date, s.[Sales Amount] AS [Sales Amount]
+FROM Sales s JOIN Date d ON s.OrderDateKey = d.DateKey
+WHERE s.ResellerKey = -1 AND s.CustomerKey BETWEEN ? AND ?
+"""
+CHUNK_CUSTOMERS_SQL = "SELECT CustomerKey, [Country-Region] FROM Customers WHERE CustomerKey BETWEEN ? AND ?"
+B2C_CUSTOMER_KEYS_SQL = """
+SELECT DISTINCT CustomerKey FROM Sales WHERE ResellerKey = -1 AND CustomerKey != -1 ORDER BY CustomerKey
+"""
+LAST_B2C_DATE_SQL = """
+SELECT MAX(d.Date) FROM Sales s JOIN Date d ON s.OrderDateKey = d.DateKey
+WHERE s.ResellerKey = -1 AND s.CustomerKey != -1
+"""
+
+SCORES_SCHEMA = """
+CREATE TABLE {table} (
+    CustomerKey INTEGER PRIMARY KEY,
+    Recency_Snapshot INTEGER,
+    Frequency INTEGER,
+    Monetary REAL,
+    [Country-Region] TEXT,
+    will_purchase_prediction INTEGER,
+    probability_to_purchase REAL,
+    model_version TEXT,
+    snapshot_date TEXT,
+    scored_at TEXT
+)
+"""
+
+
+def resolve_model_version(version=None):
+    """사용할 모델 버전: 지정한 버전, 레지스트리의 CURRENT, 둘 다 없으면 'legacy' (main.py와 같은 규칙)."""
+    return version or ModelRegistry(MODEL_REGISTRY_DIR).current_version() or 'legacy'
+
+
+def load_scoring_model(version):
+    """(모델, 전처리기)를 로드합니다. 'legacy'면 기존 경로(models/*.joblib)의 파일을 사용합니다."""
+    if version == 'legacy':
+        return joblib.load(MODEL_PATH), joblib.load(PREPROCESSOR_PATH)
+    _, artifacts = ModelRegistry(MODEL_REGISTRY_DIR).load(version, ('model', 'preprocessor'))
+    return artifacts['model'], artifacts['preprocessor']
+
+
+def customer_key_ranges(conn, chunk_customers):
+    """B2C 구매 이력이 있는 고객 키를 chunk_customers개씩 나눈 (최소 키, 최대 키) 범위 목록."""
+    keys = np.array([r[0] for r in conn.execute(B2C_CUSTOMER_KEYS_SQL)], dtype=np.int64)
+    return [(int(keys[i]), int(keys[min(i + chunk_customers, len(keys)) - 1]))
+            for i in range(0, len(keys), chunk_customers)]
+
+
+def default_snapshot_date(conn):
+    """마지막 B2C 판매일 (모든 판매 이력을 피처에 사용)."""
+    value = conn.execute(LAST_B2C_DATE_SQL).fetchone()[0]
+    return pd.Timestamp(value).normalize() if value is not None else None
+
+
+def chunk_features(conn, lo, hi, snapshot_date):
+    """
+    고객 키 [lo, hi] 범위의 피처(RFM + Country-Region)를 train.py:feature_engineering과 같은 규칙으로 계산합니다.
+    (기준일까지의 판매로 rfm.compute_rfm 계산 → 고객 테이블과 left merge → inf는 NaN)
+    """
+    df_sales = pd.read_sql(CHUNK_SALES_SQL, conn, params=(lo, hi))
+    df_sales['Date'] = pd.to_datetime(df_sales['Date'])
+    df_sales = df_sales[df_sales['Date'].notna() & (df_sales['Date'] <= snapshot_date)]
+    rfm = compute_rfm(df_sales, snapshot_date, recency_col='Recency_Snapshot')
+    df_customers = pd.read_sql(CHUNK_CUSTOMERS_SQL, conn, params=(lo, hi))
+    features = pd.merge(rfm, df_customers, on='CustomerKey', how='left')
+    return features.replace([np.inf, -np.inf], np.nan)
+
+
+def score_chunk(conn, model, preprocessor, lo, hi, snapshot_date):
+    """고객 키 범위 하나를 transform + predict_proba 한 번씩으로 점수화합니다."""
+    features = chunk_features(conn, lo, hi, snapshot_date)
+    if features.empty:
+        return features
+    probability = model.predict_proba(preprocessor.transform(features[FEATURES]))
+    features['will_purchase_prediction'] = model.classes_[probability.argmax(axis=1)].astype(int)
+    features['probability_to_purchase'] = probability[:, 1].astype(float)
+    return features
+
+
+# --- 프로세스 병렬 실행: 작업 프로세스마다 모델과 DB 연결을 한 번만 준비 ---
+_worker_state = {}
+
+
+def _init_worker(db_path, version):
+    model, preprocessor = load_scoring_model(version)
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    _worker_state.update(conn=conn, model=model, preprocessor=preprocessor)
+
+
+def _score_chunk_worker(lo, hi, snapshot_date):
+    s = _worker_state
+    return score_chunk(s['conn'], s['model'], s['preprocessor'], lo, hi, snapshot_date)
+
+
+def _iter_scored_chunks(db_path, ranges, snapshot_date, workers, version):
+    """청크 결과를 범위 순서대로 내보냅니다. 병렬 실행 시 동시에 처리 중인 청크는 workers * 2개까지."""
+    if workers <= 1:
+        model, preprocessor = load_scoring_model(version)
+        conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+        try:
+            for lo, hi in ranges:
+                yield score_chunk(conn, model, preprocessor, lo, hi, snapshot_date)
+        finally:
+            conn.close()
+        return
+    # spawn: 부모 프로세스의 XGBoost/OpenMP 스레드 상태를 fork로 물려받지 않도록 새 인터프리터에서 시작
+    with concurrent.futures.ProcessPoolExecutor(workers, mp_context=mp.get_context('spawn'),
+                                                initializer=_init_worker, initargs=(db_path, version)) as pool:
+        pending = []
+        for lo, hi in ranges:
+            pending.append(pool.submit(_score_chunk_worker, lo, hi, snapshot_date))
+            if len(pending) >= workers * 2:
+                yield pending.pop(0).result()
+        for future in pending:
+            yield future.result()
+
+
+class _TableWriter:
+    """점수 DB의 CustomerScores_tmp에 청크를 추가한 뒤, 마지막에 한 트랜잭션으로 CustomerScores와 교체합니다."""
+
+    def __init__(self, db_path):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, timeout=30)
+        self.tmp_table = f"{SCORES_TABLE}_tmp"
+        with self.conn:
+            self.conn.execute(f"DROP TABLE IF EXISTS {self.tmp_table}")
+            self.conn.execute(SCORES_SCHEMA.format(table=self.tmp_table))
+
+    def write(self, df):
+        df.to_sql(self.tmp_table, self.conn, if_exists='append', index=False)
+
+    def close(self, success):
+        try:
+            with self.conn:
+                if success:
+                    self.conn.execute(f"DROP TABLE IF EXISTS {SCORES_TABLE}")
+                    self.conn.execute(f"ALTER TABLE {self.tmp_table} RENAME TO {SCORES_TABLE}")
+                else:
+                    self.conn.execute(f"DROP TABLE IF EXISTS {self.tmp_table}")
+        finally:
+            self.conn.close()
+
+
+class _ParquetWriter:
+    """청크를 Parquet row group으로 차례로 쓰고, 끝나면 임시 파일을 교체합니다."""
+
+    def __init__(self, path):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        self.pa = pa
+        self.path = path
+        self.schema = pa.schema([
+            ('CustomerKey', pa.int64()), ('Recency_Snapshot', pa.int64()), ('Frequency', pa.int64()),
+            ('Monetary', pa.float64()), ('Country-Region', pa.string()),
+            ('will_purchase_prediction', pa.int64()), ('probability_to_purchase', pa.float64()),
+            ('model_version', pa.string()), ('snapshot_date', pa.string()), ('scored_at', pa.string()),
+        ])
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.writer = pq.ParquetWriter(path + '.tmp', self.schema)
+
+    def write(self, df):
+        self.writer.write_table(self.pa.Table.from_pandas(df, schema=self.schema, preserve_index=False))
+
+    def close(self, success):
+        self.writer.close()
+        if success:
+            os.replace(self.path + '.tmp', self.path)
+        else:
+            os.remove(self.path + '.tmp')
+
+
+def score_customers(db_path=DB_PATH, output='table', scores_db_path=SCORES_DB_PATH, parquet_path=SCORES_PARQUET_PATH,
+                    chunk_customers=SCORE_CHUNK_CUSTOMERS, workers=SCORE_WORKERS,
+                    snapshot_date=SCORE_SNAPSHOT_DATE, version=None):
+    """
+    B2C 구매 이력이 있는 모든 고객의 구매 확률을 계산해 점수 DB(scores_db_path)의 CustomerScores 테이블
+    (output='table') 또는 Parquet 파일(output='parquet')에 저장합니다. 분석 DB(db_path)는 읽기 전용으로만 엽니다.
+
+    고객 키 범위 단위 청크로 판매 행을 읽고 모델을 실행하므로 메모리 사용량은 chunk_customers에 비례합니다.
+    모든 청크가 같은 기준일(snapshot_date)과 같은 모델 버전을 사용하며, workers > 1이면 청크를
+    여러 프로세스에서 나눠 처리합니다. 결과는 모두 성공했을 때만 기존 테이블/파일과 교체됩니다.
+    """
+    if not os.path.exists(db_path):
+        print(f"오류: '{db_path}'에서 데이터베이스 파일을 찾을 수 없습니다.")
+        return None
+    start = time.perf_counter()
+    version = resolve_model_version(version)
+
+    conn = sqlite3.connect(f"file:{os.path.abspath(db_path)}?mode=ro", uri=True)
+    try:
+        snapshot = pd.Timestamp(snapshot_date) if snapshot_date else default_snapshot_date(conn)
+        ranges = customer_key_ranges(conn, chunk_customers)
+    finally:
+        conn.close()
+    if snapshot is None or not ranges:
+        print("점수를 계산할 B2C 고객이 없습니다.")
+        return None
+    if os.path.abspath(scores_db_path) == os.path.abspath(db_path) and output == 'table':
+        print(f"오류: 점수 DB는 분석 DB('{db_path}')와 다른 파일이어야 합니다 (SCORE_DB_PATH).")
+        return None
+    print(f"고객 점수 계산: 청크 {len(ranges)}개 (청크당 최대 {chunk_customers}명), 작업 프로세스 {workers}개, "
+          f"기준일 {snapshot.date()}, 모델 버전 {version}")
+
+    writer = _TableWriter(scores_db_path) if output == 'table' else _ParquetWriter(parquet_path)
+    scored_at = datetime.datetime.now().isoformat(timespec='seconds')
+    total = 0
+    success = False
+    try:
+        for scores in _iter_scored_chunks(db_path, ranges, snapshot, workers, version):
+            if scores.empty:
+                continue
+            scores['model_version'] = version
+            scores['snapshot_date'] = str(snapshot.date())
+            scores['scored_at'] = scored_at
+            writer.write(scores)
+            total += len(scores)
+        success = True
+    finally:
+        writer.close(success)
+
+    target = f"{scores_db_path}:{SCORES_TABLE}" if output == 'table' else parquet_path
+    print(f"완료: 고객 {total}명 → {target} ({time.perf_counter() - start:.1f}초)")
+    return {"customers": total, "chunks": len(ranges), "snapshot_date": str(snapshot.date()),
+            "model_version": version, "output": target}
+
+
+# python score_customers.py            → data/customer_scores.sqlite3의 CustomerScores 테이블에 저장 (SCORE_DB_PATH로 변경)
+# python score_customers.py --parquet  → data/customer_scores.parquet에 저장 (SCORE_PARQUET_PATH로 변경)
+# 청크 크기/병렬 처리/기준일: SCORE_CHUNK_CUSTOMERS, SCORE_WORKERS, SCORE_SNAPSHOT_DATE 환경 변수
+if __name__ == "__main__":
+    score_customers(output='parquet' if "--parquet" in sys.argv else 'table')
@@ -0,0 +1,57 @@
+# -*- coding: utf-8 -*-
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+# week7_task의 모듈(flat 구조)을 테스트에서 바로 import할 수 있도록
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def make_sheets(seed=0, n_sales=300):
+    """import_excel_to_db.SHEETS_TO_IMPORT의 시트 이름을 가진 작은 합성 AdventureWorks 시트 (시트 이름 -> DataFrame)."""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2020-01-01', periods=120)
+    date = pd.DataFrame({'DateKey': dates.strftime('%Y%m%d').astype(int), 'Date': dates,
+                         'Fiscal Year': 'FY' + dates.year.astype(str), 'Month': dates.month_name()})
+    territories = pd.DataFrame({'SalesTerritoryKey': range(1, 5), 'Region': ['Northwest', 'Southwest', 'France', 'Germany'],
+                                'Country': ['United States', 'United States', 'France', 'Germany']})
+    resellers = pd.DataFrame({'ResellerKey': range(1, 11), 'Business Type': ['Warehouse', 'Specialty Bike Shop'] * 5,
+                              'Reseller': [f'Reseller {i}' for i in range(1, 11)]})
+    customers = pd.DataFrame({'CustomerKey': range(1, 41), 'Customer': [f'Customer {i}' for i in range(1, 41)],
+                              'Country-Region': ['United States', 'France'] * 20})
+    products = pd.DataFrame({'ProductKey': range(1, 6), 'Product': [f'Product {i}' for i in range(1, 6)],
+                             'List Price': [1.5, 2.0, 3.25, 4.0, 5.5]})
+    b2c = rng.random(n_sales) < 0.6
+    sales = pd.DataFrame({
+        'SalesOrderLineKey': np.arange(1000, 1000 + n_sales),
+        'ResellerKey': np.where(b2c, -1, rng.integers(1, 11, n_sales)),
+        'CustomerKey': np.where(b2c, rng.integers(1, 41, n_sales), -1),
+        'ProductKey': rng.integers(1, 6, n_sales),
+        'OrderDateKey': rng.choice(date['DateKey'], n_sales),
+        'SalesTerritoryKey': rng.integers(1, 5, n_sales),
+        'Sales Amount': np.round(rng.random(n_sales) * 1000, 4),
+    })
+    orders = pd.DataFrame({'SalesOrderLineKey': sales['SalesOrderLineKey'],
+                           'Channel': np.where(b2c, 'Internet', 'Reseller')})
+    return {'Reseller_data': resellers, 'Sales_data': sales, 'Customer_data': customers, 'Product_data': products,
+            'Sales Territory_data': territories, 'Sales Order_data': orders, 'Date_data': date}
+
+
+def write_workbook(path, sheets):
+    with pd.ExcelWriter(path) as writer:
+        for sheet_name, df in sheets.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+
+@pytest.fixture
+def workbook(tmp_path):
+    """tmp_path/data/에 합성 통합 문서를 만들고 (통합 문서 경로, DB 경로, 시트 dict)를 반환."""
+    data_dir = tmp_path / 'data'
+    data_dir.mkdir()
+    sheets = make_sheets()
+    excel_path = str(data_dir / 'AdventureWorks-Sales.xlsx')
+    write_workbook(excel_path, sheets)
+    return excel_path, str(data_dir / 'AdventureWorks-Sales.sqlite3'), sheets
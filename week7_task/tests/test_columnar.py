@@ -0,0 +1,59 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import columnar
+import import_excel_to_db
+import sales_fact
+
+
+@pytest.fixture
+def imported_db(workbook):
+    excel_path, db_path, _ = workbook
+    import_excel_to_db.import_excel_to_sqlite(excel_path, db_path)
+    return db_path
+
+
+def test_cache_is_used_after_import(imported_db, monkeypatch):
+    db_path = imported_db
+    manifest = columnar.read_manifest(db_path)
+    assert set(manifest['tables']) == {'Sales', 'Date', 'Customers', 'Resellers', 'Territories', 'SalesFact'}
+    with sqlite3.connect(db_path) as conn:
+        expected = pd.read_sql('SELECT * FROM Sales', conn)[['CustomerKey', 'Sales Amount']]   # rowid 순서
+
+    def no_sqlite(*args, **kwargs):
+        raise AssertionError("열 기반 캐시가 최신인데 SQLite에서 읽음")
+
+    monkeypatch.setattr(columnar.pd, 'read_sql', no_sqlite)
+    actual = columnar.load_table(db_path, 'Sales', ['CustomerKey', 'Sales Amount'])
+    pd.testing.assert_frame_equal(actual, expected)
+    fact = sales_fact.load_sales_fact(db_path, ['ResellerKey', 'Date', 'Sales Amount'])
+    assert len(fact) == len(expected)
+
+
+def test_db_change_while_writing_keeps_previous_cache(imported_db):
+    db_path = imported_db
+    out_dir = columnar.cache_dir(db_path)
+    before = {name: os.path.getmtime(os.path.join(out_dir, name)) for name in os.listdir(out_dir)}
+
+    def change_db(df):
+        # 캐시를 쓰는 도중 증분 임포트가 Sales를 바꾼 것처럼 임포트 상태를 변경
+        with sqlite3.connect(db_path) as conn:
+            conn.execute("UPDATE _import_meta SET generation = generation + 1 WHERE table_name = 'Sales'")
+        return df
+
+    assert columnar.write_columnar_cache(db_path, converters={'Sales': change_db}) is None
+    # 기존 캐시 폴더는 그대로(반쯤 쓰인 파일 없음), 임시 폴더도 남지 않음. 데이터가 바뀌었으므로 읽는 쪽은 SQLite 사용
+    assert {name: os.path.getmtime(os.path.join(out_dir, name)) for name in os.listdir(out_dir)} == before
+    assert sorted(os.listdir(os.path.dirname(db_path))) == sorted(
+        ['AdventureWorks-Sales.xlsx', 'AdventureWorks-Sales.sqlite3', 'AdventureWorks-Sales.sqlite3-wal',
+         'AdventureWorks-Sales.sqlite3-shm', 'columnar'])
+    assert not columnar.is_fresh(db_path)
+
+    assert columnar.write_columnar_cache(db_path) is not None
+    assert columnar.is_fresh(db_path)
+    assert sorted(os.listdir(out_dir)) == ['Customers.feather', 'Date.feather', 'Resellers.feather', 'Sales.feather',
+                                           'SalesFact.feather', 'Territories.feather', 'manifest.json']
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import threading
+
+import pytest
+
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common import instrumentation
+from executors import PoolBusyError, WorkPool
+
+
+@pytest.fixture
+def pools():
+    created = []
+
+    def make(name, workers, max_pending=None):
+        pool = WorkPool(name, workers, max_pending)
+        created.append(pool)
+        return pool
+
+    yield make
+    for pool in created:
+        pool.shutdown()
+
+
+def test_runs_on_pool_thread_and_propagates_errors(pools):
+    pool = pools('analysis', 2)
+
+    def fail():
+        raise KeyError('boom')
+
+    async def run():
+        name = await pool.run(lambda: threading.current_thread().name)
+        with pytest.raises(KeyError):
+            await pool.run(fail)
+        return name, await pool.run(divmod, 7, 2)
+
+    name, result = asyncio.run(run())
+    assert name.startswith('analysis-worker') and result == (3, 1)
+    assert pool.stats()['pending'] == 0   # 실패한 작업도 대기 수에서 빠짐
+
+
+def test_rejects_when_max_pending_reached(pools):
+    pool = pools('analysis', 1, max_pending=2)
+    release = threading.Event()
+
+    async def run():
+        running = [asyncio.ensure_future(pool.run(release.wait, 5)) for _ in range(2)]
+        await asyncio.sleep(0.05)
+        assert pool.stats()['pending'] == 2
+        with pytest.raises(PoolBusyError):
+            await pool.run(lambda: None)
+        release.set()
+        await asyncio.gather(*running)
+        return await pool.run(lambda: 'ok')   # 자리가 나면 다시 받음
+
+    assert asyncio.run(run()) == 'ok'
+    assert pool.stats() == {'workers': 1, 'max_pending': 2, 'pending': 0, 'rejected_total': 1}
+
+
+def test_busy_analysis_pool_does_not_block_predictions(pools):
+    analysis, predict = pools('analysis', 1, max_pending=4), pools('predict', 1)
+    release = threading.Event()
+
+    async def run():
+        blocked = [asyncio.ensure_future(analysis.run(release.wait, 5)) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        result = await asyncio.wait_for(predict.run(lambda: 'predicted'), timeout=1)
+        release.set()
+        await asyncio.gather(*blocked)
+        return result
+
+    assert asyncio.run(run()) == 'predicted'
+
+
+def test_stages_in_worker_are_recorded_for_the_request(pools):
+    pool = pools('analysis', 1)
+
+    def work():
+        with instrumentation.stage('read_sql'):
+            return instrumentation.current_trace()
+
+    async def run():
+        trace = instrumentation.RequestTrace()
+        instrumentation._current_trace.set(trace)
+        return trace, await pool.run(work)
+
+    trace, seen = asyncio.run(run())
+    assert seen is trace
+    assert [name for name, _ in trace.stages] == ['read_sql']
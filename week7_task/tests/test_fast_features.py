@@ -0,0 +1,82 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from fast_features import CATEGORICAL_FEATURE, NUMERICAL_FEATURES, CustomerFeaturizer
+from train import build_preprocessor
+
+COLUMNS = NUMERICAL_FEATURES + [CATEGORICAL_FEATURE]
+
+
+def make_customers(n, seed, countries=('United States', 'Canada', 'France', 'Germany')):
+    """train.feature_engineering과 같은 열의 고객 특성 (결측치 포함)."""
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        'Recency_Snapshot': rng.integers(0, 1000, n).astype(float),
+        'Frequency': rng.integers(1, 30, n).astype(float),
+        'Monetary': np.round(rng.lognormal(6, 2, n), 4),
+        CATEGORICAL_FEATURE: rng.choice(list(countries), n).astype(object),
+    })
+    for col in NUMERICAL_FEATURES:
+        df.loc[rng.random(n) < 0.05, col] = np.nan
+    # 국가 결측치: LEFT JOIN으로 생긴 NaN('Missing'으로 대체됨)과 None(대체되지 않는 별도 범주)
+    df.loc[rng.random(n) < 0.05, CATEGORICAL_FEATURE] = np.nan
+    df.loc[rng.random(n) < 0.05, CATEGORICAL_FEATURE] = None
+    return df
+
+
+@pytest.fixture
+def preprocessor():
+    return build_preprocessor(NUMERICAL_FEATURES, [CATEGORICAL_FEATURE]).fit(make_customers(500, seed=0))
+
+
+def to_rows(df):
+    """API 입력과 같은 dict 리스트."""
+    return df.to_dict('records')
+
+
+def test_matches_preprocessor_transform(preprocessor):
+    featurizer = CustomerFeaturizer.from_preprocessor(preprocessor)
+    assert 'Missing' in featurizer.categories and None in featurizer.categories
+
+    df = make_customers(300, seed=1, countries=('United States', 'France', 'Australia'))   # Australia: 모르는 국가
+    expected = preprocessor.transform(df)
+    expected = expected.toarray() if hasattr(expected, 'toarray') else expected
+    actual = featurizer.transform_rows(to_rows(df))
+    assert actual.shape == expected.shape
+    np.testing.assert_allclose(actual, expected, rtol=1e-12, atol=1e-12)
+
+
+@pytest.mark.parametrize('country', [None, np.nan, 'Missing', 'Canada', 'Australia'])
+def test_single_row_and_missing_values(preprocessor, country):
+    featurizer = CustomerFeaturizer.from_preprocessor(preprocessor)
+    row = {'Recency_Snapshot': None, 'Frequency': 3, 'Monetary': np.nan, CATEGORICAL_FEATURE: country}
+    expected = preprocessor.transform(pd.DataFrame([row], columns=COLUMNS))
+    np.testing.assert_allclose(featurizer.transform_rows([row]), expected, rtol=1e-12, atol=1e-12)
+    assert featurizer.transform_rows([]).shape == (0, featurizer.n_features)
+
+
+def test_missing_country_without_missing_category():
+    """학습 데이터에 결측 국가가 없으면 None/NaN 모두 모르는 국가처럼 원-핫 열이 모두 0."""
+    df = make_customers(200, seed=3)
+    df[CATEGORICAL_FEATURE] = df[CATEGORICAL_FEATURE].fillna('Canada')
+    preprocessor = build_preprocessor(NUMERICAL_FEATURES, [CATEGORICAL_FEATURE]).fit(df)
+    featurizer = CustomerFeaturizer.from_preprocessor(preprocessor)
+    rows = [{'Recency_Snapshot': 1, 'Frequency': 1, 'Monetary': 1.0, CATEGORICAL_FEATURE: c} for c in (None, np.nan)]
+    actual = featurizer.transform_rows(rows)
+    np.testing.assert_allclose(actual, preprocessor.transform(pd.DataFrame(rows, columns=COLUMNS)), rtol=1e-12)
+    assert not actual[:, len(NUMERICAL_FEATURES):].any()
+
+
+def test_unsupported_preprocessor_is_rejected():
+    df = make_customers(200, seed=2)
+    scaled_only = build_preprocessor(NUMERICAL_FEATURES, [CATEGORICAL_FEATURE])
+    scaled_only.set_params(num__scaler__with_mean=False).fit(df)
+    with pytest.raises(ValueError):
+        CustomerFeaturizer.from_preprocessor(scaled_only)
+
+    passthrough = build_preprocessor(NUMERICAL_FEATURES[:2], [CATEGORICAL_FEATURE])
+    passthrough.set_params(remainder='passthrough').fit(df)
+    with pytest.raises(ValueError):
+        CustomerFeaturizer.from_preprocessor(passthrough)
@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+import json
+
+import fastapi
+import numpy as np
+import pandas as pd
+import pytest
+
+import frame_response
+from frame_response import ARROW_MEDIA_TYPE, FormatError, encode
+
+
+def make_payload():
+    """분석 결과와 같은 모양: 요약 통계 dict(numpy 스칼라) + 여러 dtype의 표 두 개."""
+    segments = pd.DataFrame({
+        'Segment': pd.Categorical(['Champions', 'Lost', 'Champions', None]),
+        'CustomerKey': np.array([11, 12, 13, 14], dtype=np.int64),
+        'Monetary': [1500.25, np.nan, 0.1, -3.5],
+        'Customer': ['Alice', None, '한글 고객', 'Dan'],
+        'Active': [True, False, True, True],
+    })
+    monthly = pd.DataFrame({'Date': ['2020-01-31', '2020-02-29'], 'Sales Amount': np.array([1.5, 2.25], dtype=np.float32)})
+    summary = {'total_sales': np.float64(1497.35), 'total_orders': np.int64(4), 'unique_reseller_types': 3}
+    return {'summary_stats': summary, 'segments': segments, 'sales_over_time': monthly}
+
+
+def expected_records(df):
+    """to_dict('records')와 같은 값에 JSON의 null 규칙(NaN/None -> None)을 적용."""
+    return [{k: (None if pd.isna(v) else v) for k, v in row.items()} for row in df.astype(object).to_dict('records')]
+
+
+def decode(fmt, table=None, payload=None):
+    body, media_type = encode(payload or make_payload(), fmt, table)
+    assert media_type == 'application/json'
+    return json.loads(body)
+
+
+@pytest.fixture(params=['orjson', 'json'])
+def json_backend(request, monkeypatch):
+    """orjson 경로와 표준 json 경로(orjson이 없을 때)가 같은 결과를 내는지 둘 다 확인."""
+    if request.param == 'orjson':
+        pytest.importorskip('orjson')
+    else:
+        monkeypatch.setattr(frame_response, 'orjson', None)
+    return request.param
+
+
+def test_records_round_trip(json_backend):
+    payload = make_payload()
+    result = decode('records')
+    assert result['summary_stats'] == {'total_sales': 1497.35, 'total_orders': 4, 'unique_reseller_types': 3}
+    assert result['segments'] == expected_records(payload['segments'])
+    assert result['sales_over_time'] == [{'Date': '2020-01-31', 'Sales Amount': 1.5},
+                                         {'Date': '2020-02-29', 'Sales Amount': 2.25}]
+    assert decode('records', 'segments') == result['segments']
+
+
+def test_columns_round_trip(json_backend):
+    payload = make_payload()
+    result = decode('columns')
+    assert result['summary_stats'] == decode('records')['summary_stats']
+    for name in ('segments', 'sales_over_time'):
+        df = payload[name]
+        assert list(result[name]) == list(df.columns)
+        rebuilt = pd.DataFrame(result[name])
+        assert expected_records(rebuilt) == expected_records(df)
+    assert decode('columns', 'sales_over_time') == result['sales_over_time']
+
+
+def test_arrow_round_trip():
+    pa = pytest.importorskip('pyarrow')
+    payload = make_payload()
+    for name in ('segments', 'sales_over_time'):
+        body, media_type = encode(payload, 'arrow', name)
+        assert media_type == ARROW_MEDIA_TYPE
+        df = pa.ipc.open_stream(body).read_pandas()
+        pd.testing.assert_frame_equal(df, payload[name])
+
+    body, _ = encode(payload, 'arrow', 'summary_stats')   # dict 값은 한 행짜리 표
+    summary = pa.ipc.open_stream(body).read_pandas()
+    assert summary.to_dict('records') == [{'total_sales': 1497.35, 'total_orders': 4, 'unique_reseller_types': 3}]
+
+
+@pytest.mark.parametrize('fmt, table', [('xml', None), ('arrow', None), ('records', 'missing'), ('arrow', 'missing')])
+def test_invalid_format_or_table(fmt, table):
+    with pytest.raises(FormatError):
+        encode(make_payload(), fmt, table)
+    with pytest.raises(fastapi.HTTPException) as exc_info:
+        frame_response.frame_response(make_payload(), fmt, table)
+    assert exc_info.value.status_code == 400
+
+
+def test_frame_response_keeps_headers():
+    response = frame_response.frame_response(make_payload(), 'columns', 'segments', headers={'ETag': 'W/"1"'})
+    assert response.headers['etag'] == 'W/"1"'
+    assert response.media_type == 'application/json'
+    assert json.loads(response.body) == decode('columns', 'segments')
@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+import email.utils
+import sqlite3
+
+import fastapi
+import pytest
+from fastapi.testclient import TestClient
+
+import http_cache
+import import_excel_to_db
+from conftest import write_workbook
+from http_cache import CompressionMiddleware, DataVersion
+
+BIG = {"rows": [{"CustomerKey": i, "Segment": "Champions"} for i in range(200)]}
+
+
+@pytest.fixture
+def client():
+    app = fastapi.FastAPI()
+    app.add_middleware(CompressionMiddleware)
+
+    @app.get('/big')
+    def big():
+        return BIG
+
+    @app.get('/small')
+    def small():
+        return {"ok": True}
+
+    @app.get('/stream')
+    def stream():
+        return fastapi.responses.StreamingResponse(iter([b'x' * 2048, b'y' * 2048]), media_type='text/plain')
+
+    @app.get('/vary')
+    def vary():
+        return fastapi.responses.JSONResponse(BIG, headers={'Vary': 'Origin'})
+
+    @app.get('/not_modified')
+    def not_modified():
+        return fastapi.Response(status_code=304, headers={'ETag': 'W/"abc"'})
+
+    return TestClient(app)
+
+
+def vary_names(response):
+    return [v.strip().lower() for v in response.headers.get('vary', '').split(',') if v.strip()]
+
+
+def test_gzip_when_accepted(client):
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+    assert response.json() == BIG   # httpx가 압축을 풀어 줌
+    assert int(response.headers['content-length']) < len(response.content)
+    assert vary_names(response) == ['accept-encoding']
+
+
+def test_brotli_preferred_when_installed(client, monkeypatch):
+    brotli = pytest.importorskip('brotli')
+    monkeypatch.setattr(http_cache, 'brotli', brotli)
+    response = client.get('/big', headers={'Accept-Encoding': 'gzip, br'})
+    assert response.headers['content-encoding'] == 'br'
+    assert response.json() == BIG
+
+
+def test_gzip_fallback_without_brotli(client, monkeypatch):
+    monkeypatch.setattr(http_cache, 'brotli', None)
+    response = client.get('/big', headers={'Accept-Encoding': 'br, gzip'})
+    assert response.headers['content-encoding'] == 'gzip'
+
+
+@pytest.mark.parametrize('accept', ['identity', 'gzip;q=0', 'br;q=0, gzip;q=0.0', ''])
+def test_uncompressed_when_not_accepted(client, accept, monkeypatch):
+    monkeypatch.setattr(http_cache, 'brotli', None)
+    response = client.get('/big', headers={'Accept-Encoding': accept})
+    assert 'content-encoding' not in response.headers
+    assert response.json() == BIG
+    assert vary_names(response) == ['accept-encoding']
+
+
+@pytest.mark.parametrize('path', ['/small', '/stream', '/not_modified'])
+@pytest.mark.parametrize('accept', ['gzip', 'identity'])
+def test_vary_on_every_response(client, path, accept):
+    response = client.get(path, headers={'Accept-Encoding': accept})
+    assert 'content-encoding' not in response.headers   # 작은 본문, 스트리밍, 304는 압축하지 않음
+    assert vary_names(response) == ['accept-encoding']
+
+
+def test_existing_vary_is_extended(client):
+    for accept in ('gzip', 'identity'):
+        response = client.get('/vary', headers={'Accept-Encoding': accept})
+        assert vary_names(response) == ['origin', 'accept-encoding']
+
+
+# --- ETag / 304 ---
+
+@pytest.fixture
+def imported_db(workbook):
+    excel_path, db_path, sheets = workbook
+    import_excel_to_db.import_excel_to_sqlite(excel_path, db_path)
+    return excel_path, db_path, sheets
+
+
+def test_etag_is_stable_and_matches(imported_db):
+    _, db_path, _ = imported_db
+    version = DataVersion(db_path, 'customer_rfm', 'records', None)
+    assert version.etag.startswith('W/"')
+    assert DataVersion(db_path, 'customer_rfm', 'records', None).etag == version.etag
+    assert DataVersion(db_path, 'customer_rfm', 'arrow', None).etag != version.etag   # 파라미터별로 다름
+
+    assert version.matches({'if-none-match': version.etag})
+    assert version.matches({'if-none-match': version.etag[2:]})                # 약한 비교
+    assert version.matches({'if-none-match': f'"other", {version.etag}'})
+    assert version.matches({'if-none-match': '*'})
+    assert not version.matches({'if-none-match': '"other"'})
+    assert not version.matches({})
+
+    headers = version.headers()
+    assert headers['ETag'] == version.etag and headers['Cache-Control'] == 'no-cache'
+    last_modified = headers['Last-Modified']
+    assert version.matches({'if-modified-since': last_modified})
+    assert not version.matches({'if-modified-since': email.utils.formatdate(version.last_modified - 60, usegmt=True)})
+    assert not version.matches({'if-modified-since': 'not a date'})
+    # If-None-Match가 있으면 If-Modified-Since는 무시
+    assert not version.matches({'if-none-match': '"other"', 'if-modified-since': last_modified})
+
+
+def test_etag_changes_after_import(imported_db):
+    excel_path, db_path, sheets = imported_db
+    before = DataVersion(db_path, 'reseller_eda', 'pandas', 'records', None)
+
+    # 읽기만 하는 연결은 데이터 버전을 바꾸지 않음
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("SELECT COUNT(*) FROM Sales").fetchone()
+    assert DataVersion(db_path, 'reseller_eda', 'pandas', 'records', None).etag == before.etag
+
+    sales = sheets['Sales_data'].copy()
+    sales.loc[0, 'Sales Amount'] += 1
+    write_workbook(excel_path, dict(sheets, Sales_data=sales))
+    import_excel_to_db.import_excel_incremental(excel_path, db_path)
+    after = DataVersion(db_path, 'reseller_eda', 'pandas', 'records', None)
+    assert after.etag != before.etag
+    assert not after.matches({'if-none-match': before.etag})
@@ -0,0 +1,164 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+
+import pandas as pd
+import pytest
+
+import columnar
+import import_excel_to_db
+import sales_fact
+from analysis_cache import db_fingerprint
+from conftest import write_workbook
+from db import SQLitePool
+
+TABLES = list(import_excel_to_db.SHEETS_TO_IMPORT.values()) + [sales_fact.TABLE]
+
+
+def read_tables(db_path):
+    """테이블 -> 행 키 순으로 정렬한 DataFrame (행 순서/rowid와 무관하게 내용 비교)."""
+    with sqlite3.connect(db_path) as conn:
+        tables = {}
+        for table in TABLES:
+            key = import_excel_to_db.ROW_KEYS.get(table, 'SalesOrderLineKey')
+            tables[table] = pd.read_sql(f'SELECT * FROM "{table}"', conn).sort_values(key, ignore_index=True)
+        return tables
+
+
+def read_import_meta(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return {r[0]: dict(zip(('sheet_hash', 'row_count', 'generation'), r[1:])) for r in conn.execute(
+            "SELECT table_name, sheet_hash, row_count, generation FROM _import_meta")}
+
+
+def read_row_hashes(db_path):
+    with sqlite3.connect(db_path) as conn:
+        return pd.read_sql("SELECT * FROM _import_row_hashes ORDER BY table_name, row_key", conn)
+
+
+def assert_same_tables(actual, expected):
+    for table in TABLES:
+        pd.testing.assert_frame_equal(actual[table], expected[table], obj=table)
+
+
+def forget_workbook_hash(db_path):
+    """통합 문서 파일 해시를 지워 증분 임포트가 시트별 비교까지 실행하도록 합니다."""
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("DELETE FROM _import_meta WHERE table_name = ?", (import_excel_to_db.WORKBOOK_META,))
+
+
+@pytest.mark.parametrize('importer', ['full', 'fast', 'incremental'])
+def test_import_builds_fresh_columnar_cache(workbook, importer):
+    excel_path, db_path, _ = workbook
+    if importer == 'full':
+        import_excel_to_db.import_excel_to_sqlite(excel_path, db_path)
+    elif importer == 'fast':
+        import_excel_to_db.import_excel_fast(excel_path, db_path, workers=2)
+    else:
+        import_excel_to_db.import_excel_to_sqlite(excel_path, db_path)
+        forget_workbook_hash(db_path)
+        import_excel_to_db.import_excel_incremental(excel_path, db_path)
+    assert columnar.is_fresh(db_path)
+
+    # WAL DB를 읽기 전용으로 열어도(-wal/-shm 파일 생성) 데이터 버전은 그대로
+    fingerprint = db_fingerprint(db_path)
+    pool = SQLitePool(db_path, size=1)
+    conn = pool.acquire()
+    conn.execute("SELECT COUNT(*) FROM Sales").fetchone()
+    pool.release(conn)
+    pool.close()
+    assert db_fingerprint(db_path) == fingerprint
+    assert columnar.is_fresh(db_path)
+
+
+def test_fast_import_matches_default_import(workbook, tmp_path):
+    excel_path, db_path, _ = workbook
+    import_excel_to_db.import_excel_to_sqlite(excel_path, db_path)
+    os.makedirs(tmp_path / 'fast')
+    fast_path = str(tmp_path / 'fast' / 'AdventureWorks-Sales.sqlite3')
+    import_excel_to_db.import_excel_fast(excel_path, fast_path, workers=2, chunk_rows=64)
+
+    assert_same_tables(read_tables(fast_path), read_tables(db_path))
+    # 증분 임포트용 상태(시트 해시, 행 수, 행 해시)도 기본 모드와 같음 (세대는 임포트 시각 기반이라 다름)
+    meta, fast_meta = read_import_meta(db_path), read_import_meta(fast_path)
+    assert {t: (m['sheet_hash'], m['row_count']) for t, m in fast_meta.items()} == \
+        {t: (m['sheet_hash'], m['row_count']) for t, m in meta.items()}
+    pd.testing.assert_frame_equal(read_row_hashes(fast_path), read_row_hashes(db_path))
+
+
+@pytest.mark.parametrize('first_import', ['full', 'fast'])
+def test_unchanged_rerun_is_noop(workbook, first_import, capsys):
+    excel_path, db_path, _ = workbook
+    if first_import == 'full':
+        import_excel_to_db.import_excel_to_sqlite(excel_path, db_path)
+    else:
+        import_excel_to_db.import_excel_fast(excel_path, db_path, workers=2)
+    tables, meta = read_tables(db_path), read_import_meta(db_path)
+
+    # 같은 통합 문서: 파일 해시가 같아 시트를 읽지 않음
+    fingerprint = db_fingerprint(db_path)
+    import_excel_to_db.import_excel_incremental(excel_path, db_path)
+    assert db_fingerprint(db_path) == fingerprint
+    assert read_import_meta(db_path) == meta
+
+    # 파일 해시가 없어도 시트 해시가 모두 같으므로 테이블을 건드리지 않음 (빠른 모드 DB도 전체 교체 없음)
+    forget_workbook_hash(db_path)
+    capsys.readouterr()
+    import_excel_to_db.import_excel_incremental(excel_path, db_path)
+    out = capsys.readouterr().out
+    assert out.count('변경 없음, 건너뜀') == len(import_excel_to_db.SHEETS_TO_IMPORT)
+    assert '전체 교체' not in out
+    assert_same_tables(read_tables(db_path), tables)
+    after = read_import_meta(db_path)
+    assert {t: m for t, m in after.items() if t != import_excel_to_db.WORKBOOK_META} == \
+        {t: m for t, m in meta.items() if t != import_excel_to_db.WORKBOOK_META}
+
+
+@pytest.mark.parametrize('first_import', ['full', 'fast'])
+def test_incremental_applies_inserts_updates_and_deletes(workbook, tmp_path, first_import, capsys):
+    excel_path, db_path, sheets = workbook
+    if first_import == 'full':
+        import_excel_to_db.import_excel_to_sqlite(excel_path, db_path)
+    else:
+        import_excel_to_db.import_excel_fast(excel_path, db_path, workers=2)
+    before = read_import_meta(db_path)
+
+    sales = sheets['Sales_data']
+    new_rows = sales.tail(5).assign(SalesOrderLineKey=sales['SalesOrderLineKey'].max() + 1 + pd.RangeIndex(5))
+    sales = pd.concat([sales.drop(index=[3, 10, 11]), new_rows], ignore_index=True)   # 삭제 3행, 추가 5행
+    sales.loc[sales.index[:4], 'Sales Amount'] += 1.25                                  # 수정 4행
+    customers = sheets['Customer_data'].copy()
+    customers.loc[0, 'Country-Region'] = 'Germany'                                      # 수정 1행
+    products = pd.concat([sheets['Product_data'], pd.DataFrame(
+        {'ProductKey': [6], 'Product': ['Product 6'], 'List Price': [6.5]})], ignore_index=True)   # 추가만 1행
+    changed = dict(sheets, Sales_data=sales, Customer_data=customers, Product_data=products)
+    write_workbook(excel_path, changed)
+
+    capsys.readouterr()
+    import_excel_to_db.import_excel_incremental(excel_path, db_path)
+    out = capsys.readouterr().out
+    assert "'Sales' 추가 5행, 수정 4행, 삭제 3행" in out
+    assert "'Customers' 추가 0행, 수정 1행, 삭제 0행" in out
+    assert "'Products' 추가 1행, 수정 0행, 삭제 0행" in out
+    assert '전체 교체' not in out
+
+    # 반영 결과(SalesFact 포함)는 바뀐 통합 문서를 처음부터 임포트한 결과와 같음
+    os.makedirs(tmp_path / 'expected')
+    expected_path = str(tmp_path / 'expected' / 'AdventureWorks-Sales.sqlite3')
+    import_excel_to_db.import_excel_to_sqlite(excel_path, expected_path)
+    assert_same_tables(read_tables(db_path), read_tables(expected_path))
+
+    # 수정/삭제가 있는 테이블만 세대가 올라가고, 추가만 있는 테이블은 그대로 (rfm_store는 새 rowid만 읽으면 됨)
+    after = read_import_meta(db_path)
+    assert after['Sales']['generation'] == before['Sales']['generation'] + 1
+    assert after['Customers']['generation'] == before['Customers']['generation'] + 1
+    assert after['Products']['generation'] == before['Products']['generation']
+    assert after['Resellers'] == before['Resellers']
+    assert (after['Sales']['row_count'], after['Products']['row_count']) == (len(sales), len(products))
+    assert after['Sales']['sheet_hash'] == import_excel_to_db.sheet_hashes(
+        import_excel_to_db.normalize_dates(sales.copy()))[0]
+    assert columnar.is_fresh(db_path)
+
+    # 같은 통합 문서로 다시 실행하면 아무것도 바뀌지 않음
+    import_excel_to_db.import_excel_incremental(excel_path, db_path)
+    assert read_import_meta(db_path) == after
@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*-
+import os
+import re
+
+import fastapi
+import pytest
+from fastapi.testclient import TestClient
+from starlette.concurrency import run_in_threadpool
+
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common import instrumentation
+from common.instrumentation import CallbackMetric, Histogram, MetricsRegistry, TimingMiddleware, stage
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram('work_seconds', '작업 시간', ('stage',), buckets=(0.01, 0.1, 1.0))
+    for value in (0.005, 0.01, 0.05, 0.5, 3.0):
+        histogram.observe(value, 'read')
+    histogram.observe(0.2, 'a"b')
+    lines = histogram.render()
+    assert lines[:2] == ['# HELP work_seconds 작업 시간', '# TYPE work_seconds histogram']
+    read = [line for line in lines if 'stage="read"' in line]
+    assert read == [
+        'work_seconds_bucket{stage="read",le="0.01"} 2',   # 경계값(0.01)은 그 버킷에 포함 (le)
+        'work_seconds_bucket{stage="read",le="0.1"} 3',
+        'work_seconds_bucket{stage="read",le="1.0"} 4',
+        'work_seconds_bucket{stage="read",le="+Inf"} 5',
+        'work_seconds_sum{stage="read"} 3.565',
+        'work_seconds_count{stage="read"} 5',
+    ]
+    assert 'work_seconds_count{stage="a\\"b"} 1' in lines   # 레이블 값 이스케이프
+
+
+def test_callback_metrics_skip_missing_and_failing_values():
+    registry = MetricsRegistry()
+    registry.gauge('queue_depth', '대기 수', lambda: 3)
+    registry.counter('pool_rejected_total', '거절 수', lambda: [({'pool': 'analysis'}, 2), ({'pool': 'predict'}, None)])
+    registry.gauge('disabled', '꺼진 기능', lambda: None)
+    registry.gauge('broken', '오류', lambda: 1 / 0)
+    text = registry.render()
+    assert 'queue_depth 3.0\n' in text
+    assert 'pool_rejected_total{pool="analysis"} 2.0\n' in text and 'predict' not in text
+    assert '# TYPE pool_rejected_total counter' in text
+    assert '# HELP disabled' in text and not re.search(r'^disabled ', text, re.M)
+    assert 'broken' not in text   # 값을 읽지 못한 지표는 통째로 생략
+    assert CallbackMetric('x', 'y', lambda: 1.5).render()[-1] == 'x 1.5'
+
+
+def make_app(env_prefix=''):
+    app = fastapi.FastAPI()
+    app.add_middleware(TimingMiddleware, env_prefix=env_prefix)
+
+    @app.get('/items/{item_id}')
+    def item(item_id: int):   # 동기 엔드포인트: 스레드 풀에서 실행되어도 같은 요청에 기록됨
+        with stage('read'):
+            pass
+        with stage('read'):
+            pass
+        with stage('aggregate'):
+            return {"item_id": item_id}
+
+    def score():
+        with stage('predict_proba'):
+            return sum(i * i for i in range(20000))
+
+    @app.get('/score')
+    async def profiled_score():   # 작업 풀과 같이 call_profiled로 실행한 함수만 프로파일됨
+        return {"score": await run_in_threadpool(instrumentation.call_profiled, score)}
+
+    return app
+
+
+def parse_server_timing(value):
+    return {m.group(1): float(m.group(2)) for m in re.finditer(r'([\w.-]+);dur=([\d.]+)', value)}
+
+
+def test_server_timing_and_request_histogram():
+    client = TestClient(make_app())
+    before = instrumentation.REQUEST_SECONDS._series.get(('GET', '/items/{item_id}', '200'), [0] * 20)[-1]
+    response = client.get('/items/7')
+    assert response.json() == {"item_id": 7}
+    timings = parse_server_timing(response.headers['server-timing'])
+    assert list(timings) == ['read', 'aggregate', 'app']   # 같은 이름의 단계는 합산
+    assert timings['app'] >= timings['read'] + timings['aggregate']
+    assert 'x-profile-output' not in response.headers
+
+    # 요청 히스토그램은 실제 경로가 아닌 경로 템플릿으로 기록
+    assert instrumentation.REQUEST_SECONDS._series[('GET', '/items/{item_id}', '200')][-1] == before + 1
+    client.get('/missing')
+    assert ('GET', 'unmatched', '404') in instrumentation.REQUEST_SECONDS._series
+    assert 'app_stage_duration_seconds_count{stage="aggregate"}' in instrumentation.METRICS.render()
+
+
+@pytest.mark.parametrize('trigger', [{'headers': {'X-Profile': '1'}}, {'params': {'profile': 'true'}}])
+def test_profiled_request_writes_profile(tmp_path, monkeypatch, trigger):
+    monkeypatch.setenv('TEST_PROFILING', '1')
+    monkeypatch.setenv('TEST_PROFILE_DIR', str(tmp_path / 'profiles'))
+    client = TestClient(make_app(env_prefix='TEST_'))
+
+    response = client.get('/score', **trigger)
+    paths = response.headers['x-profile-output'].split(', ')
+    assert len(paths) == 1 and os.path.getsize(paths[0]) > 0
+    assert os.path.dirname(paths[0]) == str(tmp_path / 'profiles') and 'score' in os.path.basename(paths[0])
+    assert 'predict_proba' in parse_server_timing(response.headers['server-timing'])
+
+    assert 'x-profile-output' not in client.get('/score').headers   # 요청하지 않으면 프로파일하지 않음
+
+
+def test_profiling_disabled_by_default(tmp_path, monkeypatch):
+    monkeypatch.delenv('TEST_PROFILING', raising=False)
+    monkeypatch.setenv('TEST_PROFILE_DIR', str(tmp_path / 'profiles'))
+    response = TestClient(make_app(env_prefix='TEST_')).get('/score', headers={'X-Profile': '1'})
+    assert 'x-profile-output' not in response.headers
+    assert not (tmp_path / 'profiles').exists()
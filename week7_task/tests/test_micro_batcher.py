@@ -0,0 +1,78 @@
+# -*- coding: utf-8 -*-
+import asyncio
+import time
+
+import pytest
+
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.micro_batcher import MicroBatcher
+
+
+class RecordingPredict:
+    """호출된 배치를 기록하고 각 행의 10배를 반환. 음수 행이 있으면 배치 전체를 실패시킴."""
+
+    def __init__(self):
+        self.batches = []
+
+    def __call__(self, rows):
+        self.batches.append(list(rows))
+        if any(r < 0 for r in rows):
+            raise ValueError(f"잘못된 행: {[r for r in rows if r < 0]}")
+        return [r * 10 for r in rows]
+
+
+async def submit_all(batcher, rows):
+    return await asyncio.gather(*(batcher.submit(r) for r in rows), return_exceptions=True)
+
+
+def test_results_are_returned_in_request_order():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=4, max_wait_ms=200)
+    results = asyncio.run(submit_all(batcher, range(10)))
+    assert results == [r * 10 for r in range(10)]
+    # 가득 찬 배치는 기다리지 않고 바로 실행되고, 배치 안의 행 순서는 도착 순서
+    assert predict.batches == [[0, 1, 2, 3], [4, 5, 6, 7], [8, 9]]
+    stats = batcher.stats()
+    assert (stats['batches_total'], stats['rows_total'], stats['max_batch_size_seen']) == (3, 10, 4)
+    assert stats['batch_size_counts'] == {'2': 1, '4': 2}
+
+
+def test_errors_reach_only_the_failing_request():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=8, max_wait_ms=50)
+    results = asyncio.run(submit_all(batcher, [1, -2, 3]))
+    assert results[0] == 10 and results[2] == 30
+    assert isinstance(results[1], ValueError) and '-2' in str(results[1])
+    assert predict.batches == [[1, -2, 3], [1], [-2], [3]]   # 배치 실패 후 행별로 다시 실행
+
+    # 한 행짜리 배치의 오류는 그대로 전달
+    with pytest.raises(ValueError):
+        asyncio.run(batcher.submit(-1))
+
+
+def test_wrong_result_count_fails_instead_of_hanging():
+    batcher = MicroBatcher(lambda rows: [], max_batch_size=8, max_wait_ms=10)
+
+    async def run():
+        return await asyncio.wait_for(submit_all(batcher, [1, 2]), timeout=5)
+
+    results = asyncio.run(run())
+    assert all(isinstance(r, ValueError) for r in results)
+
+
+def test_partial_batch_is_flushed_after_max_wait():
+    predict = RecordingPredict()
+    batcher = MicroBatcher(predict, max_batch_size=100, max_wait_ms=30)
+
+    async def run():
+        start = time.perf_counter()
+        first = await asyncio.wait_for(submit_all(batcher, [1, 2, 3]), timeout=5)
+        elapsed = time.perf_counter() - start
+        second = await asyncio.wait_for(batcher.submit(4), timeout=5)
+        return first, second, elapsed
+
+    first, second, elapsed = asyncio.run(run())
+    assert (first, second) == ([10, 20, 30], 40)
+    assert elapsed >= 0.025   # 배치가 차지 않았으므로 max_wait 동안 기다린 뒤 실행
+    assert predict.batches == [[1, 2, 3], [4]]
+    assert batcher.queue_depth == 0
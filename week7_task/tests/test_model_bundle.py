@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+import os
+
+import joblib
+import numpy as np
+import pandas as pd
+import pytest
+from xgboost import XGBClassifier
+
+import main
+from fast_features import CATEGORICAL_FEATURE, NUMERICAL_FEATURES
+from model_bundle import BUNDLE_FORMAT, export_bundle, load_bundle
+from train import build_preprocessor
+
+
+def make_customers(n, seed):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        'Recency_Snapshot': rng.integers(0, 1000, n),
+        'Frequency': rng.integers(1, 30, n),
+        'Monetary': np.round(rng.lognormal(6, 2, n), 4),
+        CATEGORICAL_FEATURE: rng.choice(['United States', 'Canada', 'France'], n).astype(object),
+    })
+
+
+def train_small_model(seed=0):
+    X = make_customers(400, seed)
+    y = ((X['Frequency'] > 10) ^ (X[CATEGORICAL_FEATURE] == 'France')).astype(int)
+    preprocessor = build_preprocessor(NUMERICAL_FEATURES, [CATEGORICAL_FEATURE])
+    model = XGBClassifier(n_estimators=30, max_depth=3, random_state=seed).fit(preprocessor.fit_transform(X), y)
+    return model, preprocessor
+
+
+@pytest.fixture
+def trained(tmp_path):
+    model, preprocessor = train_small_model()
+    path = export_bundle(model, preprocessor, str(tmp_path / 'bundle.joblib'))
+    return model, preprocessor, path
+
+
+def test_bundle_matches_joblib_model(trained):
+    model, preprocessor, path = trained
+    bundle = load_bundle(path)
+    assert bundle['preprocessor'] is None
+    np.testing.assert_array_equal(bundle['model'].classes_, model.classes_)
+
+    rows = make_customers(200, seed=1).to_dict('records')
+    rows.append({'Recency_Snapshot': 5, 'Frequency': 2, 'Monetary': 10.0, CATEGORICAL_FEATURE: 'Atlantis'})
+    expected = model.predict_proba(preprocessor.transform(pd.DataFrame(rows)))
+    np.testing.assert_allclose(bundle['model'].predict_proba(bundle['featurizer'].transform_rows(rows)), expected,
+                               atol=1e-6)
+
+    # API 예측 경로: 번들과 기존 joblib 묶음이 같은 (예측 클래스, 확률)을 반환
+    joblib_bundle = {"model": model, "preprocessor": preprocessor, "featurizer": None}
+    from_bundle = main.predict_customer_rows(rows, bundle=bundle)
+    from_joblib = main.predict_customer_rows(rows, bundle=joblib_bundle)
+    assert [p for p, _ in from_bundle] == [p for p, _ in from_joblib]
+    np.testing.assert_allclose([pr for _, pr in from_bundle], [pr for _, pr in from_joblib], atol=1e-6)
+
+
+def test_reexport_replaces_file_without_breaking_loaded_bundle(trained):
+    _, _, path = trained
+    loaded = load_bundle(path)
+    rows = make_customers(20, seed=2).to_dict('records')
+    before = loaded['model'].predict_proba(loaded['featurizer'].transform_rows(rows))
+
+    model, preprocessor = train_small_model(seed=3)
+    export_bundle(model, preprocessor, path)
+    assert sorted(os.listdir(os.path.dirname(path))) == ['bundle.joblib']   # 임시 파일이 남지 않음
+    # 이미 로드한 번들(이전 파일의 메모리 매핑)은 그대로 동작
+    np.testing.assert_array_equal(loaded['model'].predict_proba(loaded['featurizer'].transform_rows(rows)), before)
+    reloaded = load_bundle(path)
+    np.testing.assert_allclose(reloaded['model'].predict_proba(reloaded['featurizer'].transform_rows(rows)),
+                               model.predict_proba(preprocessor.transform(pd.DataFrame(rows))), atol=1e-6)
+
+
+def test_unknown_format_is_rejected(trained, tmp_path):
+    _, _, path = trained
+    payload = joblib.load(path)
+    payload['format'] = BUNDLE_FORMAT + 1
+    other = str(tmp_path / 'other.joblib')
+    joblib.dump(payload, other)
+    with pytest.raises(ValueError):
+        load_bundle(other)
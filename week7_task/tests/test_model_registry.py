@@ -0,0 +1,122 @@
+# -*- coding: utf-8 -*-
+import json
+import os
+
+import pytest
+
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.model_registry import ModelRegistry, ModelWatcher, RegistryError
+
+
+@pytest.fixture
+def registry(tmp_path):
+    return ModelRegistry(str(tmp_path / 'registry'))
+
+
+def publish_model(registry, tmp_path, name, activate=True):
+    """joblib 객체 1개 + 복사할 파일 1개로 이루어진 버전을 등록."""
+    src = tmp_path / f'{name}.txt'
+    src.write_text(name, encoding='utf-8')
+    return registry.publish(objects={'model': {'name': name}}, files={'notes': str(src)},
+                            metrics={'auc': 0.5}, activate=activate)
+
+
+def make_watcher(registry, fail_on=()):
+    def build(artifacts):
+        if artifacts['model']['name'] in fail_on:
+            raise ValueError('빌드 실패')
+        return artifacts['model']['name']
+    return ModelWatcher(registry, build, poll_seconds=0)
+
+
+def test_publish_sets_current_and_records_artifacts(registry, tmp_path):
+    assert registry.current_version() is None
+    v1 = publish_model(registry, tmp_path, 'v1')
+    assert registry.current_version() == v1
+    assert not [n for n in os.listdir(registry.versions_dir) if n.startswith('.tmp-')]
+
+    manifest, loaded = registry.load(v1)
+    assert manifest['version'] == v1 and manifest['metrics'] == {'auc': 0.5}
+    assert set(manifest['artifacts']) == {'model', 'notes'}
+    assert loaded['model'] == {'name': 'v1'}
+    assert open(loaded['notes'], encoding='utf-8').read() == 'v1'
+
+    # activate=False면 등록만 하고 CURRENT는 그대로
+    v2 = publish_model(registry, tmp_path, 'v2', activate=False)
+    assert registry.current_version() == v1
+    assert {m['version'] for m in registry.versions()} == {v1, v2}
+    with open(os.path.join(registry.root, 'history.jsonl'), encoding='utf-8') as f:
+        history = [json.loads(line) for line in f]
+    assert [(h['version'], h['previous'], h['reason']) for h in history] == [(v1, None, 'publish')]
+
+    with pytest.raises(RegistryError):
+        registry.set_current('missing')
+    assert registry.current_version() == v1
+
+
+def test_rollback_targets_previously_served_version(registry, tmp_path):
+    v1 = publish_model(registry, tmp_path, 'v1')
+    v2 = publish_model(registry, tmp_path, 'v2')
+    unserved = publish_model(registry, tmp_path, 'unserved', activate=False)
+    v3 = publish_model(registry, tmp_path, 'v3')
+    assert registry.previous_version() == v2   # 등록 순서가 아니라 서빙 기록 기준 (unserved 제외)
+
+    watcher = make_watcher(registry)
+    watcher.activate()
+    assert watcher.rollback().version == v2
+    assert registry.current_version() == v2 and watcher.active.bundle == 'v2'
+    # 롤백 직후의 직전 버전은 롤백 전에 서빙하던 v3
+    assert registry.previous_version() == v3
+
+    # 직전 버전 폴더가 지워졌으면 그보다 앞선 기록으로
+    registry.set_current(v1)
+    os.rename(registry._version_dir(v2), os.path.join(registry.versions_dir, '.removed'))
+    assert registry.previous_version() == v3
+    assert watcher.rollback(unserved).version == unserved
+    assert registry.current_version() == unserved
+
+
+def test_rollback_without_history_raises(registry, tmp_path):
+    publish_model(registry, tmp_path, 'v1')
+    with pytest.raises(RegistryError):
+        make_watcher(registry).rollback()
+
+
+def test_sha256_mismatch_is_rejected(registry, tmp_path):
+    v1 = publish_model(registry, tmp_path, 'v1')
+    watcher = make_watcher(registry)
+    watcher.activate()
+    v2 = publish_model(registry, tmp_path, 'v2')
+    with open(os.path.join(registry._version_dir(v2), 'notes.txt'), 'a', encoding='utf-8') as f:
+        f.write('tampered')
+
+    with pytest.raises(RegistryError, match='sha256'):
+        registry.load(v2)
+    registry.load(v2, names=['model'])   # 손상되지 않은 파일만 요청하면 로드됨
+    assert watcher.check() is False
+    assert watcher.active.version == v1 and 'sha256' in watcher.last_error
+
+
+def test_failed_load_keeps_serving_previous_model(registry, tmp_path, capsys):
+    v1 = publish_model(registry, tmp_path, 'v1')
+    watcher = make_watcher(registry, fail_on={'broken'})
+    assert watcher.check() is True
+    active = watcher.active
+
+    broken = publish_model(registry, tmp_path, 'broken')
+    assert watcher.check() is False
+    assert watcher.active is active and watcher.active.bundle == 'v1'
+    assert watcher.last_error == '빌드 실패' and watcher.swap_count == 1
+    assert watcher.status()['current_version'] == broken
+    watcher.check()   # 같은 오류는 한 번만 출력
+    assert capsys.readouterr().out.count('로드 실패') == 1
+
+    # 명시적 롤백/교체도 실패하면 서빙 모델과 CURRENT가 바뀌지 않음
+    with pytest.raises(ValueError):
+        watcher.activate(broken)
+    assert watcher.active is active
+
+    v3 = publish_model(registry, tmp_path, 'v3')
+    assert watcher.check() is True
+    assert watcher.active.version == v3 and watcher.last_error is None
+    assert watcher.rollback(v1).bundle == 'v1'
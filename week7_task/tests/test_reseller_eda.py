@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import sales_fact
+from frame_response import to_records
+
+# 두 엔진은 합산 순서가 다릅니다 (SQLite SUM은 순차 합, pandas는 pairwise 합).
+# 금액 합계는 이 허용 오차 안에서만 같고, 나머지 값(개수, 키, 순서)은 정확히 같아야 합니다.
+REL_TOL = 1e-9
+ABS_TOL = 1e-6
+
+
+@pytest.fixture
+def eda_db(tmp_path, monkeypatch):
+    """main.DB_PATH(상대 경로) 위치에 리셀러/B2C 판매가 섞인 작은 DB를 만들고 그 폴더로 이동."""
+    rng = np.random.default_rng(7)
+    n = 20000
+    dates = pd.DataFrame({'DateKey': np.arange(800), 'Date': pd.date_range('2019-01-01', periods=800).strftime('%Y-%m-%d')})
+    resellers = pd.DataFrame({'ResellerKey': np.arange(1, 61),
+                              'Business Type': rng.choice(['Warehouse', 'Value Added Reseller', 'Specialty Bike Shop'], 60)})
+    territories = pd.DataFrame({'SalesTerritoryKey': np.arange(1, 11),
+                                'Country': rng.choice(['United States', 'Canada', 'France', 'Germany'], 10)})
+    customers = pd.DataFrame({'CustomerKey': np.arange(1, 501), 'Country-Region': 'United States'})
+    b2c = rng.random(n) < 0.4
+    sales = pd.DataFrame({
+        'SalesOrderLineKey': np.arange(n),
+        'ResellerKey': np.where(b2c, -1, rng.integers(1, 65, n)),       # 61~64: 리셀러 테이블에 없는 키
+        'CustomerKey': np.where(b2c, rng.integers(1, 501, n), -1),
+        'OrderDateKey': rng.integers(0, 820, n),                        # 800~819: 날짜 테이블에 없는 키
+        'SalesTerritoryKey': rng.integers(1, 12, n),                    # 11: 지역 테이블에 없는 키
+        'Sales Amount': np.round(rng.lognormal(6, 2, n), 4),
+    })
+    monkeypatch.chdir(tmp_path)
+    os.makedirs(os.path.dirname(main.DB_PATH))
+    conn = sqlite3.connect(main.DB_PATH)
+    for name, df in (('Sales', sales), ('Date', dates), ('Resellers', resellers),
+                     ('Territories', territories), ('Customers', customers)):
+        df.to_sql(name, conn, index=False)
+    sales_fact.build_sales_fact(conn)
+    yield conn
+    conn.close()
+
+
+def baseline_reseller_eda(conn):
+    """최적화 전 /analysis/reseller_eda의 계산 (테이블 4개를 읽어 pandas merge + groupby)."""
+    df_sales = pd.read_sql("SELECT OrderDateKey, ResellerKey, SalesTerritoryKey, [Sales Amount] FROM Sales WHERE ResellerKey != -1", conn)
+    df_resellers = pd.read_sql("SELECT ResellerKey, [Business Type] FROM Resellers", conn)
+    df_territories = pd.read_sql("SELECT SalesTerritoryKey, Country FROM Territories", conn)
+    df_dates = pd.read_sql("SELECT DateKey, Date FROM Date", conn)
+    merged_df = pd.merge(df_sales, df_resellers, on='ResellerKey')
+    merged_df = pd.merge(merged_df, df_territories, on='SalesTerritoryKey')
+    merged_df = pd.merge(merged_df, df_dates, left_on='OrderDateKey', right_on='DateKey')
+    merged_df['Date'] = pd.to_datetime(merged_df['Date'])
+    sales_by_biz = merged_df.groupby('Business Type')['Sales Amount'].sum().reset_index().sort_values(by='Sales Amount', ascending=False)
+    sales_by_country = merged_df.groupby('Country')['Sales Amount'].sum().reset_index()
+    df_time = merged_df.set_index('Date').resample('M')['Sales Amount'].sum().reset_index()
+    df_time['Date'] = df_time['Date'].astype(str)
+    return {
+        "summary_stats": {"total_sales": df_sales['Sales Amount'].sum(), "total_orders": len(df_sales),
+                          "unique_reseller_types": df_resellers['Business Type'].nunique()},
+        "sales_by_biz_type": sales_by_biz.to_dict('records'),
+        "sales_by_country": sales_by_country.to_dict('records'),
+        "sales_over_time": df_time.to_dict('records')
+    }
+
+
+def assert_same_result(a, b, path='result'):
+    if isinstance(a, dict):
+        assert a.keys() == b.keys(), path
+        for key in a:
+            assert_same_result(a[key], b[key], f'{path}.{key}')
+    elif isinstance(a, list):
+        assert len(a) == len(b), path
+        for i, (x, y) in enumerate(zip(a, b)):
+            assert_same_result(x, y, f'{path}[{i}]')
+    elif isinstance(a, float) or isinstance(b, float):
+        assert a == pytest.approx(b, rel=REL_TOL, abs=ABS_TOL), path
+    else:
+        assert a == b, path
+
+
+def test_sql_engine_matches_pandas_within_tolerance(eda_db):
+    pandas_result = to_records(main.compute_reseller_eda(eda_db))
+    sql_result = to_records(main.compute_reseller_eda_sql(eda_db))
+    assert len(pandas_result['sales_over_time']) > 12
+    assert_same_result(pandas_result, sql_result)
+
+
+@pytest.mark.parametrize('engine', main.EDA_ENGINES)
+def test_cached_endpoint_matches_baseline(eda_db, engine, monkeypatch):
+    expected = baseline_reseller_eda(eda_db)
+    acquired = []
+    acquire = main.db_pool.acquire
+    monkeypatch.setattr(main.db_pool, 'acquire', lambda: acquired.append(1) or acquire())
+    for name in main.EDA_ENGINES:
+        main.analysis_cache.invalidate(f'reseller_eda:{name}')
+    client = TestClient(main.app)   # with 블록 없이 사용: lifespan 종료 시 공유 작업 풀을 닫지 않도록
+
+    first = client.get('/analysis/reseller_eda', params={'engine': engine})
+    assert first.status_code == 200 and len(acquired) == 1
+    assert_same_result(first.json(), expected)
+
+    # 캐시 적중과 304 응답은 DB 연결을 빌리지 않음
+    cached = client.get('/analysis/reseller_eda', params={'engine': engine})
+    assert cached.status_code == 200 and cached.json() == first.json()
+    not_modified = client.get('/analysis/reseller_eda', params={'engine': engine},
+                              headers={'If-None-Match': first.headers['etag']})
+    assert not_modified.status_code == 304
+    assert len(acquired) == 1
+
+    refreshed = client.post('/analysis/reseller_eda/refresh', params={'engine': engine})
+    assert refreshed.status_code == 200 and len(acquired) == 2
+    assert_same_result(client.get('/analysis/reseller_eda', params={'engine': engine}).json(), expected)
@@ -0,0 +1,71 @@
+# -*- coding: utf-8 -*-
+import numpy as np
+import pandas as pd
+import pytest
+
+from rfm import OTHER_SEGMENT, assign_segments, match_segment, quintile_scores, score_rfm
+
+
+def rowwise_segments(rfm_df):
+    """기존 방식: 점수 문자열을 만들고 행마다 Series.apply로 정규식 매칭."""
+    scores = rfm_df['R_Score'].astype(str) + rfm_df['F_Score'].astype(str) + rfm_df['M_Score'].astype(str)
+    return scores.apply(match_segment)
+
+
+def test_lookup_matches_regex_for_all_score_combinations():
+    grid = pd.DataFrame([(r, f, m) for r in range(1, 6) for f in range(1, 6) for m in range(1, 6)],
+                        columns=['R_Score', 'F_Score', 'M_Score'])
+    segments = assign_segments(grid['R_Score'], grid['F_Score'], grid['M_Score'])
+    assert list(segments) == list(rowwise_segments(grid))
+
+
+def test_out_of_range_scores_are_other():
+    assert list(assign_segments([0, 6, 5], [3, 3, 0], [3, 3, 5])) == [OTHER_SEGMENT] * 3
+
+
+def rfm_frame(recency, frequency, monetary):
+    return pd.DataFrame({'CustomerKey': np.arange(len(recency)), 'Recency': recency,
+                         'Frequency': frequency, 'Monetary': monetary})
+
+
+EDGE_CASES = {
+    # 경계값 동점이 많은 데이터 (R은 qcut 경계가 겹쳐 분위가 줄어듦, F/M은 순위로 동점 분리)
+    'ties': rfm_frame([1, 1, 1, 1, 2, 2, 2, 30, 30, 400] * 10, [1, 1, 1, 2, 2, 2, 3, 3, 9, 9] * 10,
+                      [10.0, 10.0, 10.0, 10.0, 20.0, 20.0, 20.0, 55.5, 55.5, 999.0] * 10),
+    # Recency 값 종류가 5개보다 적음 → qcut duplicates='drop'
+    'qcut_duplicates': rfm_frame([0] * 80 + [5] * 15 + [90] * 5, np.arange(100) % 7 + 1, np.linspace(1, 500, 100)),
+    # 모든 고객의 Frequency가 같음
+    'equal_frequency': rfm_frame(np.arange(100) * 3, [4] * 100, np.arange(100)[::-1] * 1.5),
+    # 모든 값이 같음 (분위 경계가 하나로 합쳐짐)
+    'all_equal': rfm_frame([7] * 20, [1] * 20, [100.0] * 20),
+    # 고객 수가 5명보다 적음
+    'few_customers': rfm_frame([3, 10], [1, 2], [5.0, 5.0]),
+}
+
+
+@pytest.mark.parametrize('case', list(EDGE_CASES))
+def test_score_rfm_segments_match_rowwise(case):
+    rfm_df = score_rfm(EDGE_CASES[case].copy())
+    for col in ('R_Score', 'F_Score', 'M_Score'):
+        assert rfm_df[col].between(1, 5).all(), col
+    expected_score = (rfm_df['R_Score'].astype(str) + rfm_df['F_Score'].astype(str)
+                      + rfm_df['M_Score'].astype(str))
+    assert (rfm_df['RFM_Score'] == expected_score).all()
+    assert list(rfm_df['Segment']) == list(rowwise_segments(rfm_df))
+
+
+def test_quintile_scores_match_labelled_qcut_without_duplicates():
+    values = pd.Series(np.random.default_rng(0).permutation(1000))
+    np.testing.assert_array_equal(quintile_scores(values), pd.qcut(values, 5, labels=range(1, 6)).astype(int))
+    np.testing.assert_array_equal(quintile_scores(values, reverse=True),
+                                  pd.qcut(values, 5, labels=range(5, 0, -1)).astype(int))
+
+
+def test_quintile_scores_with_duplicate_edges():
+    recency = pd.Series([0] * 80 + [5] * 15 + [90] * 5)
+    scores = quintile_scores(recency, reverse=True)
+    # 최근 구매(작은 Recency)일수록 점수가 높고, 같은 값은 같은 점수
+    assert scores.groupby(recency).nunique().eq(1).all()
+    assert scores[recency == 0].iloc[0] == 5
+    assert scores.is_monotonic_decreasing
+    assert (quintile_scores(pd.Series([3] * 10)) == 1).all()
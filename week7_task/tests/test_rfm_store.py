@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import import_excel_to_db
+import rfm_store
+
+
+@pytest.fixture
+def sales_db(tmp_path):
+    """B2C/리셀러 판매가 섞인 작은 Sales/Date DB에 optimize_schema(커버링 인덱스 + ANALYZE)를 적용."""
+    rng = np.random.default_rng(0)
+    n = 5000
+    dates = pd.DataFrame({'DateKey': np.arange(20200101, 20200101 + 365),
+                          'Date': pd.date_range('2020-01-01', periods=365).strftime('%Y-%m-%d')})
+    b2c = rng.random(n) < 0.6
+    sales = pd.DataFrame({
+        'SalesOrderLineKey': np.arange(n),
+        'ResellerKey': np.where(b2c, -1, rng.integers(1, 700, n)),
+        'CustomerKey': np.where(b2c, rng.integers(1, 1000, n), -1),
+        'OrderDateKey': rng.choice(dates['DateKey'], n),
+        'SalesTerritoryKey': rng.integers(1, 10, n),
+        'Sales Amount': rng.random(n) * 100,
+    })
+    db_path = str(tmp_path / 'sales.sqlite3')
+    conn = sqlite3.connect(db_path)
+    sales.to_sql('Sales', conn, index=False)
+    dates.to_sql('Date', conn, index=False)
+    import_excel_to_db.optimize_schema(conn, explain=False)
+    conn.close()
+    return db_path, sales, dates
+
+
+def test_new_sales_query_uses_rowid_range(sales_db, tmp_path):
+    db_path, _, _ = sales_db
+    store = rfm_store.RFMStore(db_path, str(tmp_path / 'rfm_state.sqlite3'))
+    conn = store._connect()
+    try:
+        indexes = [r[0] for r in conn.execute("SELECT name FROM src.sqlite_master WHERE type = 'index'")]
+        assert 'idx_sales_channel' in indexes
+        plan = [row[-1] for row in conn.execute("EXPLAIN QUERY PLAN" + rfm_store.NEW_SALES_SELECT, (100, 200))]
+    finally:
+        conn.close()
+    sales_plan = [detail for detail in plan if detail.startswith(('SEARCH s ', 'SCAN s'))]
+    assert sales_plan == ['SEARCH s USING INTEGER PRIMARY KEY (rowid>? AND rowid<?)'], plan
+
+
+def test_ingest_matches_full_recompute(sales_db, tmp_path):
+    db_path, sales, dates = sales_db
+    store = rfm_store.RFMStore(db_path, str(tmp_path / 'rfm_state.sqlite3'))
+    assert store.ingest()['new_rows'] == int((sales['ResellerKey'] == -1).sum())
+    assert store.ingest()['new_rows'] == 0
+
+    b2c = sales[sales['ResellerKey'] == -1].merge(dates, left_on='OrderDateKey', right_on='DateKey')
+    expected = b2c.groupby('CustomerKey').agg(Frequency=('Date', 'nunique'), Monetary=('Sales Amount', 'sum'))
+    actual = store.load_rfm().set_index('CustomerKey')
+    pd.testing.assert_series_equal(actual['Frequency'], expected['Frequency'], check_dtype=False)
+    pd.testing.assert_series_equal(actual['Monetary'], expected['Monetary'], check_exact=False)
+
+
+def expected_rfm(db_path):
+    """DB의 전체 B2C 판매 이력으로 다시 계산한 고객별 Frequency/Monetary (상태 저장소와 비교용)."""
+    with sqlite3.connect(db_path) as conn:
+        b2c = pd.read_sql("SELECT s.CustomerKey, d.Date, s.[Sales Amount] FROM Sales s "
+                          "JOIN Date d ON s.OrderDateKey = d.DateKey WHERE s.ResellerKey = -1 AND s.CustomerKey != -1",
+                          conn)
+    return b2c.groupby('CustomerKey').agg(Frequency=('Date', 'nunique'), Monetary=('Sales Amount', 'sum'))
+
+
+def assert_store_matches(store, db_path):
+    expected = expected_rfm(db_path)
+    actual = store.load_rfm().set_index('CustomerKey')
+    pd.testing.assert_series_equal(actual['Frequency'], expected['Frequency'], check_dtype=False)
+    pd.testing.assert_series_equal(actual['Monetary'], expected['Monetary'], check_exact=False)
+
+
+def append_sales(db_path, n, seed):
+    """워터마크 뒤(rowid 증가)에 기존 고객과 새 고객의 B2C 판매 n행을 추가합니다."""
+    rng = np.random.default_rng(seed)
+    with sqlite3.connect(db_path) as conn:
+        next_key = conn.execute("SELECT MAX(SalesOrderLineKey) + 1 FROM Sales").fetchone()[0]
+        date_keys = [r[0] for r in conn.execute("SELECT DateKey FROM Date")]
+        conn.executemany(
+            "INSERT INTO Sales (SalesOrderLineKey, ResellerKey, CustomerKey, OrderDateKey, SalesTerritoryKey, [Sales Amount]) "
+            "VALUES (?, -1, ?, ?, 1, ?)",
+            [(next_key + i, int(rng.integers(1, 1200)), int(rng.choice(date_keys)), float(rng.random() * 100))
+             for i in range(n)])
+
+
+def set_sales_generation(db_path, generation):
+    with sqlite3.connect(db_path) as conn:
+        conn.executescript(import_excel_to_db.IMPORT_META_SCHEMA)
+        import_excel_to_db.set_import_meta(conn, 'Sales', None, generation)
+
+
+def test_appended_rows_are_ingested_on_read(sales_db, tmp_path):
+    db_path, _, _ = sales_db
+    set_sales_generation(db_path, 1)
+    store = rfm_store.RFMStore(db_path, str(tmp_path / 'rfm_state.sqlite3'))
+    store.ingest()
+    append_sales(db_path, 200, seed=1)
+    result = store.ingest(verify=False)
+    assert (result['rebuilt'], result['new_rows']) == (False, 200)
+    assert_store_matches(store, db_path)
+    assert store.ingest(verify=False)['new_rows'] == 0
+
+
+def test_generation_change_rebuilds(sales_db, tmp_path):
+    db_path, _, _ = sales_db
+    set_sales_generation(db_path, 1)
+    store = rfm_store.RFMStore(db_path, str(tmp_path / 'rfm_state.sqlite3'))
+    store.ingest()
+    # 증분 임포트가 기존 행을 수정하고 세대를 올린 경우 (워터마크 위치의 행은 그대로)
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE Sales SET [Sales Amount] = [Sales Amount] + 1000 "
+                     "WHERE rowid < 2000 AND ResellerKey = -1")
+    set_sales_generation(db_path, 2)
+    append_sales(db_path, 50, seed=2)
+    result = store.ingest(verify=False)
+    assert result['rebuilt']
+    assert_store_matches(store, db_path)
+
+
+def test_legacy_checksum_only_on_explicit_ingest(sales_db, tmp_path, monkeypatch):
+    db_path, _, _ = sales_db   # _import_meta 없음 → 세대 없음
+    store = rfm_store.RFMStore(db_path, str(tmp_path / 'rfm_state.sqlite3'))
+    store.ingest()
+    ranges = []
+    checksum = rfm_store.RFMStore._sales_checksum
+    monkeypatch.setattr(rfm_store.RFMStore, '_sales_checksum',
+                        staticmethod(lambda conn, lo, hi: ranges.append((lo, hi)) or checksum(conn, lo, hi)))
+
+    # 분석 요청 경로: 새 rowid 범위의 체크섬만 더하고(전체 스캔 없음), 더한 값은 전체를 다시 계산한 값과 같음
+    append_sales(db_path, 100, seed=3)
+    assert store.ingest(verify=False)['new_rows'] == 100
+    assert ranges == [(5000, 5100)]
+    assert not store.ingest()['rebuilt']
+
+    # 기존 행 수정은 분석 요청 경로에서는 확인하지 않고, 명시적 ingest에서 체크섬으로 찾아 다시 계산
+    with sqlite3.connect(db_path) as conn:
+        conn.execute("UPDATE Sales SET [Sales Amount] = [Sales Amount] + 1000 WHERE rowid < 2000 AND ResellerKey = -1")
+    append_sales(db_path, 100, seed=4)
+    ranges.clear()
+    assert (store.ingest(verify=False)['rebuilt'], ranges) == (False, [(5100, 5200)])
+    assert store.ingest()['rebuilt']
+    assert_store_matches(store, db_path)
@@ -0,0 +1,94 @@
+# -*- coding: utf-8 -*-
+import sqlite3
+
+import numpy as np
+import pandas as pd
+import pytest
+from xgboost import XGBClassifier
+
+import import_excel_to_db
+import score_customers
+from rfm import compute_rfm
+from train import build_preprocessor
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.model_registry import ModelRegistry
+
+NUMERICAL = ['Recency_Snapshot', 'Frequency', 'Monetary']
+
+
+def reference_features(db_path):
+    """전체 B2C 판매 이력을 한 번에 읽어 계산한 피처 (청크로 나누지 않은 기준값)."""
+    with sqlite3.connect(db_path) as conn:
+        sales = pd.read_sql("SELECT s.CustomerKey, d.Date, s.[Sales Amount] FROM Sales s "
+                            "JOIN Date d ON s.OrderDateKey = d.DateKey WHERE s.ResellerKey = -1 AND s.CustomerKey != -1",
+                            conn, parse_dates=['Date'])
+        customers = pd.read_sql("SELECT CustomerKey, [Country-Region] FROM Customers", conn)
+    snapshot = sales['Date'].max().normalize()
+    features = pd.merge(compute_rfm(sales, snapshot, recency_col='Recency_Snapshot'), customers, on='CustomerKey', how='left')
+    return features.replace([np.inf, -np.inf], np.nan), snapshot
+
+
+@pytest.fixture
+def scoring_setup(workbook, tmp_path, monkeypatch):
+    """임포트한 DB + 그 피처로 학습해 레지스트리에 등록한 작은 모델."""
+    excel_path, db_path, _ = workbook
+    import_excel_to_db.import_excel_to_sqlite(excel_path, db_path)
+    features, snapshot = reference_features(db_path)
+    X = features[score_customers.FEATURES]
+    y = (features['Frequency'] > features['Frequency'].median()).astype(int)
+    preprocessor = build_preprocessor(NUMERICAL, ['Country-Region'])
+    model = XGBClassifier(n_estimators=20, max_depth=3, random_state=0).fit(preprocessor.fit_transform(X), y)
+
+    registry_dir = str(tmp_path / 'registry')
+    monkeypatch.setenv('MODEL_REGISTRY_DIR', registry_dir)   # spawn으로 시작한 작업 프로세스도 같은 레지스트리 사용
+    monkeypatch.setattr(score_customers, 'MODEL_REGISTRY_DIR', registry_dir)
+    version = ModelRegistry(registry_dir).publish(objects={'model': model, 'preprocessor': preprocessor})
+    return db_path, features, snapshot, model, preprocessor, version
+
+
+def per_row_scores(features, model, preprocessor):
+    """고객마다 transform + predict_proba를 따로 실행한 결과 (CustomerKey 순)."""
+    rows = []
+    for i in range(len(features)):
+        row = features.iloc[[i]]
+        probability = model.predict_proba(preprocessor.transform(row[score_customers.FEATURES]))[0]
+        rows.append((int(row['CustomerKey'].iloc[0]), int(model.classes_[probability.argmax()]), float(probability[1])))
+    return pd.DataFrame(rows, columns=['CustomerKey', 'will_purchase_prediction', 'probability_to_purchase'])
+
+
+@pytest.mark.parametrize('output, workers', [('table', 1), ('parquet', 1), ('table', 2)])
+def test_chunked_scores_match_per_row_predict_proba(scoring_setup, tmp_path, output, workers):
+    db_path, features, snapshot, model, preprocessor, version = scoring_setup
+    scores_db_path = str(tmp_path / 'scores.sqlite3')
+    parquet_path = str(tmp_path / 'scores.parquet')
+    if output == 'parquet':
+        pytest.importorskip('pyarrow')
+
+    result = score_customers.score_customers(db_path, output=output, scores_db_path=scores_db_path,
+                                             parquet_path=parquet_path, chunk_customers=7, workers=workers)
+    assert result['customers'] == len(features) and result['chunks'] == -(-len(features) // 7)
+    assert (result['model_version'], result['snapshot_date']) == (version, str(snapshot.date()))
+
+    if output == 'table':
+        with sqlite3.connect(scores_db_path) as conn:
+            scores = pd.read_sql(f"SELECT * FROM {score_customers.SCORES_TABLE} ORDER BY CustomerKey", conn)
+            assert conn.execute("SELECT name FROM sqlite_master WHERE name LIKE '%_tmp'").fetchall() == []
+    else:
+        scores = pd.read_parquet(parquet_path).sort_values('CustomerKey', ignore_index=True)
+
+    expected = per_row_scores(features.sort_values('CustomerKey', ignore_index=True), model, preprocessor)
+    pd.testing.assert_series_equal(scores['CustomerKey'], expected['CustomerKey'], check_dtype=False)
+    pd.testing.assert_series_equal(scores['will_purchase_prediction'], expected['will_purchase_prediction'],
+                                   check_dtype=False)
+    np.testing.assert_allclose(scores['probability_to_purchase'], expected['probability_to_purchase'],
+                               rtol=1e-6, atol=1e-7)
+    # 피처도 청크로 나누지 않은 계산과 같음
+    reference = features.sort_values('CustomerKey', ignore_index=True)
+    for col in NUMERICAL:
+        np.testing.assert_allclose(scores[col].astype(float), reference[col].astype(float), rtol=1e-12)
+    assert (scores['model_version'] == version).all()
+
+
+def test_scores_db_must_differ_from_analysis_db(scoring_setup):
+    db_path = scoring_setup[0]
+    assert score_customers.score_customers(db_path, scores_db_path=db_path, chunk_customers=7) is None
@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+import json
+
+import import_excel_to_db
+import train
+import tuning
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.model_registry import ModelRegistry
+from conftest import make_sheets, write_workbook
+
+
+def test_tuning_with_space_overriding_default_params(tmp_path, monkeypatch):
+    """탐색 공간에 학습 기본값과 같은 이름(random_state, scale_pos_weight)이 있어도 탐색과 최종 학습이 그 값으로 실행됨."""
+    monkeypatch.chdir(tmp_path)
+    excel_path = tmp_path / 'data' / 'AdventureWorks-Sales.xlsx'
+    excel_path.parent.mkdir()
+    write_workbook(str(excel_path), make_sheets(n_sales=600))
+    import_excel_to_db.import_excel_to_sqlite(str(excel_path), train.DB_PATH)
+
+    space_path = tmp_path / 'space.json'
+    space_path.write_text(json.dumps({'max_depth': [2, 3], 'random_state': [7], 'scale_pos_weight': [1.0]}),
+                          encoding='utf-8')
+    monkeypatch.setattr(tuning, 'TUNE_SPACE_PATH', str(space_path))
+    monkeypatch.setattr(train, 'MODEL_REGISTRY_DIR', str(tmp_path / 'registry'))
+
+    train.train_model(tune=True)
+
+    registry = ModelRegistry(str(tmp_path / 'registry'))
+    manifest, loaded = registry.load(registry.current_version(), names=['model'])
+    assert manifest['info']['tuned'] is True
+    params = manifest['info']['params']
+    assert params['max_depth'] in (2, 3) and params['n_estimators'] >= 1
+    model_params = loaded['model'].get_params()
+    assert (model_params['random_state'], model_params['scale_pos_weight']) == (7, 1.0)
+    assert model_params['max_depth'] == params['max_depth'] and model_params['eval_metric'] == 'logloss'
+    assert (tmp_path / train.TUNING_RESULTS_PATH).exists()
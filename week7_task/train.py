@@ -1,6 +1,5 @@
 # -*- coding: utf-8 -*-
 import pandas as pd
-import sqlite3
 import joblib
 from sklearn.model_selection import train_test_split
 from sklearn.preprocessing import StandardScaler, OneHotEncoder
@@ -10,15 +9,27 @@ from sklearn.impute import SimpleImputer
 from sklearn.metrics import accuracy_score, precision_score, recall_score, f1_score, roc_auc_score
 from xgboost import XGBClassifier
 import os
+import sys
 import datetime
 import numpy as np
+from rfm import compute_rfm
+from columnar import load_table
+from sales_fact import load_sales_fact
+import common_path  # noqa: F401  (저장소 루트의 common/ 패키지)
+from common.model_registry import ModelRegistry
+from model_bundle import BUNDLE_PATH, export_bundle
 
 # --- 상수 정의 ---
 DB_PATH = os.path.join('data', 'AdventureWorks-Sales.sqlite3')
 MODEL_DIR = 'models'
 MODEL_PATH = os.path.join(MODEL_DIR, 'model.joblib')
 PREPROCESSOR_PATH = os.path.join(MODEL_DIR, 'preprocessor.joblib')
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR', os.path.join(MODEL_DIR, 'registry'))
 PREDICTION_WINDOW_DAYS = 30
+TUNING_RESULTS_PATH = os.path.join(MODEL_DIR, 'tuning_results.csv')
+
+# 기본 모델 하이퍼파라미터 (--tune으로 찾은 값이 있으면 덮어씀)
+DEFAULT_PARAMS = {'n_estimators': 100, 'learning_rate': 0.1}
 
 def load_data(db_path):
     """(B2C 고객) SQLite에서 데이터 로드. [CẬP NHẬT] Customers 테이블 추가."""
@@ -27,21 +38,18 @@ def load_data(db_path):
         print(f"오류: '{db_path}'에서 데이터베이스 파일을 찾을 수 없습니다.")
         return None, None
     try:
-        conn = sqlite3.connect(db_path)
-        # B2C 판매 데이터 로드
-        df_sales = pd.read_sql("SELECT CustomerKey, OrderDateKey, [Sales Amount] FROM Sales WHERE ResellerKey = -1 AND CustomerKey != -1", conn)
-        df_dates = pd.read_sql("SELECT DateKey, Date FROM Date", conn)
+        # 열 기반 캐시(data/columnar/)가 최신이면 Feather 파일에서, 아니면 SQLite에서 필요한 열만 읽음
+        # B2C 판매 데이터 로드 (임포트 때 날짜를 조인해 둔 SalesFact 사용, Date는 datetime64)
+        df_sales = load_sales_fact(db_path, ['ResellerKey', 'CustomerKey', 'Date', 'Sales Amount'])
+        df_sales = df_sales.loc[(df_sales['ResellerKey'] == -1) & (df_sales['CustomerKey'] != -1)
+                                & df_sales['Date'].notna(), ['CustomerKey', 'Date', 'Sales Amount']]
         
         # 고객 테이블 로드 (Country-Region 특성 사용)
-        df_customers = pd.read_sql("SELECT CustomerKey, [Country-Region] FROM Customers WHERE CustomerKey != -1", conn)
-        
-        conn.close()
-        
-        df_merged = pd.merge(df_sales, df_dates, left_on='OrderDateKey', right_on='DateKey')
-        df_merged['Date'] = pd.to_datetime(df_merged['Date'])
+        df_customers = load_table(db_path, 'Customers', ['CustomerKey', 'Country-Region'])
+        df_customers = df_customers[df_customers['CustomerKey'] != -1].reset_index(drop=True)
         
         # 이제 sales_data와 customers_data를 반환
-        return df_merged[['CustomerKey', 'Date', 'Sales Amount']], df_customers
+        return df_sales.reset_index(drop=True), df_customers
     except Exception as e:
         print(f"데이터 로딩 오류: {e}")
         return None, None
@@ -57,12 +65,8 @@ def feature_engineering(df_sales_data, df_customers):
     # 2. 특성 (X) 생성 - 과거 데이터 (snapshot_date 이전)
     df_features_sales = df_sales_data[df_sales_data['Date'] <= snapshot_date]
     
-    # RFM 계산
-    rfm_features = df_features_sales.groupby('CustomerKey').agg(
-        Recency_Snapshot=('Date', lambda x: (snapshot_date - x.max()).days),
-        Frequency=('Date', 'nunique'),
-        Monetary=('Sales Amount', 'sum')
-    ).reset_index()
+    # RFM 계산 (main.py API와 같은 rfm.compute_rfm 사용)
+    rfm_features = compute_rfm(df_features_sales, snapshot_date, recency_col='Recency_Snapshot')
 
     # 3. 타겟 (Y) 생성 - 미래 데이터 (prediction_window 내부)
     df_target_window = df_sales_data[df_sales_data['Date'] > snapshot_date]
@@ -78,8 +82,33 @@ def feature_engineering(df_sales_data, df_customers):
     
     return rfm_features
 
-def train_model():
-    """분류 모델 학습을 위한 메인 함수."""
+def build_preprocessor(numerical_features, categorical_features):
+    """숫자형(중앙값 대체 + 표준화) / 범주형('Missing' 대체 + 원-핫) 전처리기."""
+    # 숫자형 파이프라인 (변경 없음)
+    numeric_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='median')),
+        ('scaler', StandardScaler())
+    ])
+    
+    # 범주형 파이프라인 (새로 추가)
+    categorical_transformer = Pipeline(steps=[
+        ('imputer', SimpleImputer(strategy='constant', fill_value='Missing')), # 결측치를 'Missing'으로 채움
+        ('onehot', OneHotEncoder(handle_unknown='ignore')) # 원-핫 인코딩
+    ])
+    
+    # ColumnTransformer가 이제 두 파이프라인을 모두 처리
+    return ColumnTransformer(
+        transformers=[
+            ('num', numeric_transformer, numerical_features),
+            ('cat', categorical_transformer, categorical_features)
+        ])
+
+def train_model(tune=False):
+    """
+    분류 모델 학습을 위한 메인 함수.
+    tune=True이면 학습 데이터로 k-fold 교차 검증 하이퍼파라미터 탐색(tuning.py)을 먼저 실행하고,
+    찾은 파라미터로 최종 모델을 학습합니다.
+    """
     
     # 1. 데이터 로드
     # 2개의 DF 로드
@@ -110,28 +139,16 @@ def train_model():
     categorical_features = ['Country-Region']
     
     # 5. 전처리기 파이프라인 구성
-    
-    # 숫자형 파이프라인 (변경 없음)
-    numeric_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy='median')),
-        ('scaler', StandardScaler())
-    ])
-    
-    # 범주형 파이프라인 (새로 추가)
-    categorical_transformer = Pipeline(steps=[
-        ('imputer', SimpleImputer(strategy='constant', fill_value='Missing')), # 결측치를 'Missing'으로 채움
-        ('onehot', OneHotEncoder(handle_unknown='ignore')) # 원-핫 인코딩
-    ])
-    
-    # ColumnTransformer가 이제 두 파이프라인을 모두 처리
-    preprocessor = ColumnTransformer(
-        transformers=[
-            ('num', numeric_transformer, numerical_features),
-            ('cat', categorical_transformer, categorical_features)
-        ])
+    preprocessor = build_preprocessor(numerical_features, categorical_features)
     
     # 6. 데이터 분리
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42, stratify=y)
+
+    # (선택) 하이퍼파라미터 탐색: 학습 데이터만 사용 (테스트 데이터는 최종 평가용으로 남김)
+    params = dict(DEFAULT_PARAMS)
+    if tune:
+        from tuning import tune as run_tuning
+        _, params = run_tuning(preprocessor, X_train, y_train, results_path=TUNING_RESULTS_PATH)
     
     # 7. 전처리기 학습
     print("전처리기 학습 중 (RFM + 국가)...")
@@ -140,20 +157,29 @@ def train_model():
     
     # 8. 모델 학습 (XGBClassifier)
     print("XGBClassifier 모델 학습 중...")
-    scale_pos_weight = (y_train == 0).sum() / (y_train == 1).sum()
-    model = XGBClassifier(n_estimators=100, learning_rate=0.1, random_state=42, use_label_encoder=False, eval_metric='logloss', scale_pos_weight=scale_pos_weight)
+    # 탐색 공간(TUNE_SPACE)에 같은 이름의 파라미터(random_state, scale_pos_weight 등)가 있으면 그 값을 사용
+    defaults = {'random_state': 42, 'use_label_encoder': False, 'eval_metric': 'logloss',
+                'scale_pos_weight': (y_train == 0).sum() / (y_train == 1).sum()}
+    model = XGBClassifier(**{**defaults, **params})
     model.fit(X_train_processed, y_train)
     
     # 9. 모델 평가
     y_pred = model.predict(X_test_processed)
     y_pred_proba = model.predict_proba(X_test_processed)[:, 1]
     
+    metrics = {
+        'accuracy': accuracy_score(y_test, y_pred),
+        'precision': precision_score(y_test, y_pred),
+        'recall': recall_score(y_test, y_pred),
+        'f1': f1_score(y_test, y_pred),
+        'roc_auc': roc_auc_score(y_test, y_pred_proba),
+    }
     print("\n--- 모델 평가 (분류) ---")
-    print(f"Accuracy (정확도): \t{accuracy_score(y_test, y_pred):.4f}")
-    print(f"Precision (정밀도): \t{precision_score(y_test, y_pred):.4f}")
-    print(f"Recall (재현율): \t\t{recall_score(y_test, y_pred):.4f}")
-    print(f"F1-Score (F1 점수): \t{f1_score(y_test, y_pred):.4f}")
-    print(f"ROC-AUC Score (AUC): \t{roc_auc_score(y_test, y_pred_proba):.4f}")
+    print(f"Accuracy (정확도): \t{metrics['accuracy']:.4f}")
+    print(f"Precision (정밀도): \t{metrics['precision']:.4f}")
+    print(f"Recall (재현율): \t\t{metrics['recall']:.4f}")
+    print(f"F1-Score (F1 점수): \t{metrics['f1']:.4f}")
+    print(f"ROC-AUC Score (AUC): \t{metrics['roc_auc']:.4f}")
     
     # 10. 모델 및 전처리기 저장
     os.makedirs(MODEL_DIR, exist_ok=True)
@@ -163,5 +189,20 @@ def train_model():
     print(f"\n모델 저장 완료: {MODEL_PATH}")
     print(f"전처리기 저장 완료: {PREPROCESSOR_PATH}")
 
+    # 서빙용 단일 파일 번들 (전처리기 파라미터 + XGBoost UBJ 부스터, 메모리 매핑 로드용)
+    export_bundle(model, preprocessor, BUNDLE_PATH)
+    print(f"서빙 번들 저장 완료: {BUNDLE_PATH}")
+
+    # 11. 레지스트리에 새 버전으로 등록 (모델 + 전처리기 + 지표). 실행 중인 API가 자동으로 교체합니다.
+    version = ModelRegistry(MODEL_REGISTRY_DIR).publish(
+        objects={'model': model, 'preprocessor': preprocessor},
+        files={'bundle': BUNDLE_PATH},
+        metrics={k: float(v) for k, v in metrics.items()},
+        info={'params': params, 'tuned': tune, 'features': features_list,
+              'train_rows': len(X_train), 'test_rows': len(X_test)})
+    print(f"모델 레지스트리 등록 완료: {MODEL_REGISTRY_DIR} (버전 {version})")
+
+# python train.py         → 기본 파라미터로 학습
+# python train.py --tune  → 하이퍼파라미터 탐색 후 최적 파라미터로 학습 (결과: models/tuning_results.csv)
 if __name__ == "__main__":
-    train_model()
\ No newline at end of file
+    train_model(tune="--tune" in sys.argv)
\ No newline at end of file
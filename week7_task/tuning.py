@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+import json
+import math
+import os
+import time
+
+import numpy as np
+import pandas as pd
+from joblib import Parallel, delayed
+from sklearn.base import clone
+from sklearn.metrics import f1_score, log_loss, roc_auc_score
+from sklearn.model_selection import ParameterGrid, ParameterSampler, StratifiedKFold
+from xgboost import XGBClassifier
+
+# 하이퍼파라미터 탐색 설정 (환경 변수로 조정 가능)
+TUNE_FOLDS = int(os.getenv('TUNE_FOLDS', '5'))                        # Stratified k-fold 개수
+TUNE_JOBS = int(os.getenv('TUNE_JOBS', '-1'))                         # 병렬 작업 수 (-1: 모든 코어)
+TUNE_N_CANDIDATES = int(os.getenv('TUNE_N_CANDIDATES', '0'))          # 0이면 전체 그리드, 아니면 무작위 N개
+TUNE_MAX_ESTIMATORS = int(os.getenv('TUNE_MAX_ESTIMATORS', '1000'))   # 조기 종료 전 최대 트리 수
+TUNE_EARLY_STOPPING = int(os.getenv('TUNE_EARLY_STOPPING', '50'))     # 검증 logloss가 이 횟수만큼 개선되지 않으면 종료
+TUNE_KEEP_RATIO = float(os.getenv('TUNE_KEEP_RATIO', '0.5'))          # 가지치기 때 남길 후보 비율
+TUNE_PRUNE_WAVES = int(os.getenv('TUNE_PRUNE_WAVES', '2'))            # 앞의 몇 개 fold 뒤에 가지치기할지
+TUNE_SPACE_PATH = os.getenv('TUNE_SPACE')                             # 탐색 공간 JSON 파일 (없으면 기본값)
+
+# 기본 탐색 공간 (n_estimators는 조기 종료로 정해짐)
+DEFAULT_SPACE = {
+    'learning_rate': [0.03, 0.1, 0.3],
+    'max_depth': [3, 4, 6],
+    'min_child_weight': [1, 5],
+    'subsample': [0.8, 1.0],
+    'colsample_bytree': [0.8, 1.0],
+}
+
+
+def load_space(path=None):
+    """탐색 공간 로드 (path가 없으면 TUNE_SPACE 환경 변수의 파일). JSON 파일 형식: {"파라미터": [값, ...], ...}"""
+    path = path or TUNE_SPACE_PATH
+    if not path:
+        return DEFAULT_SPACE
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def make_candidates(space, n_candidates=TUNE_N_CANDIDATES, random_state=42):
+    """전체 그리드 또는 무작위 n_candidates개의 파라미터 조합 목록."""
+    if n_candidates and n_candidates < len(ParameterGrid(space)):
+        return list(ParameterSampler(space, n_iter=n_candidates, random_state=random_state))
+    return list(ParameterGrid(space))
+
+
+def prepare_folds(preprocessor, X, y, n_splits=TUNE_FOLDS, random_state=42):
+    """
+    fold마다 전처리기를 한 번만 학습해 변환 결과를 저장합니다.
+    모든 후보가 같은 fold 배열을 공유하므로 ColumnTransformer를 후보마다 다시 학습하지 않습니다.
+    (joblib은 큰 numpy 배열을 작업 프로세스에 메모리 매핑으로 전달합니다)
+    """
+    skf = StratifiedKFold(n_splits=n_splits, shuffle=True, random_state=random_state)
+    folds = []
+    for train_idx, valid_idx in skf.split(X, y):
+        fold_pre = clone(preprocessor)
+        X_train = fold_pre.fit_transform(X.iloc[train_idx])
+        X_valid = fold_pre.transform(X.iloc[valid_idx])
+        if hasattr(X_train, 'toarray'):
+            X_train, X_valid = X_train.toarray(), X_valid.toarray()
+        folds.append((np.asarray(X_train, dtype=np.float32), y.iloc[train_idx].to_numpy(),
+                      np.asarray(X_valid, dtype=np.float32), y.iloc[valid_idx].to_numpy()))
+    return folds
+
+
+def run_trial(candidate_id, params, fold_id, fold, max_estimators=TUNE_MAX_ESTIMATORS,
+              early_stopping=TUNE_EARLY_STOPPING):
+    """후보 하나를 fold 하나에서 조기 종료와 함께 학습하고 검증 지표를 반환합니다."""
+    X_train, y_train, X_valid, y_valid = fold
+    start = time.perf_counter()
+    # 후보 파라미터가 기본값(random_state, scale_pos_weight 등)과 이름이 같으면 후보 값을 사용
+    defaults = {'n_estimators': max_estimators, 'early_stopping_rounds': early_stopping,
+                'random_state': 42, 'eval_metric': 'logloss', 'n_jobs': 1,
+                'scale_pos_weight': (y_train == 0).sum() / max((y_train == 1).sum(), 1)}
+    model = XGBClassifier(**{**defaults, **params})
+    model.fit(X_train, y_train, eval_set=[(X_valid, y_valid)], verbose=False)
+    proba = model.predict_proba(X_valid)[:, 1]
+    return {
+        'candidate': candidate_id,
+        'fold': fold_id,
+        'auc': roc_auc_score(y_valid, proba),
+        'f1': f1_score(y_valid, (proba >= 0.5).astype(int)),
+        'logloss': log_loss(y_valid, proba, labels=[0, 1]),
+        'best_iteration': int(model.best_iteration),
+        'fit_seconds': time.perf_counter() - start,
+    }
+
+
+def tune(preprocessor, X, y, space=None, n_jobs=TUNE_JOBS, keep_ratio=TUNE_KEEP_RATIO,
+         prune_waves=TUNE_PRUNE_WAVES, results_path=None):
+    """
+    k-fold 교차 검증 하이퍼파라미터 탐색.
+
+    fold 단위로 진행합니다(wave). 앞의 prune_waves개 wave가 끝날 때마다 그때까지의 평균 AUC로
+    후보를 정렬해 상위 keep_ratio만 남기고 나머지는 'pruned'로 기록합니다. 각 wave 안에서는
+    (후보 x fold) 학습을 joblib으로 병렬 실행합니다.
+
+    반환: (후보별 결과 DataFrame (AUC 내림차순), 최적 파라미터 dict (n_estimators 포함))
+    """
+    candidates = make_candidates(space or load_space())
+    start = time.perf_counter()
+    print(f"하이퍼파라미터 탐색: 후보 {len(candidates)}개, {TUNE_FOLDS}-fold, 병렬 작업 {n_jobs}")
+    folds = prepare_folds(preprocessor, X, y)
+    print(f"fold별 전처리 완료 ({time.perf_counter() - start:.1f}초)")
+
+    trials = []
+    survivors = list(range(len(candidates)))
+    pruned_at = {}
+    with Parallel(n_jobs=n_jobs) as parallel:
+        for fold_id, fold in enumerate(folds):
+            wave_start = time.perf_counter()
+            trials += parallel(delayed(run_trial)(c, candidates[c], fold_id, fold) for c in survivors)
+            print(f" wave {fold_id + 1}/{len(folds)}: 후보 {len(survivors)}개 ({time.perf_counter() - wave_start:.1f}초)")
+            if fold_id < prune_waves and fold_id < len(folds) - 1 and len(survivors) > 1:
+                scores = pd.DataFrame(trials).groupby('candidate')['auc'].mean()
+                ranked = scores.loc[survivors].sort_values(ascending=False)
+                keep = max(1, math.ceil(len(survivors) * keep_ratio))
+                for c in ranked.index[keep:]:
+                    pruned_at[c] = fold_id + 1
+                survivors = list(ranked.index[:keep])
+
+    df_trials = pd.DataFrame(trials)
+    summary = df_trials.groupby('candidate').agg(
+        folds=('fold', 'count'),
+        auc_mean=('auc', 'mean'), auc_std=('auc', 'std'),
+        f1_mean=('f1', 'mean'), logloss_mean=('logloss', 'mean'),
+        best_iteration_mean=('best_iteration', 'mean'),
+        fit_seconds=('fit_seconds', 'sum'),
+    ).reset_index()
+    summary['status'] = ['pruned' if c in pruned_at else 'complete' for c in summary['candidate']]
+    summary['pruned_after_fold'] = summary['candidate'].map(pruned_at)
+    summary['params'] = [json.dumps(candidates[c], sort_keys=True) for c in summary['candidate']]
+    summary = summary.sort_values(['status', 'auc_mean'], ascending=[True, False]).reset_index(drop=True)
+
+    if results_path:
+        os.makedirs(os.path.dirname(results_path) or '.', exist_ok=True)
+        summary.to_csv(results_path, index=False)
+        print(f"탐색 결과 저장: {results_path}")
+
+    best = summary[summary['status'] == 'complete'].iloc[0]
+    best_params = dict(candidates[int(best['candidate'])])
+    best_params['n_estimators'] = int(round(best['best_iteration_mean'])) + 1
+    print(f"탐색 완료 ({time.perf_counter() - start:.1f}초). 최적 후보: AUC {best['auc_mean']:.4f} ± "
+          f"{best['auc_std']:.4f}, {best_params}")
+    return summary, best_params